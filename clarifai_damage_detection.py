@@ -16,8 +16,13 @@ Features:
 """
 
 import os
+import re
 import json
-import base64
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
 from typing import Dict, List, Optional
 
 # Check if clarifai is installed
@@ -30,23 +35,153 @@ except ImportError:
     CLARIFAI_AVAILABLE = False
     print("[Clarifai] Package not installed. Install with: pip install clarifai-grpc")
 
+# OpenCV is optional here - only needed for downsample=True
+try:
+    import cv2
+    import numpy as np
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+# Damage-related concept names for classification models
+_DAMAGE_KEYWORD_RE = re.compile(
+    r'damage|dent|scratch|crack|broken|bent|crushed|collision', re.IGNORECASE
+)
+
+# Severity thresholds: confidence > 0.5 is Moderate, > 0.8 is Severe
+_SEVERITY_BOUNDS = (0.5, 0.8)
+_SEVERITY_LABELS = ('Minor', 'Moderate', 'Severe')
+
+# Image sources Clarifai can fetch itself (sent by URL instead of bytes)
+_URL_PREFIXES = ('http://', 'https://')
+
+# downsample=True re-encodes images larger than this many bytes so their
+# longest side is at most DOWNSAMPLE_MAX_SIDE px (Clarifai's detection
+# models work at well below that resolution)
+DOWNSAMPLE_MIN_BYTES = 512_000
+DOWNSAMPLE_MAX_SIDE = 1024
+DOWNSAMPLE_JPEG_QUALITY = 85
+
+# Clarifai accepts at most this many inputs per PostModelOutputs request
+MAX_BATCH_INPUTS = 128
+
+# Shared gRPC stub (created on first use, reused across calls)
+_STUB = None
+_STUB_LOCK = threading.Lock()
+
+
+def _get_stub():
+    """Return the shared V2Stub, opening the gRPC channel on first use."""
+    global _STUB
+    if _STUB is None:
+        with _STUB_LOCK:
+            if _STUB is None:
+                _STUB = service_pb2_grpc.V2Stub(ClarifaiChannel.get_grpc_channel())
+    return _STUB
+
+
+def _read_image_bytes(image_path: str) -> bytes:
+    """Read an image file with one unbuffered read sized from fstat."""
+    fd = os.open(image_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size)
+        # os.read may return short reads for very large files
+        if len(data) < size:
+            chunks = [data]
+            while True:
+                chunk = os.read(fd, size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            data = b''.join(chunks)
+        return data
+    finally:
+        os.close(fd)
+
+
+def _downsample_image_bytes(image_bytes: bytes) -> bytes:
+    """
+    Shrink a large image to DOWNSAMPLE_MAX_SIDE px on its longest side and
+    re-encode it as JPEG. Returns the original bytes if OpenCV is missing,
+    the image is already small, or decoding fails.
+    """
+    if not OPENCV_AVAILABLE or len(image_bytes) <= DOWNSAMPLE_MIN_BYTES:
+        return image_bytes
+    
+    img = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return image_bytes
+    
+    height, width = img.shape[:2]
+    scale = DOWNSAMPLE_MAX_SIDE / max(height, width)
+    if scale < 1:
+        img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+    
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, DOWNSAMPLE_JPEG_QUALITY])
+    if not ok or encoded.nbytes >= len(image_bytes):
+        return image_bytes
+    return encoded.tobytes()
+
+
+def _load_image_source(image_path: str, downsample: bool = False):
+    """
+    Resolve an input to (url, image_bytes).
+    HTTP(S) URLs are passed through for Clarifai to fetch server-side; local
+    files are read and sent as raw bytes (Image.base64 is a proto bytes
+    field, so no base64 encoding happens client-side), optionally downscaled.
+    """
+    if image_path.startswith(_URL_PREFIXES):
+        return image_path, None
+    image_bytes = _read_image_bytes(image_path)
+    if downsample:
+        image_bytes = _downsample_image_bytes(image_bytes)
+    return None, image_bytes
+
+
+@lru_cache(maxsize=32)
+def _request_template(user_id: str, app_id: str, model_id: str):
+    """Prebuilt request header for a model. Never mutated - copy it with _new_request."""
+    return service_pb2.PostModelOutputsRequest(
+        user_app_id=resources_pb2.UserAppIDSet(user_id=user_id, app_id=app_id),
+        model_id=model_id
+    )
+
+
+def _new_request(user_id: str, app_id: str, model_id: str):
+    """Return a fresh PostModelOutputsRequest copied from the cached template."""
+    request = service_pb2.PostModelOutputsRequest()
+    request.CopyFrom(_request_template(user_id, app_id, model_id))
+    return request
+
+
+def _add_input(request, url: Optional[str], image_bytes: Optional[bytes]) -> None:
+    """Append one image input to the request, filling the nested messages in place."""
+    image = request.inputs.add().data.image
+    if url is not None:
+        image.url = url
+    else:
+        image.base64 = image_bytes
+
 
 def detect_damage_clarifai(
     image_path: str,
     pat: str = None,
     user_id: str = "clarifai",
     app_id: str = "main",
-    model_id: str = "general-image-detection"
+    model_id: str = "general-image-detection",
+    downsample: bool = False
 ) -> Dict:
     """
     Detect vehicle damage using Clarifai's models.
     
     Args:
-        image_path: Path to the vehicle image
+        image_path: Path to the vehicle image, or an http(s) URL Clarifai can fetch
         pat: Personal Access Token (or uses CLARIFAI_PAT env var)
         user_id: Clarifai user ID (default: "clarifai" for pre-built models)
         app_id: App ID (default: "main")
         model_id: Model to use for detection
+        downsample: Downscale large local images before upload (needs opencv-python)
     
     Returns:
         Dictionary with detected objects and potential damages
@@ -67,29 +202,15 @@ def detect_damage_clarifai(
         }
     
     try:
-        # Setup gRPC channel
-        channel = ClarifaiChannel.get_grpc_channel()
-        stub = service_pb2_grpc.V2Stub(channel)
+        # Reuse the shared gRPC channel
+        stub = _get_stub()
         
         # Create metadata with PAT
         metadata = (('authorization', f'Key {pat}'),)
         
-        # Read and encode image
-        with open(image_path, 'rb') as f:
-            image_bytes = f.read()
-        
         # Create request
-        request = service_pb2.PostModelOutputsRequest(
-            user_app_id=resources_pb2.UserAppIDSet(user_id=user_id, app_id=app_id),
-            model_id=model_id,
-            inputs=[
-                resources_pb2.Input(
-                    data=resources_pb2.Data(
-                        image=resources_pb2.Image(base64=image_bytes)
-                    )
-                )
-            ]
-        )
+        request = _new_request(user_id, app_id, model_id)
+        _add_input(request, *_load_image_source(image_path, downsample))
         
         # Make prediction
         response = stub.PostModelOutputs(request, metadata=metadata)
@@ -102,46 +223,7 @@ def detect_damage_clarifai(
             }
         
         # Parse results
-        damages = []
-        output = response.outputs[0]
-        
-        # Handle detection models (with bounding boxes)
-        if output.data.regions:
-            for region in output.data.regions:
-                bbox = region.region_info.bounding_box
-                
-                # Get the top concept for this region
-                concepts = region.data.concepts
-                if concepts:
-                    top_concept = max(concepts, key=lambda c: c.value)
-                    
-                    damage = {
-                        'label': top_concept.name,
-                        'confidence': top_concept.value * 100,
-                        'extent': classify_severity_clarifai(top_concept.value),
-                        'box': {
-                            'x_percent': bbox.left_col * 100,
-                            'y_percent': bbox.top_row * 100,
-                            'width_percent': (bbox.right_col - bbox.left_col) * 100,
-                            'height_percent': (bbox.bottom_row - bbox.top_row) * 100
-                        }
-                    }
-                    damages.append(damage)
-        
-        # Handle classification models (concepts without boxes)
-        elif output.data.concepts:
-            # Filter for damage-related concepts
-            damage_keywords = ['damage', 'dent', 'scratch', 'crack', 'broken', 'bent', 'crushed', 'collision']
-            
-            for concept in output.data.concepts:
-                if any(kw in concept.name.lower() for kw in damage_keywords) or concept.value > 0.5:
-                    damage = {
-                        'label': concept.name,
-                        'confidence': concept.value * 100,
-                        'extent': classify_severity_clarifai(concept.value),
-                        'location': 'General (classification model)'
-                    }
-                    damages.append(damage)
+        damages = _parse_output(response.outputs[0])
         
         return {
             'success': True,
@@ -160,14 +242,181 @@ def detect_damage_clarifai(
         }
 
 
+def detect_damage_clarifai_batch(
+    image_paths: List[str],
+    pat: str = None,
+    user_id: str = "clarifai",
+    app_id: str = "main",
+    model_id: str = "general-image-detection",
+    max_workers: int = 8,
+    downsample: bool = False
+) -> List[Dict]:
+    """
+    Detect vehicle damage in many images, packing them into batched requests.
+    
+    Images are read in parallel and sent as the inputs of one
+    PostModelOutputs request (up to MAX_BATCH_INPUTS per request) on the
+    shared channel, so N images cost one round trip instead of N.
+    
+    Args:
+        image_paths: Paths to the vehicle images (or http(s) URLs)
+        pat: Personal Access Token (or uses CLARIFAI_PAT env var)
+        user_id: Clarifai user ID (default: "clarifai" for pre-built models)
+        app_id: App ID (default: "main")
+        model_id: Model to use for detection
+        max_workers: Number of threads used to read image files
+        downsample: Downscale large local images before upload (needs opencv-python)
+    
+    Returns:
+        List of result dictionaries (same format as detect_damage_clarifai),
+        in the same order as image_paths
+    """
+    if not CLARIFAI_AVAILABLE:
+        return [{
+            'success': False,
+            'error': 'Clarifai package not installed. Run: pip install clarifai-grpc',
+            'damages': []
+        } for _ in image_paths]
+    
+    pat = pat or os.environ.get('CLARIFAI_PAT')
+    if not pat:
+        return [{
+            'success': False,
+            'error': 'CLARIFAI_PAT environment variable not set. Get PAT from https://clarifai.com/settings/security',
+            'damages': []
+        } for _ in image_paths]
+    
+    def read(path):
+        # Any read or decode failure (OSError, cv2.error, ...) fails only this image
+        try:
+            return _load_image_source(path, downsample), None
+        except Exception as e:
+            return None, str(e)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(image_paths)))) as executor:
+        loaded = list(executor.map(read, image_paths))
+    
+    results = [None] * len(image_paths)
+    pending = []
+    for i, (source, error) in enumerate(loaded):
+        if error is not None:
+            results[i] = {'success': False, 'provider': 'Clarifai', 'error': error, 'damages': []}
+        else:
+            pending.append(i)
+    
+    metadata = (('authorization', f'Key {pat}'),)
+    
+    for start in range(0, len(pending), MAX_BATCH_INPUTS):
+        chunk = pending[start:start + MAX_BATCH_INPUTS]
+        try:
+            request = _new_request(user_id, app_id, model_id)
+            for i in chunk:
+                _add_input(request, *loaded[i][0])
+            response = _get_stub().PostModelOutputs(request, metadata=metadata)
+            
+            # MIXED_STATUS means some inputs failed; check each output's own status
+            if response.status.code not in (status_code_pb2.SUCCESS, status_code_pb2.MIXED_STATUS):
+                for i in chunk:
+                    results[i] = {
+                        'success': False,
+                        'error': f"Clarifai API error: {response.status.description}",
+                        'damages': []
+                    }
+                continue
+            
+            for i, output in zip(chunk, response.outputs):
+                if output.status.code != status_code_pb2.SUCCESS:
+                    results[i] = {
+                        'success': False,
+                        'error': f"Clarifai API error: {output.status.description}",
+                        'damages': []
+                    }
+                    continue
+                damages = _parse_output(output)
+                results[i] = {
+                    'success': True,
+                    'provider': 'Clarifai',
+                    'model': model_id,
+                    'damages': damages,
+                    'total_damages': len(damages)
+                }
+        
+        except Exception as e:
+            for i in chunk:
+                results[i] = {
+                    'success': False,
+                    'provider': 'Clarifai',
+                    'error': str(e),
+                    'damages': []
+                }
+    
+    return [
+        result if result is not None else {
+            'success': False,
+            'provider': 'Clarifai',
+            'error': 'No output returned for this input',
+            'damages': []
+        }
+        for result in results
+    ]
+
+
+def _parse_output(output) -> List[Dict]:
+    """Convert one Clarifai model output into our standard damage dicts."""
+    damages = []
+    
+    # Handle detection models (with bounding boxes)
+    regions = output.data.regions
+    if regions:
+        # Bind hot names locally for the per-region loop
+        classify = classify_severity_clarifai
+        by_value = attrgetter('value')
+        append = damages.append
+        
+        for region in regions:
+            # Get the top concept for this region
+            concepts = region.data.concepts
+            if not concepts:
+                continue
+            top_concept = max(concepts, key=by_value)
+            value = top_concept.value
+            
+            bbox = region.region_info.bounding_box
+            left, top = bbox.left_col, bbox.top_row
+            right, bottom = bbox.right_col, bbox.bottom_row
+            
+            append({
+                'label': top_concept.name,
+                'confidence': value * 100,
+                'extent': classify(value),
+                'box': {
+                    'x_percent': left * 100,
+                    'y_percent': top * 100,
+                    'width_percent': (right - left) * 100,
+                    'height_percent': (bottom - top) * 100
+                }
+            })
+    
+    # Handle classification models (concepts without boxes)
+    elif output.data.concepts:
+        # Filter for damage-related concepts
+        for concept in output.data.concepts:
+            if concept.value > 0.5 or _DAMAGE_KEYWORD_RE.search(concept.name):
+                damage = {
+                    'label': concept.name,
+                    'confidence': concept.value * 100,
+                    'extent': classify_severity_clarifai(concept.value),
+                    'location': 'General (classification model)'
+                }
+                damages.append(damage)
+    
+    return damages
+
+
 def classify_severity_clarifai(confidence: float) -> str:
     """Classify severity based on confidence."""
-    if confidence > 0.8:
-        return 'Severe'
-    elif confidence > 0.5:
-        return 'Moderate'
-    else:
-        return 'Minor'
+    # bisect_left counts bounds strictly below confidence, matching the '>' thresholds
+    return _SEVERITY_LABELS[bisect_left(_SEVERITY_BOUNDS, confidence)]
 
 
 # ============================================================================
@@ -204,6 +453,7 @@ if __name__ == "__main__":
     print("\nUsage:")
     print("   from clarifai_damage_detection import detect_damage_clarifai")
     print("   result = detect_damage_clarifai('car_image.jpg')")
+    print("   results = detect_damage_clarifai_batch(['car1.jpg', 'car2.jpg'])")
 
 
 
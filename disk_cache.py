@@ -0,0 +1,182 @@
+"""
+Shared On-Disk Result Cache
+===========================
+One JSON-file-per-key cache used by the provider modules, so they share a
+key scheme, expiry and eviction instead of each growing their own.
+
+- file_digest(): blake2b content hash of an image, memoized per (path, mtime, size)
+- cache_key(): blake2b key over arbitrary JSON-serialisable parts
+- JsonDiskCache: atomic JSON entries with optional TTL, periodic LRU eviction
+  and an in-memory LRU memo in front of the files
+"""
+
+import os
+import json
+import mmap
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+# orjson parses and serialises faster; fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+
+@lru_cache(maxsize=128)
+def _file_digest(path: str, mtime_ns: int, size: int) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        # Hash straight from a read-only mapping instead of copying the file into a bytes object
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+    return digest.digest()
+
+
+def file_digest(path: str) -> bytes:
+    """Content hash of a file; memoized per (path, mtime, size) so callers share one read."""
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_mtime_ns, stat.st_size)
+
+
+def cache_key(*parts) -> str:
+    """Hex cache key over parts (bytes are hashed as-is, anything else as sorted JSON)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, default=str).encode('utf-8')
+        digest.update(len(part).to_bytes(8, 'little'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class JsonDiskCache:
+    """
+    JSON values stored as <directory>/<key>.json.
+
+    Entries are written to a temp file and renamed, so readers never see a
+    partial entry; an unreadable or corrupt entry counts as a miss and is
+    removed. Entries older than ttl_seconds (0 = never) are misses. Hits
+    touch the file, and every evict_every writes the directory is trimmed to
+    the max_entries most recently used (0 = unbounded). The newest memo_size
+    entries are also kept in memory, least recently used dropped first.
+    get() always returns a freshly decoded copy.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float = 0, max_entries: int = 0,
+                 memo_size: int = 0, evict_every: int = 64):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memo_size = memo_size
+        self.evict_every = evict_every
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            self._memo.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _remember(self, key: str, raw: bytes) -> None:
+        if not self.memo_size:
+            return
+        with self._lock:
+            self._memo[key] = raw
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def get(self, key: str, ttl_seconds: Optional[float] = None):
+        """Return the cached value for key, or None on a miss."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        path = self._path(key)
+
+        with self._lock:
+            raw = self._memo.get(key)
+            if raw is not None:
+                self._memo.move_to_end(key)
+        from_disk = raw is None
+        if from_disk:
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+            except OSError:
+                return None
+
+        try:
+            entry = _json_loads(raw)
+            created, value = entry['created'], entry['value']
+            expired = bool(ttl) and time.time() - created >= ttl
+        except (ValueError, KeyError, TypeError):
+            self._remove(key)
+            return None
+        if expired:
+            self._remove(key)
+            return None
+
+        if from_disk:
+            try:
+                os.utime(path)  # Mark as recently used
+            except OSError:
+                pass
+            self._remember(key, raw)
+        return value
+
+    def put(self, key: str, value) -> bool:
+        """Store a JSON-serialisable value; returns False if it couldn't be serialised or written."""
+        try:
+            raw = _json_dumps({'created': time.time(), 'value': value})
+        except (TypeError, ValueError):
+            return False
+        self._remember(key, raw)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(raw)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return False
+
+        with self._lock:
+            self._writes += 1
+            evict = self.max_entries and self._writes % self.evict_every == 0
+        if evict:
+            self.evict()
+        return True
+
+    def evict(self) -> None:
+        """Remove the least recently used entries beyond max_entries."""
+        try:
+            with os.scandir(self.directory) as entries:
+                files = [(e.stat().st_mtime, e.path) for e in entries if e.name.endswith('.json')]
+        except OSError:
+            return
+        if len(files) <= self.max_entries:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
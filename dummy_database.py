@@ -5,24 +5,54 @@ Loads repair cost estimates from JSON file for easy maintenance and updates.
 """
 
 import json
+import logging
+import mmap
 import os
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path
 
+# orjson parses the database several times faster; fall back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
 # Path to the JSON database file
 _DB_FILE = Path(__file__).parent / "dummy_indian_vehicle_repair_estimates.json"
 
+def _parse_json_file(f):
+    """
+    Parse JSON from a file opened in binary mode.
+    With orjson the file is memory-mapped and parsed in place, skipping the
+    read() copy; otherwise it falls back to json.loads on the file bytes.
+    """
+    if orjson is None:
+        return json.loads(f.read())
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # Empty files cannot be mapped
+        return orjson.loads(f.read())
+    with mm, memoryview(mm) as view:
+        return orjson.loads(view)
+
+
 def _load_database():
     """Load the database from JSON file."""
     try:
-        if _DB_FILE.exists():
-            with open(_DB_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # New file is a flat list, return as-is
-                return data if isinstance(data, list) else []
-        else:
-            # Return empty list if file doesn't exist yet
-            print(f"Warning: Database file not found at {_DB_FILE}. Using empty database.")
-            return []
+        with open(_DB_FILE, 'rb') as f:
+            data = _parse_json_file(f)
+        # New file is a flat list, return as-is
+        return data if isinstance(data, list) else []
+    except FileNotFoundError:
+        # Return empty list if file doesn't exist yet
+        print(f"Warning: Database file not found at {_DB_FILE}. Using empty database.")
+        return []
     except json.JSONDecodeError as e:
         print(f"Error: Invalid JSON in database file: {e}")
         return []
@@ -30,8 +60,152 @@ def _load_database():
         print(f"Error loading database: {e}")
         return []
 
+# Direct mappings to the JSON "DamageType" format
+_FORMAT_MAPPINGS = {
+    "scratch": "Scratch",
+    "scratches": "Scratch",
+    "scraches": "Scratch",  # Handle typo
+    "paint chips": "Scratch",
+    "paint_chips": "Scratch",
+    "paint chip": "Scratch",
+    "paint_chip": "Scratch",
+    "paint damage": "Scratch",
+    "paint_damage": "Scratch",
+    "dent": "Dent",
+    "dents": "Dent",
+    "broken_headlight": "Headlight damage",
+    "broken headlight": "Headlight damage",
+    "headlight damage": "Headlight damage",
+    "headlight": "Headlight damage",
+    "headlights": "Headlight damage",
+    "broken_windshield": "Broken windshield",
+    "broken windshield": "Broken windshield",
+    "windshield": "Broken windshield",
+    "windshield crack": "Broken windshield",
+    "windshield_crack": "Broken windshield",
+    "bumper_damage": "Bumper crack",
+    "bumper damage": "Bumper crack",
+    "bumper crack": "Bumper crack",
+    "bumper": "Bumper crack",
+    "door_damage": "Door damage",
+    "door damage": "Door damage",
+    "door": "Door damage",
+    "broken_side_mirror": "Broken side mirror",
+    "broken side mirror": "Broken side mirror",
+    "side mirror": "Broken side mirror",
+    "mirror": "Broken side mirror"
+}
+
+# Legacy damage keys (lowercase with underscores), including common typos
+_DAMAGE_TYPE_MAPPINGS = {
+    "scratch": "scratch",
+    "scratches": "scratch",
+    "scraches": "scratch",  # Handle typo "Scraches"
+    "scrach": "scratch",  # Handle typo
+    "scrachs": "scratch",  # Handle typo
+    "paint_chips": "scratch",  # Paint chips are similar to scratches
+    "paint_chip": "scratch",
+    "paint chips": "scratch",
+    "paint chip": "scratch",
+    "paint_damage": "scratch",  # General paint damage
+    "paint_damages": "scratch",
+    "paint": "scratch",  # General paint issues
+    "dent": "dent",
+    "dents": "dent",
+    "broken_headlight": "broken_headlight",
+    "broken_headlights": "broken_headlight",
+    "broken headlight": "broken_headlight",
+    "headlight": "broken_headlight",
+    "headlights": "broken_headlight",
+    "broken_windshield": "broken_windshield",
+    "broken windshield": "broken_windshield",
+    "windshield": "broken_windshield",
+    "windshield_crack": "broken_windshield",
+    "windshield_cracks": "broken_windshield",
+    "crack": "broken_windshield",  # If just "crack", assume windshield
+    "bumper_damage": "bumper_damage",
+    "bumper": "bumper_damage",
+    "bumpers": "bumper_damage",
+    "door_damage": "door_damage",
+    "door": "door_damage",
+    "doors": "door_damage"
+}
+
+
+def _compile_keyword_rules(rules):
+    """
+    Compile (pattern, label) rules into a single regex plus a label tuple.
+    Each rule is an anchored lookahead, so the first rule that matches anywhere
+    in the text wins (same precedence as an if/elif chain) and
+    match.lastindex - 1 indexes its label.
+    """
+    rules = tuple(rules)
+    pattern = "|".join(f"^(?=.*?({rule}))" for rule, _ in rules)
+    return re.compile(pattern, re.DOTALL), tuple(label for _, label in rules)
+
+
+# Keyword fallbacks, in priority order
+_FORMAT_KEYWORD_RE, _FORMAT_KEYWORD_LABELS = _compile_keyword_rules((
+    (r"headlight", "Headlight damage"),
+    (r"windshield|wind_screen|wind screen", "Broken windshield"),
+    (r"bumper", "Bumper crack"),
+    (r"door", "Door damage"),
+    (r"mirror", "Broken side mirror"),
+    (r"scratch|paint", "Scratch"),
+    (r"dent", "Dent"),
+))
+
+# Fuzzy "contains" matching over _DAMAGE_TYPE_MAPPINGS, in dict order:
+# the regex finds the first key contained in the text, and a find() over the
+# NUL-joined keys finds the first key containing the text.
+_DAMAGE_TYPE_KEY_RE, _DAMAGE_TYPE_KEY_VALUES = _compile_keyword_rules(
+    (re.escape(key), value) for key, value in _DAMAGE_TYPE_MAPPINGS.items()
+)
+_DAMAGE_TYPE_KEYS_JOINED = "\0".join(_DAMAGE_TYPE_MAPPINGS)
+_DAMAGE_TYPE_KEY_STARTS = list(
+    accumulate((len(key) + 1 for key in _DAMAGE_TYPE_MAPPINGS), initial=0)
+)[:-1]
+
+_DAMAGE_TYPE_KEYWORD_RE, _DAMAGE_TYPE_KEYWORD_LABELS = _compile_keyword_rules((
+    (r"\Ascrat|paint", "scratch"),  # Paint chips and paint damage map to scratch
+    (r"\Adent", "dent"),
+    (r"headlight|head_light", "broken_headlight"),
+    (r"windshield|wind_screen", "broken_windshield"),
+    (r"bumper", "bumper_damage"),
+    (r"door", "door_damage"),
+))
+
+def _build_index(entries):
+    """
+    Build a hash index over the database for O(1) lookups.
+    
+    Returns:
+        Dict keyed by lowercased (brand, model, year, damage_type). Each value
+        is (any_variant_cost, {variant_lower: cost}) so one probe yields both
+        the exact-variant and the any-variant candidate. The first entry with a
+        cost wins, matching the order of the original linear scan.
+    """
+    index = {}
+    for entry in entries:
+        cost = entry.get("EstimatedRepairCost")
+        if cost is None:
+            continue
+        key = (
+            entry.get("Brand", "").lower(),
+            entry.get("Model", "").lower(),
+            entry.get("Year"),
+            entry.get("DamageType", "").lower(),
+        )
+        slot = index.get(key)
+        if slot is None:
+            slot = index[key] = (cost, {})
+        slot[1].setdefault(entry.get("Variant", "").lower(), cost)
+    return index
+
+
 # Load the database
 data = _load_database()
+_INDEX = _build_index(data)
 
 # Export for backward compatibility
 dummy_data = data
@@ -54,54 +228,84 @@ def get_repair_cost(make, model, year, damage_type, severity=None, variant=None)
         Estimated cost in INR if match found, None otherwise
     """
     if not data or not isinstance(data, list):
-        print("DEBUG: Database not loaded or empty")
+        logger.debug("Database not loaded or empty")
         return None
     
     # Normalize damage_type to match JSON format
     normalized_damage = _normalize_damage_type_for_lookup(damage_type)
     
     if not normalized_damage:
-        print(f"DEBUG: Could not normalize damage type: {damage_type}")
+        logger.debug("Could not normalize damage type: %s", damage_type)
         return None
     
-    print(f"DEBUG: Searching for {make} {model} {year} (variant: {variant}) - {normalized_damage}")
+    logger.debug("Searching for %s %s %s (variant: %s) - %s", make, model, year, variant, normalized_damage)
+    
+    slot = _INDEX.get((make.lower(), model.lower(), year, normalized_damage.lower()))
     
-    # Try exact match first (with variant if provided)
-    for entry in data:
-        brand_match = entry.get("Brand", "").lower() == make.lower()
-        model_match = entry.get("Model", "").lower() == model.lower()
-        year_match = entry.get("Year") == year
-        damage_match = entry.get("DamageType", "").lower() == normalized_damage.lower()
-        variant_match = True  # Default to True if variant not provided
+    if slot is not None:
+        any_variant_cost, variant_costs = slot
         
-        if variant:
-            variant_match = entry.get("Variant", "").lower() == variant.lower()
+        # Try exact match first (with variant if provided)
+        cost = variant_costs.get(variant.lower()) if variant else any_variant_cost
+        if cost is not None:
+            logger.debug("Found cost ₹%s for %s %s %s - %s", cost, make, model, year, normalized_damage)
+            return cost
         
-        if brand_match and model_match and year_match and damage_match and variant_match:
-            cost = entry.get("EstimatedRepairCost")
-            if cost is not None:
-                print(f"DEBUG: Found cost ₹{cost} for {make} {model} {year} - {normalized_damage}")
-                return cost
-    
-    # If variant was provided but no match, try without variant
-    if variant:
-        print(f"DEBUG: No match with variant '{variant}', trying without variant...")
-        for entry in data:
-            if (
-                entry.get("Brand", "").lower() == make.lower() and
-                entry.get("Model", "").lower() == model.lower() and
-                entry.get("Year") == year and
-                entry.get("DamageType", "").lower() == normalized_damage.lower()
-            ):
-                cost = entry.get("EstimatedRepairCost")
-                if cost is not None:
-                    print(f"DEBUG: Found cost ₹{cost} for {make} {model} {year} - {normalized_damage} (any variant)")
-                    return cost
+        # If variant was provided but no match, fall back to any variant
+        logger.debug(
+            "No match with variant '%s', found cost ₹%s for %s %s %s - %s (any variant)",
+            variant, any_variant_cost, make, model, year, normalized_damage
+        )
+        return any_variant_cost
     
-    print(f"DEBUG: No cost found for {make} {model} {year} - {normalized_damage}")
+    logger.debug("No cost found for %s %s %s - %s", make, model, year, normalized_damage)
     return None
 
 
+def get_repair_costs(queries):
+    """
+    Get repair cost estimates for many vehicles/damages at once.
+    
+    Each distinct damage type is normalized only once, and every query is a
+    direct index probe (no per-query logging), which makes this the
+    preferred entry point for bulk lookups.
+    
+    Args:
+        queries: Iterable of (make, model, year, damage_type) or
+                 (make, model, year, damage_type, variant) tuples
+    
+    Returns:
+        List of estimated costs in INR (None where no match), in query order
+    """
+    if not data or not isinstance(data, list):
+        return [None for _ in queries]
+    
+    normalized_cache = {}
+    costs = []
+    for query in queries:
+        make, model, year, damage_type = query[:4]
+        variant = query[4] if len(query) > 4 else None
+        
+        if damage_type not in normalized_cache:
+            normalized = _normalize_damage_type_for_lookup(damage_type)
+            normalized_cache[damage_type] = normalized.lower() if normalized else None
+        damage_lower = normalized_cache[damage_type]
+        if not damage_lower:
+            costs.append(None)
+            continue
+        
+        slot = _INDEX.get((make.lower(), model.lower(), year, damage_lower))
+        if slot is None:
+            costs.append(None)
+            continue
+        any_variant_cost, variant_costs = slot
+        cost = variant_costs.get(variant.lower()) if variant else None
+        costs.append(any_variant_cost if cost is None else cost)
+    
+    return costs
+
+
+@lru_cache(maxsize=1024)
 def _normalize_damage_type_for_lookup(damage_type):
     """
     Normalize damage type to match the format in dummy_indian_vehicle_repair_estimates.json.
@@ -112,66 +316,21 @@ def _normalize_damage_type_for_lookup(damage_type):
     
     damage_lower = damage_type.lower().strip()
     
-    # Direct mappings to JSON format
-    format_mappings = {
-        "scratch": "Scratch",
-        "scratches": "Scratch",
-        "scraches": "Scratch",  # Handle typo
-        "paint chips": "Scratch",
-        "paint_chips": "Scratch",
-        "paint chip": "Scratch",
-        "paint_chip": "Scratch",
-        "paint damage": "Scratch",
-        "paint_damage": "Scratch",
-        "dent": "Dent",
-        "dents": "Dent",
-        "broken_headlight": "Headlight damage",
-        "broken headlight": "Headlight damage",
-        "headlight damage": "Headlight damage",
-        "headlight": "Headlight damage",
-        "headlights": "Headlight damage",
-        "broken_windshield": "Broken windshield",
-        "broken windshield": "Broken windshield",
-        "windshield": "Broken windshield",
-        "windshield crack": "Broken windshield",
-        "windshield_crack": "Broken windshield",
-        "bumper_damage": "Bumper crack",
-        "bumper damage": "Bumper crack",
-        "bumper crack": "Bumper crack",
-        "bumper": "Bumper crack",
-        "door_damage": "Door damage",
-        "door damage": "Door damage",
-        "door": "Door damage",
-        "broken_side_mirror": "Broken side mirror",
-        "broken side mirror": "Broken side mirror",
-        "side mirror": "Broken side mirror",
-        "mirror": "Broken side mirror"
-    }
-    
     # Try exact match first
-    if damage_lower in format_mappings:
-        return format_mappings[damage_lower]
+    label = _FORMAT_MAPPINGS.get(damage_lower)
+    if label is not None:
+        return label
     
     # Try partial matching
-    if "headlight" in damage_lower:
-        return "Headlight damage"
-    elif "windshield" in damage_lower or "wind_screen" in damage_lower or "wind screen" in damage_lower:
-        return "Broken windshield"
-    elif "bumper" in damage_lower:
-        return "Bumper crack"
-    elif "door" in damage_lower:
-        return "Door damage"
-    elif "mirror" in damage_lower or "side_mirror" in damage_lower or "side mirror" in damage_lower:
-        return "Broken side mirror"
-    elif "scratch" in damage_lower or "paint" in damage_lower:
-        return "Scratch"
-    elif "dent" in damage_lower:
-        return "Dent"
+    match = _FORMAT_KEYWORD_RE.search(damage_lower)
+    if match:
+        return _FORMAT_KEYWORD_LABELS[match.lastindex - 1]
     
     # Return title case version as fallback
     return damage_type.title()
 
 
+@lru_cache(maxsize=1024)
 def _normalize_damage_type(damage_type):
     """Normalize damage type to match JSON keys (lowercase with underscores)."""
     if not damage_type:
@@ -179,63 +338,27 @@ def _normalize_damage_type(damage_type):
     # Convert to lowercase and replace spaces/hyphens with underscores
     normalized = damage_type.lower().strip().replace(" ", "_").replace("-", "_")
     
-    # Handle common variations and typos - check both exact matches and contains
-    mappings = {
-        "scratch": "scratch",
-        "scratches": "scratch",
-        "scraches": "scratch",  # Handle typo "Scraches"
-        "scrach": "scratch",  # Handle typo
-        "scrachs": "scratch",  # Handle typo
-        "paint_chips": "scratch",  # Paint chips are similar to scratches
-        "paint_chip": "scratch",
-        "paint chips": "scratch",
-        "paint chip": "scratch",
-        "paint_damage": "scratch",  # General paint damage
-        "paint_damages": "scratch",
-        "paint": "scratch",  # General paint issues
-        "dent": "dent",
-        "dents": "dent",
-        "broken_headlight": "broken_headlight",
-        "broken_headlights": "broken_headlight",
-        "broken headlight": "broken_headlight",
-        "headlight": "broken_headlight",
-        "headlights": "broken_headlight",
-        "broken_windshield": "broken_windshield",
-        "broken windshield": "broken_windshield",
-        "windshield": "broken_windshield",
-        "windshield_crack": "broken_windshield",
-        "windshield_cracks": "broken_windshield",
-        "crack": "broken_windshield",  # If just "crack", assume windshield
-        "bumper_damage": "bumper_damage",
-        "bumper": "bumper_damage",
-        "bumpers": "bumper_damage",
-        "door_damage": "door_damage",
-        "door": "door_damage",
-        "doors": "door_damage"
-    }
-    
     # First try exact match
-    if normalized in mappings:
-        return mappings[normalized]
+    value = _DAMAGE_TYPE_MAPPINGS.get(normalized)
+    if value is not None:
+        return value
     
     # Then try fuzzy matching - check if normalized contains any key or vice versa
-    for key, value in mappings.items():
-        if key in normalized or normalized in key:
-            return value
+    first_key = len(_DAMAGE_TYPE_KEY_STARTS)
+    match = _DAMAGE_TYPE_KEY_RE.search(normalized)
+    if match:
+        first_key = match.lastindex - 1
+    if "\0" not in normalized:
+        position = _DAMAGE_TYPE_KEYS_JOINED.find(normalized)
+        if position != -1:
+            first_key = min(first_key, bisect_right(_DAMAGE_TYPE_KEY_STARTS, position) - 1)
+    if first_key < len(_DAMAGE_TYPE_KEY_STARTS):
+        return _DAMAGE_TYPE_KEY_VALUES[first_key]
     
     # Try matching by checking if it starts with common damage type prefixes or contains keywords
-    if normalized.startswith("scrat") or "paint" in normalized:
-        return "scratch"  # Paint chips and paint damage map to scratch
-    elif normalized.startswith("dent"):
-        return "dent"
-    elif "headlight" in normalized or "head_light" in normalized:
-        return "broken_headlight"
-    elif "windshield" in normalized or "wind_screen" in normalized:
-        return "broken_windshield"
-    elif "bumper" in normalized:
-        return "bumper_damage"
-    elif "door" in normalized:
-        return "door_damage"
+    match = _DAMAGE_TYPE_KEYWORD_RE.search(normalized)
+    if match:
+        return _DAMAGE_TYPE_KEYWORD_LABELS[match.lastindex - 1]
     
     # Return normalized version if no match found
     return normalized
@@ -271,7 +394,10 @@ def get_estimate(make, year, variant, defect_type, severity=None):
     Returns:
         Estimated cost in INR if match found, None otherwise
     """
-    print(f"DEBUG: get_estimate called with: make='{make}', year={year}, variant='{variant}', defect_type='{defect_type}', severity='{severity}'")
+    logger.debug(
+        "get_estimate called with: make='%s', year=%s, variant='%s', defect_type='%s', severity='%s'",
+        make, year, variant, defect_type, severity
+    )
     
     # Note: In the new JSON structure:
     # - Brand = make
@@ -303,8 +429,9 @@ def get_repair_estimate(make, defect_type, severity):
         return default_costs.get(normalized_severity or severity.lower(), "No Estimate Found")
     
     # Try to find any car with matching make
+    make_lower = make.lower()
     for car in data["cars"]:
-        if car["make"].lower() == make.lower():
+        if car["make"].lower() == make_lower:
             try:
                 return car["damage"][normalized_damage_type][normalized_severity]
             except KeyError:
@@ -1,20 +1,53 @@
 """
-Google Vision API OCR Helper - PURE GOOGLE IMPLEMENTATION
-==========================================================
-This module uses ONLY Google Cloud services for OCR and translation.
-NO GPT/OpenAI is used in this module.
+Google Vision API OCR Helper
+============================
+OCR with Google Cloud Vision, followed by one of two extraction pipelines.
 
-Pipeline:
+Default pipeline (process_with_google_vision_pure / process_batch) - Google only:
 1. Google Cloud Vision API - OCR (text extraction)
 2. Google Cloud Translate API - Translation (Sinhala/Tamil → English)
 3. Custom pattern matching - Table data extraction
+
+GPT pipeline (translate_and_extract_with_gpt / process_batch_with_gpt):
+1. Google Cloud Vision API - OCR (text extraction)
+2. OpenAI structured-output extraction of translation, table, document info
+   and totals through one shared client, trying gpt-4o-mini before gpt-4o,
+   as an OpenAI Batch API job in offline mode, or streamed field by field
+   (translate_and_extract_with_gpt_stream)
 """
 
 import os
 import re
 import json
+import time
+import atexit
+import importlib.util
+import random
+import logging
+import hashlib
+import sqlite3
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from itertools import zip_longest
 from typing import Dict, List, Optional, Tuple
 
+# orjson parses faster; fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# OpenCV is used only to shrink large photos before upload
+try:
+    import cv2
+    import numpy as np
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
 # Google Cloud Vision
 try:
     from google.cloud import vision
@@ -29,14 +62,153 @@ try:
 except ImportError:
     GOOGLE_TRANSLATE_AVAILABLE = False
 
+# Service account credentials (google-auth, installed with the Cloud clients)
+try:
+    from google.oauth2 import service_account
+    GOOGLE_AUTH_AVAILABLE = True
+except ImportError:
+    GOOGLE_AUTH_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Credentials and clients are built once and shared across calls/threads
+_CLIENT_LOCK = threading.Lock()
+_CREDENTIALS = None
+_VISION_CLIENT = None
+_TRANSLATE_CLIENT = None
+_OPENAI_CLIENT = None
+
+# Persistent cache: repeat documents/phrases skip the Translate API, and
+# repeat images/texts skip Vision OCR and GPT extraction
+TRANSLATE_CACHE_PATH = os.environ.get(
+    'TRANSLATE_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'damage_detect_translate.db')
+)
+TRANSLATE_CACHE_TTL = 30 * 24 * 3600  # seconds
+
+# Bump whenever the GPT extraction prompt changes, to invalidate cached results
+GPT_PROMPT_VERSION = 3
+
+# Request-rate ceilings (token buckets, see _RateLimiter); 0 disables
+VISION_REQUESTS_PER_SECOND = float(os.environ.get('OCR_RPS', '5'))
+GPT_REQUESTS_PER_SECOND = float(os.environ.get('GPT_RPS', '5'))
+VISION_MAX_IMAGES_PER_BATCH = 16  # batch_annotate_images limit
+
+# Images larger than OCR_DOWNSAMPLE_MIN_BYTES are resized so their longest
+# side is at most OCR_DOWNSAMPLE_MAX_SIDE px and re-encoded as JPEG before
+# upload; phone photos shrink several-fold with no loss of OCR accuracy
+OCR_DOWNSAMPLE_MIN_BYTES = 1_000_000
+OCR_DOWNSAMPLE_MAX_SIDE = 2048
+OCR_DOWNSAMPLE_JPEG_QUALITY = 85
+
+# Remote calls retry rate-limit/quota errors with jittered exponential backoff,
+# and concurrent Vision/GPT requests from worker threads are capped
+API_MAX_ATTEMPTS = 3
+API_RETRY_MAX_DELAY = 30.0  # seconds
+OCR_MAX_CONCURRENT = int(os.environ.get('OCR_MAX_CONCURRENT', '8'))
+GPT_MAX_CONCURRENT = int(os.environ.get('GPT_MAX_CONCURRENT', '16'))
+_OCR_SEMAPHORE = threading.BoundedSemaphore(OCR_MAX_CONCURRENT)
+_GPT_SEMAPHORE = threading.BoundedSemaphore(GPT_MAX_CONCURRENT)
+_RATE_LIMIT_MARKERS = ('rate limit', 'rate_limit', 'quota', 'resource exhausted', 'too many requests')
+
+# Texts longer than this are translated line by line, so repeated lines
+# (part names, "Labour", ...) are cached individually
+TRANSLATE_SEGMENT_MIN_CHARS = 200
+TRANSLATE_MAX_SEGMENTS_PER_CALL = 128  # Translate v2 limit per request
+_translate_cache_ready = False
+
+# Map language codes to names
+_LANGUAGE_NAMES = {
+    'si': 'Sinhala',
+    'ta': 'Tamil',
+    'en': 'English',
+    'hi': 'Hindi',
+    'unknown': 'Unknown'
+}
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """True for 429/503-style errors from Google or OpenAI clients."""
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if status in (429, 503):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in _RATE_LIMIT_MARKERS)
+
+
+class _RateLimiter:
+    """
+    Thread-safe token bucket: allows bursts of up to `burst` calls, refilled
+    at `rate` tokens per second. Callers that find it empty sleep until their
+    reserved token is due, so waiters are served in arrival order.
+    """
+    
+    def __init__(self, rate: float, burst: float = 1.0):
+        self._rate = rate
+        self._capacity = max(1.0, burst)
+        self._tokens = self._capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        if self._rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+            self._tokens -= 1
+            delay = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+
+
+# Shared by every thread, so the ceilings hold across concurrent batches
+_OCR_RATE_LIMITER = _RateLimiter(VISION_REQUESTS_PER_SECOND, burst=VISION_REQUESTS_PER_SECOND)
+_GPT_RATE_LIMITER = _RateLimiter(GPT_REQUESTS_PER_SECOND, burst=GPT_REQUESTS_PER_SECOND)
+
+
+def _call_with_retry(func, *args, semaphore=None, rate_limiter=None, **kwargs):
+    """
+    Call func, retrying rate-limit errors up to API_MAX_ATTEMPTS times.
+    Each attempt first takes a token from rate_limiter, if given. If a
+    semaphore is given, the call (but not the backoff sleep) holds it.
+    """
+    for attempt in range(1, API_MAX_ATTEMPTS + 1):
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        try:
+            with semaphore if semaphore is not None else nullcontext():
+                return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == API_MAX_ATTEMPTS or not _is_rate_limit_error(e):
+                raise
+            delay = min(API_RETRY_MAX_DELAY, 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            logger.warning("Rate limited (%s); retrying in %.1fs (attempt %d/%d)",
+                           e, delay, attempt + 1, API_MAX_ATTEMPTS)
+            time.sleep(delay)
+
 
 def get_credentials():
     """
     Get Google Cloud credentials from service account key file.
+    The key file is only read on the first call; later calls reuse it.
     
     Returns:
         Tuple of (credentials, credentials_path)
     """
+    global _CREDENTIALS
+    if _CREDENTIALS is not None:
+        return _CREDENTIALS
+    
+    with _CLIENT_LOCK:
+        if _CREDENTIALS is None:
+            _CREDENTIALS = _load_credentials()
+    return _CREDENTIALS
+
+
+def _load_credentials():
+    """Locate the service account key file and load credentials from it."""
     possible_paths = [
         os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', ''),
         os.path.join(os.path.dirname(__file__), 'google-vision-key.json'),
@@ -56,7 +228,12 @@ def get_credentials():
             "Or set GOOGLE_APPLICATION_CREDENTIALS environment variable."
         )
     
-    from google.oauth2 import service_account
+    if not GOOGLE_AUTH_AVAILABLE:
+        raise ImportError(
+            "google-auth package is not installed.\n"
+            "Install with: pip install google-auth"
+        )
+    
     credentials = service_account.Credentials.from_service_account_file(credentials_path)
     
     return credentials, credentials_path
@@ -64,11 +241,16 @@ def get_credentials():
 
 def get_google_vision_client():
     """
-    Initialize and return a Google Vision API client.
+    Return the shared Google Vision API client, creating it on first use.
+    Reusing one client keeps its gRPC channel open between requests.
     
     Returns:
         vision.ImageAnnotatorClient: Vision API client
     """
+    global _VISION_CLIENT
+    if _VISION_CLIENT is not None:
+        return _VISION_CLIENT
+    
     if not GOOGLE_VISION_AVAILABLE:
         raise ImportError(
             "google-cloud-vision package is not installed.\n"
@@ -76,19 +258,25 @@ def get_google_vision_client():
         )
     
     credentials, credentials_path = get_credentials()
-    client = vision.ImageAnnotatorClient(credentials=credentials)
-    print(f"[Google Vision] Using credentials from: {credentials_path}")
-    print(f"[Google Vision] Project: {credentials.project_id}")
-    return client
+    with _CLIENT_LOCK:
+        if _VISION_CLIENT is None:
+            _VISION_CLIENT = vision.ImageAnnotatorClient(credentials=credentials)
+            logger.info("[Google Vision] Using credentials from: %s", credentials_path)
+            logger.info("[Google Vision] Project: %s", credentials.project_id)
+    return _VISION_CLIENT
 
 
 def get_google_translate_client():
     """
-    Initialize and return a Google Translate API client.
+    Return the shared Google Translate API client, creating it on first use.
     
     Returns:
         translate.Client: Translate API client
     """
+    global _TRANSLATE_CLIENT
+    if _TRANSLATE_CLIENT is not None:
+        return _TRANSLATE_CLIENT
+    
     if not GOOGLE_TRANSLATE_AVAILABLE:
         raise ImportError(
             "google-cloud-translate package is not installed.\n"
@@ -104,35 +292,28 @@ def get_google_translate_client():
     ])
     
     # Pass credentials explicitly to ensure the correct project is used
-    client = translate.Client(credentials=scoped_credentials)
-    print(f"[Google Translate] Initialized with project: {credentials.project_id}")
-    return client
+    with _CLIENT_LOCK:
+        if _TRANSLATE_CLIENT is None:
+            _TRANSLATE_CLIENT = translate.Client(credentials=scoped_credentials)
+            logger.info("[Google Translate] Initialized with project: %s", credentials.project_id)
+    return _TRANSLATE_CLIENT
 
 
-def extract_text_with_google_vision(image_path: str) -> Tuple[str, List[Dict]]:
+def _detected_languages(response) -> List[str]:
+    """Language codes Vision detected on the document's pages, most confident first."""
+    confidence = {}
+    for page in response.full_text_annotation.pages:
+        for language in page.property.detected_languages:
+            code = language.language_code
+            confidence[code] = max(confidence.get(code, 0.0), language.confidence)
+    return sorted(confidence, key=confidence.get, reverse=True)
+
+
+def _parse_text_response(response, include_languages: bool = False) -> Tuple:
     """
-    Extract text from an image using Google Vision API OCR.
-    Also returns word-level bounding boxes for layout analysis.
-    
-    Args:
-        image_path: Path to the image file
-        
-    Returns:
-        Tuple of (full_text, word_annotations)
+    Extract (full_text, word_annotations) from a Vision annotate response,
+    plus the detected language codes if include_languages is set.
     """
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
-    
-    client = get_google_vision_client()
-    
-    with open(image_path, 'rb') as image_file:
-        content = image_file.read()
-    
-    image = vision.Image(content=content)
-    
-    # Use document_text_detection for better table/form extraction
-    response = client.document_text_detection(image=image)
-    
     if response.error.message:
         raise Exception(f"Google Vision API error: {response.error.message}")
     
@@ -157,12 +338,302 @@ def extract_text_with_google_vision(image_path: str) -> Tuple[str, List[Dict]]:
                     'height': (bounds[2].y - bounds[0].y) if bounds else 0
                 })
     
+    if include_languages:
+        return full_text, word_annotations, _detected_languages(response)
     return full_text, word_annotations
 
 
+_BYTES_TYPES = (bytes, bytearray, memoryview)
+# Remote images are fetched by Vision itself, so nothing is read or uploaded
+_IMAGE_URI_PREFIXES = ('gs://', 'http://', 'https://')
+
+
+def _is_image_uri(image_src) -> bool:
+    return isinstance(image_src, str) and image_src.startswith(_IMAGE_URI_PREFIXES)
+
+
+def _read_image_content(image_src) -> bytes:
+    """Return image bytes for a file path or in-memory image data."""
+    if isinstance(image_src, _BYTES_TYPES):
+        return bytes(image_src)
+    with open(image_src, 'rb') as image_file:
+        return image_file.read()
+
+
+def _downsample_for_ocr(content: bytes) -> bytes:
+    """
+    Shrink a large image for upload to Vision. Returns the original bytes if
+    OpenCV is missing, the image is already small, or re-encoding doesn't help.
+    """
+    if not OPENCV_AVAILABLE or len(content) <= OCR_DOWNSAMPLE_MIN_BYTES:
+        return content
+    
+    img = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return content
+    
+    height, width = img.shape[:2]
+    scale = OCR_DOWNSAMPLE_MAX_SIDE / max(height, width)
+    if scale < 1:
+        img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+    
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, OCR_DOWNSAMPLE_JPEG_QUALITY])
+    if not ok or encoded.nbytes >= len(content):
+        return content
+    return encoded.tobytes()
+
+
+def extract_text_batch(image_paths: List, include_languages: bool = False, use_cache: bool = True) -> List[Tuple]:
+    """
+    Extract text from several images, sending up to VISION_MAX_IMAGES_PER_BATCH
+    images per batch_annotate_images request. Results are cached by image
+    content hash, so only images not seen before are sent.
+    
+    Args:
+        image_paths: Paths to the image files. Raw image bytes are also accepted,
+            as are gs:// or http(s):// URIs, which Vision fetches directly
+            (URI results are not cached)
+        include_languages: Also return Vision's detected language codes
+        use_cache: Read and write the on-disk OCR cache
+        
+    Returns:
+        List of (full_text, word_annotations[, languages]) tuples, in the same
+        order as image_paths. An image Vision reports an error for gets an
+        {"error": message} dict instead, so the rest of the batch is kept.
+    """
+    for image_path in image_paths:
+        if isinstance(image_path, _BYTES_TYPES) or _is_image_uri(image_path):
+            continue
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+    
+    features = None
+    
+    results = []
+    for start in range(0, len(image_paths), VISION_MAX_IMAGES_PER_BATCH):
+        sources = image_paths[start:start + VISION_MAX_IMAGES_PER_BATCH]
+        contents = [None if _is_image_uri(src) else _read_image_content(src) for src in sources]
+        keys = [None if content is None else 'ocr:' + hashlib.sha256(content).hexdigest() for content in contents]
+        cached = _result_cache_get([key for key in keys if key]) if use_cache else {}
+        chunk_results = [cached.get(key) for key in keys]
+        misses = [i for i, key in enumerate(keys) if key not in cached]
+        
+        if misses:
+            client = get_google_vision_client()
+            if features is None:
+                # Use document_text_detection for better table/form extraction
+                features = [vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)]
+            requests = []
+            for i in misses:
+                if contents[i] is None:
+                    image = vision.Image(source=vision.ImageSource(image_uri=sources[i]))
+                else:
+                    # Cache keys use the original bytes; only the upload is shrunk
+                    image = vision.Image(content=_downsample_for_ocr(contents[i]))
+                requests.append(vision.AnnotateImageRequest(image=image, features=features))
+            batch_response = _call_with_retry(
+                client.batch_annotate_images, requests=requests,
+                semaphore=_OCR_SEMAPHORE, rate_limiter=_OCR_RATE_LIMITER
+            )
+            
+            fresh = {}
+            for i, response in zip(misses, batch_response.responses):
+                if response.error.message:
+                    chunk_results[i] = {"error": f"Google Vision API error: {response.error.message}"}
+                    continue
+                chunk_results[i] = _parse_text_response(response, include_languages=True)
+                if keys[i]:
+                    fresh[keys[i]] = chunk_results[i]
+            if use_cache:
+                _result_cache_put(fresh)
+        
+        for chunk_result in chunk_results:
+            if isinstance(chunk_result, dict):
+                results.append(chunk_result)
+                continue
+            full_text, word_annotations, languages = chunk_result
+            if include_languages:
+                results.append((full_text, word_annotations, list(languages)))
+            else:
+                results.append((full_text, word_annotations))
+    
+    return results
+
+
+def extract_text_with_google_vision(image_src, include_languages: bool = False, use_cache: bool = True) -> Tuple:
+    """
+    Extract text from an image using Google Vision API OCR.
+    Also returns word-level bounding boxes for layout analysis.
+    
+    Args:
+        image_src: Path to the image file, or the image bytes
+        include_languages: Also return Vision's detected language codes
+        use_cache: Read and write the on-disk OCR cache
+        
+    Returns:
+        Tuple of (full_text, word_annotations[, languages])
+    """
+    result = extract_text_batch([image_src], include_languages, use_cache)[0]
+    if isinstance(result, dict):
+        raise Exception(result['error'])
+    return result
+
+
+def _translate_cache_key(text: str, target_language: str) -> str:
+    """Cache key for a (text, target language) pair."""
+    return hashlib.sha1((target_language + "\x00" + text).encode('utf-8')).hexdigest()
+
+
+def _cache_connect() -> sqlite3.Connection:
+    """
+    Open the cache database.
+    On first use, creates the tables and prunes rows older than TRANSLATE_CACHE_TTL.
+    """
+    global _translate_cache_ready
+    if not _translate_cache_ready:
+        os.makedirs(os.path.dirname(TRANSLATE_CACHE_PATH) or '.', exist_ok=True)
+    
+    conn = sqlite3.connect(TRANSLATE_CACHE_PATH, timeout=5)
+    if not _translate_cache_ready:
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations "
+                "(key TEXT PRIMARY KEY, translated TEXT, src_lang TEXT, ts INTEGER)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value TEXT, ts INTEGER)"
+            )
+            cutoff = int(time.time()) - TRANSLATE_CACHE_TTL
+            conn.execute("DELETE FROM translations WHERE ts < ?", (cutoff,))
+            conn.execute("DELETE FROM results WHERE ts < ?", (cutoff,))
+        _translate_cache_ready = True
+    return conn
+
+
+def _translate_cache_lookup(keys: List[str]) -> Dict[str, Tuple[str, str]]:
+    """Return {key: (translated_text, source_language_code)} for cached keys."""
+    if not keys:
+        return {}
+    try:
+        conn = _cache_connect()
+        try:
+            found = {}
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, translated, src_lang FROM translations WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for key, translated, src_lang in rows:
+                    found[key] = (translated, src_lang)
+            return found
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("[Google Translate] Cache unavailable: %s", e)
+        return {}
+
+
+def _translate_cache_store(rows: List[Tuple[str, str, str]]) -> None:
+    """Store (key, translated_text, source_language_code) rows in the cache."""
+    if not rows:
+        return
+    now = int(time.time())
+    try:
+        conn = _cache_connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO translations (key, translated, src_lang, ts) VALUES (?, ?, ?, ?)",
+                    [(key, translated, src_lang, now) for key, translated, src_lang in rows]
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("[Google Translate] Could not write cache: %s", e)
+
+
+def _result_cache_get(keys: List[str]) -> Dict[str, object]:
+    """Return {key: value} for cached OCR/GPT results (values are JSON-decoded)."""
+    if not keys:
+        return {}
+    try:
+        conn = _cache_connect()
+        try:
+            found = {}
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for key, value in rows:
+                    found[key] = _json_loads(value)
+            return found
+        finally:
+            conn.close()
+    except (sqlite3.Error, ValueError) as e:
+        logger.warning("Result cache unavailable: %s", e)
+        return {}
+
+
+def _result_cache_put(items: Dict[str, object]) -> None:
+    """Store JSON-serialisable OCR/GPT results under their content-hash keys."""
+    if not items:
+        return
+    now = int(time.time())
+    try:
+        conn = _cache_connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, ts) VALUES (?, ?, ?)",
+                    [(key, json.dumps(value, ensure_ascii=False), now) for key, value in items.items()]
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("Could not write result cache: %s", e)
+
+
+def _translate_segments(segments: List[str], target_language: str) -> Tuple[Dict[str, Tuple[str, str]], int]:
+    """
+    Translate text segments, serving repeats from the cache and sending all
+    misses in as few multi-string Translate calls as possible.
+    
+    Returns:
+        Tuple of ({segment: (translated_text, source_language_code)}, api_segment_count)
+    """
+    unique = list(dict.fromkeys(segments))
+    keys = {segment: _translate_cache_key(segment, target_language) for segment in unique}
+    cached = _translate_cache_lookup(list(keys.values()))
+    
+    translations = {segment: cached[key] for segment, key in keys.items() if key in cached}
+    misses = [segment for segment in unique if segment not in translations]
+    
+    if misses:
+        client = get_google_translate_client()
+        new_rows = []
+        for start in range(0, len(misses), TRANSLATE_MAX_SEGMENTS_PER_CALL):
+            batch = misses[start:start + TRANSLATE_MAX_SEGMENTS_PER_CALL]
+            results = _call_with_retry(client.translate, batch, target_language=target_language)
+            for segment, result in zip(batch, results):
+                translation = (result['translatedText'], result.get('detectedSourceLanguage', 'unknown'))
+                translations[segment] = translation
+                new_rows.append((keys[segment],) + translation)
+        _translate_cache_store(new_rows)
+    
+    return translations, len(misses)
+
+
 def translate_text_with_google(text: str, target_language: str = 'en') -> Tuple[str, str]:
     """
     Translate text using Google Cloud Translate API.
+    Long multi-line texts are translated line by line in one batched call;
+    every segment is cached on disk (see TRANSLATE_CACHE_PATH), so repeat
+    inputs are returned without an API call.
     
     Args:
         text: Text to translate
@@ -171,65 +642,165 @@ def translate_text_with_google(text: str, target_language: str = 'en') -> Tuple[
     Returns:
         Tuple of (translated_text, detected_source_language)
     """
-if not text.strip():
+    if not text or text.isspace():
         return "", "unknown"
     
+    # Pure ASCII text is already English/Latin - no API call needed
+    if target_language == 'en' and text.isascii():
+        return text, 'English'
+    
     try:
-        client = get_google_translate_client()
+        if len(text) > TRANSLATE_SEGMENT_MIN_CHARS and '\n' in text:
+            lines = text.split('\n')
+        else:
+            lines = [text]
+        segments = [line for line in lines if line.strip()]
         
         # Detect language and translate
-        result = client.translate(text, target_language=target_language)
-        
-        translated_text = result['translatedText']
-        source_language = result.get('detectedSourceLanguage', 'unknown')
-        
-        # Map language codes to names
-        language_names = {
-            'si': 'Sinhala',
-            'ta': 'Tamil',
-            'en': 'English',
-            'hi': 'Hindi',
-            'unknown': 'Unknown'
-        }
+        translations, api_segments = _translate_segments(segments, target_language)
+        logger.debug("[Google Translate] %d/%d unique segments from cache", len(translations) - api_segments, len(translations))
         
-        source_language_name = language_names.get(source_language, source_language)
+        translated_text = '\n'.join(
+            translations[line][0] if line.strip() else line for line in lines
+        )
         
-        print(f"[Google Translate] Detected language: {source_language_name}")
-        print(f"[Google Translate] Translated {len(text)} chars → {len(translated_text)} chars")
+        # Source language by majority vote, weighted by segment length
+        votes = Counter()
+        for segment in segments:
+            votes[translations[segment][1]] += len(segment)
+        source_language = votes.most_common(1)[0][0]
+        
+        source_language_name = _LANGUAGE_NAMES.get(source_language, source_language)
+        
+        logger.info("[Google Translate] Detected language: %s", source_language_name)
+        logger.debug("[Google Translate] Translated %d chars → %d chars", len(text), len(translated_text))
         
         return translated_text, source_language_name
         
     except Exception as e:
         error_msg = str(e)
-        print(f"[Google Translate Error] {error_msg}")
+        logger.error("[Google Translate Error] %s", error_msg)
         # If translation fails, return original text
         return text, "Unknown (translation failed)"
 
 
+# Pattern-matching tables, compiled once at import
+# Match patterns like: 1800, 1,800, 1800/-, 1800.00, etc.
+_NUM_PATTERNS = [
+    re.compile(r'\d{1,3}(?:,\d{3})*(?:\.\d{2})?'),  # Numbers with commas and decimals
+    re.compile(r'\d+(?:\.\d+)?'),  # Simple numbers
+]
+
+# Common part patterns, in priority order
+_PART_PATTERNS = [
+    r'(?:Front|Rear|Left|Right|LH|RH|L/H|R/H)\s*(?:Bumper|Buffer|Fender|Door|Panel|Light|Lamp|Mirror|Guard|Grill|Hood|Bonnet)',
+    r'(?:Head|Tail|Fog|Day)\s*(?:Light|Lamp)s?',
+    r'(?:Side\s*)?Mirror',
+    r'Fender(?:\s*Lamp)?',
+    r'Buffer(?:\s*Retainer)?',
+    r'(?:Number\s*)?Plate(?:\s*Holder)?',
+    r'Shell',
+    r'Grill',
+    r'Paint(?:ing)?',
+    r'Polish',
+    r'Labour',
+    r'Material',
+    r'Spare\s*Parts?',
+]
+
+# All part patterns fused into one regex. Each alternative is an anchored
+# lookahead, so the first pattern (not the leftmost match) wins, exactly as
+# when trying them one by one; m.group(m.lastindex) is that pattern's match.
+# Every part pattern requires one of these words - a cheap substring test
+# rules out most lines before the regex runs
+_PART_KEYWORDS = (
+    'bumper', 'buffer', 'fender', 'door', 'panel', 'light', 'lamp', 'mirror', 'guard', 'grill',
+    'hood', 'bonnet', 'plate', 'shell', 'paint', 'polish', 'labour', 'material', 'spare',
+)
+
+_PART_RE = re.compile(
+    "|".join(f"^(?=.*?({p}))" for p in _PART_PATTERNS),
+    re.IGNORECASE | re.DOTALL
+)
+
+_NUMBERED_LINE = re.compile(r'^(\d+)[.\)]\s*(.+)')
+_CONTINUATION = re.compile(r'^[\d,.\s/-]+$')
+_LEADING_NUMBER = re.compile(r'^\d+[.\)]\s*')
+_TRAILING_NUMBERS = re.compile(r'[\d,.\s/-]+$')
+
+_REF_PATTERNS = [
+    re.compile(r'(?:Est\.?\s*No\.?|Ref\.?\s*No\.?|Reference|Estimate\s*#?)[:\s]*([A-Z0-9/-]+)', re.IGNORECASE),
+    re.compile(r'(?:No\.?|#)[:\s]*(\d+)', re.IGNORECASE),
+]
+_DATE_PATTERNS = [
+    re.compile(r'(\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4})'),
+    re.compile(r'(\d{4}[/.-]\d{1,2}[/.-]\d{1,2})'),
+]
+_VEHICLE_PATTERNS = [
+    re.compile(r'(?:Reg\.?\s*No\.?|Vehicle\s*No\.?|Registration)[:\s]*([A-Z0-9-]+)', re.IGNORECASE),
+    re.compile(r'([A-Z]{2,3}[-\s]?\d{4})', re.IGNORECASE),  # Sri Lankan format
+]
+
+
 def extract_numbers_from_text(text: str) -> List[str]:
     """Extract all number-like patterns from text."""
-    # Match patterns like: 1800, 1,800, 1800/-, 1800.00, etc.
-    patterns = [
-        r'\d{1,3}(?:,\d{3})*(?:\.\d{2})?',  # Numbers with commas and decimals
-        r'\d+(?:\.\d+)?',  # Simple numbers
-    ]
-    
     numbers = []
-    for pattern in patterns:
-        matches = re.findall(pattern, text)
-        numbers.extend(matches)
+    for pattern in _NUM_PATTERNS:
+        numbers.extend(pattern.findall(text))
     
     # Clean and deduplicate
+    seen = set()
     cleaned = []
     for n in numbers:
         n = n.replace(',', '')
-        if n and n not in cleaned:
+        if n and n not in seen:
+            seen.add(n)
             cleaned.append(n)
     
     return cleaned
 
 
-def parse_estimation_table(text: str, translated_text: str) -> List[Dict]:
+def group_words_into_rows(word_annotations: List[Dict]) -> List[str]:
+    """
+    Rebuild table rows from Vision word boxes.
+    Vision's full text often reads a table column by column; clustering words
+    by vertical position (within half the mean word height) and ordering each
+    cluster left to right puts a part name and its prices back on one line.
+    
+    Args:
+        word_annotations: Word dicts from extract_text_with_google_vision
+        
+    Returns:
+        List of row strings, top to bottom (empty if there are no usable boxes)
+    """
+    sized = [w['height'] for w in word_annotations if w['height'] > 0]
+    if not sized:
+        return []
+    
+    # Words with a degenerate (zero or negative) height are kept and placed
+    # by their top edge, so no OCR text is lost from the rebuilt rows
+    tolerance = sum(sized) / len(sized) / 2
+    def center_of(word):
+        return word['y'] + max(word['height'], 0) / 2
+    
+    words = sorted(word_annotations, key=center_of)
+    
+    rows = []
+    row, row_center = [], None
+    for word in words:
+        center = center_of(word)
+        if row and abs(center - row_center) > tolerance:
+            rows.append(row)
+            row = []
+        row.append(word)
+        # Running mean keeps slightly skewed rows together
+        row_center = center if len(row) == 1 else row_center + (center - row_center) / len(row)
+    rows.append(row)
+    
+    return [' '.join(w['text'] for w in sorted(row, key=lambda w: w['x'])) for row in rows]
+
+
+def parse_estimation_table(text: str, translated_text: str, lines: Optional[List[str]] = None) -> List[Dict]:
     """
     Parse estimation document text to extract table rows.
     Uses pattern matching instead of AI.
@@ -237,37 +808,20 @@ def parse_estimation_table(text: str, translated_text: str) -> List[Dict]:
     Args:
         text: Original OCR text
         translated_text: Translated text (if applicable)
+        lines: Working text already split into lines, if the caller has it
         
     Returns:
         List of table row dictionaries
     """
     table_data = []
     
-    # Use translated text for parsing
-    working_text = translated_text if translated_text else text
-    
-    # Split into lines
-    lines = working_text.split('\n')
-    
-    # Common part patterns
-    part_patterns = [
-        r'(?:Front|Rear|Left|Right|LH|RH|L/H|R/H)\s*(?:Bumper|Buffer|Fender|Door|Panel|Light|Lamp|Mirror|Guard|Grill|Hood|Bonnet)',
-        r'(?:Head|Tail|Fog|Day)\s*(?:Light|Lamp)s?',
-        r'(?:Side\s*)?Mirror',
-        r'Fender(?:\s*Lamp)?',
-        r'Buffer(?:\s*Retainer)?',
-        r'(?:Number\s*)?Plate(?:\s*Holder)?',
-        r'Shell',
-        r'Grill',
-        r'Paint(?:ing)?',
-        r'Polish',
-        r'Labour',
-        r'Material',
-        r'Spare\s*Parts?',
-    ]
+    if lines is None:
+        # Use translated text for parsing
+        working_text = translated_text if translated_text else text
+        lines = working_text.split('\n')
     
     # Find lines with parts and numbers
-    for i, line in enumerate(lines):
+    for line, next_line in zip_longest(lines, lines[1:], fillvalue=''):
         line = line.strip()
         if not line:
             continue
@@ -276,15 +830,14 @@ def parse_estimation_table(text: str, translated_text: str) -> List[Dict]:
         is_part_line = False
         part_name = ""
         
-        for pattern in part_patterns:
-            match = re.search(pattern, line, re.IGNORECASE)
-            if match:
-                is_part_line = True
-                part_name = match.group(0)
-                break
+        line_lower = line.lower()
+        match = _PART_RE.search(line) if any(kw in line_lower for kw in _PART_KEYWORDS) else None
+        if match:
+            is_part_line = True
+            part_name = match.group(match.lastindex)
         
         # Also check for numbered items (1., 2., etc.)
-        numbered_match = re.match(r'^(\d+)[.\)]\s*(.+)', line)
+        numbered_match = _NUMBERED_LINE.match(line)
         if numbered_match:
             is_part_line = True
             part_name = numbered_match.group(2).strip()
@@ -294,13 +847,12 @@ def parse_estimation_table(text: str, translated_text: str) -> List[Dict]:
             numbers = extract_numbers_from_text(line)
             
             # Get additional numbers from the next line if it looks like continuation
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                if re.match(r'^[\d,.\s/-]+$', next_line):
-                    numbers.extend(extract_numbers_from_text(next_line))
+            next_line = next_line.strip()
+            if _CONTINUATION.match(next_line):
+                numbers.extend(extract_numbers_from_text(next_line))
             
             # Filter out very small numbers (likely not prices)
-            prices = [n for n in numbers if float(n.replace(',', '')) >= 100]
+            prices = [n for n in numbers if _to_price(n) >= 100]
             
             # Assign estimate and approved
             estimate = "-"
@@ -314,8 +866,8 @@ def parse_estimation_table(text: str, translated_text: str) -> List[Dict]:
                 approved = prices[0]
             
             # Clean part name
-            part_name = re.sub(r'^\d+[.\)]\s*', '', part_name)
-            part_name = re.sub(r'[\d,.\s/-]+$', '', part_name).strip()
+            part_name = _LEADING_NUMBER.sub('', part_name)
+            part_name = _TRAILING_NUMBERS.sub('', part_name).strip()
             
             if part_name:
                 table_data.append({
@@ -327,13 +879,14 @@ def parse_estimation_table(text: str, translated_text: str) -> List[Dict]:
     return table_data
 
 
-def extract_document_info(text: str, translated_text: str) -> Dict:
+def extract_document_info(text: str, translated_text: str, lines: Optional[List[str]] = None) -> Dict:
     """
     Extract document metadata (company name, date, reference, etc.)
     
     Args:
         text: Original OCR text
         translated_text: Translated text
+        lines: Working text already split into lines, if the caller has it
         
     Returns:
         Dictionary with document info
@@ -348,8 +901,9 @@ def extract_document_info(text: str, translated_text: str) -> Dict:
     }
     
     # Try to find company name (usually first few lines, in caps)
-    lines = working_text.split('\n')[:10]
-    for line in lines:
+    if lines is None:
+        lines = working_text.split('\n', 10)
+    for line in lines[:10]:
         line = line.strip()
         # Company names often have "Motor", "Auto", "Service", "Engineering"
         if any(word in line.upper() for word in ['MOTOR', 'AUTO', 'SERVICE', 'ENGINEERING', 'GARAGE', 'WORKSHOP']):
@@ -357,34 +911,22 @@ def extract_document_info(text: str, translated_text: str) -> Dict:
             break
     
     # Find reference/estimate number
-    ref_patterns = [
-        r'(?:Est\.?\s*No\.?|Ref\.?\s*No\.?|Reference|Estimate\s*#?)[:\s]*([A-Z0-9/-]+)',
-        r'(?:No\.?|#)[:\s]*(\d+)',
-    ]
-    for pattern in ref_patterns:
-        match = re.search(pattern, working_text, re.IGNORECASE)
+    for pattern in _REF_PATTERNS:
+        match = pattern.search(working_text)
         if match:
             info['reference_number'] = match.group(1)
             break
     
     # Find date
-    date_patterns = [
-        r'(\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4})',
-        r'(\d{4}[/.-]\d{1,2}[/.-]\d{1,2})',
-    ]
-    for pattern in date_patterns:
-        match = re.search(pattern, working_text)
+    for pattern in _DATE_PATTERNS:
+        match = pattern.search(working_text)
         if match:
             info['document_date'] = match.group(1)
             break
     
     # Find vehicle info
-    vehicle_patterns = [
-        r'(?:Reg\.?\s*No\.?|Vehicle\s*No\.?|Registration)[:\s]*([A-Z0-9-]+)',
-        r'([A-Z]{2,3}[-\s]?\d{4})',  # Sri Lankan format
-    ]
-    for pattern in vehicle_patterns:
-        match = re.search(pattern, working_text, re.IGNORECASE)
+    for pattern in _VEHICLE_PATTERNS:
+        match = pattern.search(working_text)
         if match:
             info['vehicle_info'] = match.group(1)
             break
@@ -392,6 +934,31 @@ def extract_document_info(text: str, translated_text: str) -> Dict:
     return info
 
 
+_STRIP_COMMA = str.maketrans('', '', ',')
+_NO_PRICE = frozenset(('-', '✓'))
+
+
+def _to_price(value) -> float:
+    """Parse a price like '1,800', '1800/-' or '1800/=' to float (ValueError if not a number)."""
+    value = str(value).translate(_STRIP_COMMA)
+    if '/' in value:
+        value = value.replace('/-', '').replace('/=', '')
+    return float(value)
+
+
+def _column_total(table_data: List[Dict], column: str) -> float:
+    """Sum one price column, skipping '-', '✓' and unparseable cells."""
+    total = 0
+    for row in table_data:
+        value = row.get(column, '-')
+        if value and value not in _NO_PRICE:
+            try:
+                total += _to_price(value)
+            except ValueError:
+                pass
+    return total
+
+
 def calculate_totals(table_data: List[Dict]) -> Dict:
     """
     Calculate totals from table data.
@@ -402,25 +969,8 @@ def calculate_totals(table_data: List[Dict]) -> Dict:
     Returns:
         Dictionary with totals
     """
-    estimate_total = 0
-    approved_total = 0
-    
-    for row in table_data:
-        # Parse estimate
-        est = row.get('estimate', '-')
-        if est and est != '-' and est != '✓':
-            try:
-                estimate_total += float(str(est).replace(',', '').replace('/-', '').replace('/=', ''))
-            except ValueError:
-                pass
-        
-        # Parse approved
-        appr = row.get('approved', '-')
-        if appr and appr != '-' and appr != '✓':
-            try:
-                approved_total += float(str(appr).replace(',', '').replace('/-', '').replace('/=', ''))
-            except ValueError:
-                pass
+    estimate_total = _column_total(table_data, 'estimate')
+    approved_total = _column_total(table_data, 'approved')
     
     return {
         'estimate_total': f"{estimate_total:.2f}" if estimate_total > 0 else "0.00",
@@ -430,9 +980,15 @@ def calculate_totals(table_data: List[Dict]) -> Dict:
     }
 
 
-def process_with_google_vision_pure(filepath: str, document_type: str = "estimation") -> Dict:
+# Errors that mean the API/credentials are unusable; these are re-raised
+# instead of being reported as a per-document failure
+_FATAL_API_ERRORS = ('billing', 'disabled', 'not been used', 'enable', 'credentials', '403', '401')
+
+
+def process_with_google_vision_pure(filepath, document_type: str = "estimation", ocr_output: Optional[Tuple] = None) -> Dict:
     """
-    Complete pipeline using ONLY Google services (no GPT/OpenAI).
+    Complete pipeline using ONLY Google services; makes no GPT/OpenAI calls
+    (process_batch_with_gpt is the GPT-based alternative).
     
     Pipeline:
     1. Google Vision OCR - Extract text
@@ -440,8 +996,10 @@ def process_with_google_vision_pure(filepath: str, document_type: str = "estimat
     3. Pattern matching - Extract structured data
     
     Args:
-        filepath: Path to the image file
+        filepath: Path to the image file, or the image bytes
         document_type: "estimation" or "vehicle_info"
+        ocr_output: Result of extract_text_with_google_vision(filepath, include_languages=True)
+            if already available (or extract_text_batch's error dict); skips the Vision call
         
     Returns:
         Dict with translated text and extracted structured data
@@ -461,38 +1019,61 @@ def process_with_google_vision_pure(filepath: str, document_type: str = "estimat
     
     try:
         # Step 1: Extract text using Google Vision OCR
-        print(f"[Step 1/3] Google Vision OCR: Extracting text from: {filepath}")
-        raw_text, word_annotations = extract_text_with_google_vision(filepath)
+        source = f"<{len(filepath)} bytes>" if isinstance(filepath, _BYTES_TYPES) else filepath
+        logger.info("[Step 1/3] Google Vision OCR: Extracting text from: %s", source)
+        if ocr_output is None:
+            ocr_output = extract_text_with_google_vision(filepath, include_languages=True)
+        elif isinstance(ocr_output, dict):
+            # This image failed inside an otherwise successful batch
+            raise Exception(ocr_output['error'])
+        raw_text, word_annotations, languages = ocr_output
         
         if not raw_text:
             result['error'] = "No text could be extracted from the image"
             return result
         
         result['raw_ocr_text'] = raw_text
-        print(f"[Step 1/3] Extracted {len(raw_text)} characters, {len(word_annotations)} words")
+        logger.info("[Step 1/3] Extracted %d characters, %d words", len(raw_text), len(word_annotations))
         
         # Step 2: Translate using Google Translate
-        print(f"[Step 2/3] Google Translate: Translating text...")
-        translated_text, source_language = translate_text_with_google(raw_text)
+        if languages == ['en']:
+            # Vision saw only English - nothing to translate
+            logger.info("[Step 2/3] Google Translate: Skipped (document is English)")
+            translated_text, source_language = raw_text, 'English'
+        else:
+            logger.info("[Step 2/3] Google Translate: Translating text...")
+            translated_text, source_language = translate_text_with_google(raw_text)
         
         result['translated_text'] = translated_text
         result['source_language'] = source_language
         
         # Step 3: Extract structured data using pattern matching
-        print(f"[Step 3/3] Pattern Matching: Extracting table data...")
+        logger.info("[Step 3/3] Pattern Matching: Extracting table data...")
         
         if document_type == "estimation":
+            # Split once for both parsers
+            lines = (translated_text or raw_text).split('\n')
+            
+            # Tables parse far better row by row than in Vision's reading order.
+            # Rows are rebuilt from the untranslated word boxes, so they are
+            # only usable when the text needed no translation.
+            if translated_text == raw_text:
+                rows = group_words_into_rows(word_annotations)
+                if rows:
+                    lines = rows
+                    logger.debug("[Step 3/3] Grouped words into %d rows", len(rows))
+            
             # Parse estimation table
-            table_data = parse_estimation_table(raw_text, translated_text)
+            table_data = parse_estimation_table(raw_text, translated_text, lines)
             result['table_data'] = table_data
             
             # Extract document info
-            result['document_info'] = extract_document_info(raw_text, translated_text)
+            result['document_info'] = extract_document_info(raw_text, translated_text, lines)
             
             # Calculate totals
             result['totals'] = calculate_totals(table_data)
             
-            print(f"[Step 3/3] Extracted {len(table_data)} items from table")
+            logger.info("[Step 3/3] Extracted %d items from table", len(table_data))
         
         else:  # vehicle_info
             # For vehicle info, extract key fields
@@ -502,17 +1083,209 @@ def process_with_google_vision_pure(filepath: str, document_type: str = "estimat
         
     except Exception as e:
         error_msg = str(e)
-        print(f"[Error] {error_msg}")
+        logger.error("[Error] %s", error_msg)
         result['success'] = False
         result['error'] = error_msg
         
         # Re-raise for API/credential errors
-        if any(err in error_msg.lower() for err in ['billing', 'disabled', 'not been used', 'enable', 'credentials', '403', '401']):
+        error_lower = error_msg.lower()
+        if any(err in error_lower for err in _FATAL_API_ERRORS):
             raise
         
         return result
 
 
+def process_batch(filepaths: List[str], document_type: str = "estimation", max_workers: int = 8) -> List[Dict]:
+    """
+    Run the Google Vision pipeline over many images as an overlapping pipeline:
+    OCR is done in batch_annotate_images chunks on the calling thread, and each
+    chunk's translate + parse work is handed to a thread pool while the next
+    chunk is being OCR'd. Vision requests are rate-limited globally (OCR_RPS);
+    all threads share the cached Vision/Translate clients.
+    
+    Args:
+        filepaths: Paths to the image files
+        document_type: "estimation" or "vehicle_info"
+        max_workers: Maximum concurrent translate/parse workers
+        
+    Returns:
+        List of result dicts, in the same order as filepaths
+    """
+    filepaths = list(filepaths)
+    if not filepaths:
+        return []
+    
+    futures = []
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(filepaths)))) as executor:
+        for start in range(0, len(filepaths), VISION_MAX_IMAGES_PER_BATCH):
+            chunk = filepaths[start:start + VISION_MAX_IMAGES_PER_BATCH]
+            try:
+                ocr_outputs = extract_text_batch(chunk, include_languages=True)
+            except Exception as e:
+                # One bad image fails the whole batch call - redo this chunk
+                # per image so each gets its own result/error
+                logger.warning("[Batch] OCR batch failed (%s); processing %d images individually", e, len(chunk))
+                ocr_outputs = [None] * len(chunk)
+            
+            for filepath, ocr_output in zip(chunk, ocr_outputs):
+                futures.append(executor.submit(process_with_google_vision_pure, filepath, document_type, ocr_output))
+        
+        return [future.result() for future in futures]
+
+
+def process_batch_with_gpt(filepaths: List[str], document_type: str = "estimation", max_workers: int = 8,
+                           offline_mode: bool = False, ocr_workers: int = 2) -> List[Dict]:
+    """
+    OCR many images with Google Vision, then run translate_and_extract_with_gpt
+    on each text concurrently. OCR and GPT run as separate worker pools:
+    GPT calls for a chunk start as soon as that chunk's OCR finishes, while
+    other chunks are still being OCR'd.
+    
+    Args:
+        filepaths: Paths to the image files
+        document_type: "estimation" or "vehicle_info"
+        max_workers: Maximum concurrent GPT requests
+        ocr_workers: Maximum concurrent Vision batch requests (of up to 16 images each)
+        offline_mode: Submit the GPT calls through the OpenAI Batch API instead
+            (half price, higher limits, but may take up to 24h; blocks until done)
+        
+    Returns:
+        List of GPT result dicts, in the same order as filepaths
+    """
+    filepaths = list(filepaths)
+    if not filepaths:
+        return []
+    
+    if offline_mode:
+        ocr_outputs = []
+        for start in range(0, len(filepaths), VISION_MAX_IMAGES_PER_BATCH):
+            ocr_outputs.extend(_extract_text_batch_or_errors(filepaths[start:start + VISION_MAX_IMAGES_PER_BATCH]))
+        ok = [i for i, output in enumerate(ocr_outputs) if not isinstance(output, dict)]
+        results = [_ocr_failure_result(output) if isinstance(output, dict) else None for output in ocr_outputs]
+        for i, result in zip(ok, _extract_with_gpt_batch_api([ocr_outputs[i][0] for i in ok], document_type)):
+            results[i] = result
+        return results
+    
+    starts = range(0, len(filepaths), VISION_MAX_IMAGES_PER_BATCH)
+    gpt_futures = [None] * len(filepaths)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(ocr_workers, len(starts)))) as ocr_pool, \
+            ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(filepaths)))) as gpt_pool:
+        ocr_futures = {
+            ocr_pool.submit(_extract_text_batch_or_errors, filepaths[start:start + VISION_MAX_IMAGES_PER_BATCH]): start
+            for start in starts
+        }
+        # Hand each OCR chunk to the GPT pool as soon as it completes
+        for ocr_future in as_completed(ocr_futures):
+            start = ocr_futures[ocr_future]
+            for offset, ocr_output in enumerate(ocr_future.result()):
+                if isinstance(ocr_output, dict):
+                    gpt_futures[start + offset] = _completed_future(_ocr_failure_result(ocr_output))
+                else:
+                    gpt_futures[start + offset] = gpt_pool.submit(
+                        translate_and_extract_with_gpt, ocr_output[0], document_type)
+        
+        return [_future_result_or_error(future) for future in gpt_futures]
+
+
+def _extract_text_batch_or_errors(image_paths: List) -> List:
+    """
+    extract_text_batch that never fails the whole chunk: if the batch call
+    raises, each image is retried alone and one that still fails gets an
+    {"error": message} entry. Credential/API-disabled errors are re-raised.
+    """
+    try:
+        return extract_text_batch(image_paths)
+    except Exception as e:
+        if any(err in str(e).lower() for err in _FATAL_API_ERRORS):
+            raise
+        if len(image_paths) == 1:
+            return [{"error": str(e)}]
+        logger.warning("[Batch] OCR batch failed (%s); processing %d images individually", e, len(image_paths))
+        return [output for image_path in image_paths for output in _extract_text_batch_or_errors([image_path])]
+
+
+def _future_result_or_error(future: Future) -> Dict:
+    """A GPT future's result, or a per-item error result if it raised."""
+    try:
+        return future.result()
+    except Exception as e:
+        return {"error": str(e), "raw_response": ""}
+
+
+def _ocr_failure_result(ocr_output: Dict) -> Dict:
+    """GPT-path result for an image whose OCR failed, shaped like translate_and_extract_with_gpt's errors."""
+    return {"error": ocr_output['error'], "raw_response": ""}
+
+
+def _completed_future(value) -> Future:
+    """A Future already resolved to value, to sit alongside pool futures."""
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _extract_with_gpt_batch_api(texts: List[str], document_type: str) -> List[Dict]:
+    """
+    Run the GPT extraction for many texts as one OpenAI Batch API job.
+    Cached results are reused; only the rest are submitted.
+    """
+    keys = [_gpt_cache_key(text, document_type) for text in texts]
+    results = _result_cache_get(keys)
+    for text, key in zip(texts, keys):
+        insufficient = _insufficient_ocr_result(text, document_type)
+        if insufficient is not None:
+            results[key] = insufficient
+    pending = {str(i): text for i, (text, key) in enumerate(zip(texts, keys)) if key not in results}
+    
+    if pending:
+        client = get_openai_client()
+        batch_input = '\n'.join(
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": _gpt_request_body(GPT_FULL_MODEL, text, document_type),
+            }, ensure_ascii=False)
+            for custom_id, text in pending.items()
+        )
+        input_file = client.files.create(file=("batch.jsonl", batch_input.encode('utf-8')), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("[GPT Batch] Submitted %d requests as batch %s", len(pending), batch.id)
+        
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            time.sleep(GPT_BATCH_POLL_INTERVAL)
+            batch = client.batches.retrieve(batch.id)
+        logger.info("[GPT Batch] Batch %s finished: %s", batch.id, batch.status)
+        
+        fresh = {}
+        if batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = _json_loads(line)
+                custom_id = item.get('custom_id')
+                if custom_id not in pending or not item.get('response'):
+                    continue
+                try:
+                    content = item['response']['body']['choices'][0]['message']['content']
+                    fresh[keys[int(custom_id)]] = _json_loads(content)
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+        _result_cache_put(fresh)
+        results.update(fresh)
+    
+    return [
+        results.get(key) or {"error": "GPT batch request failed", "raw_response": text}
+        for text, key in zip(texts, keys)
+    ]
+
+
 # Legacy function for backwards compatibility
 def process_with_google_vision(filepath_or_bytes, document_type: str = "estimation", is_bytes: bool = False) -> Dict:
     """
@@ -522,70 +1295,320 @@ def process_with_google_vision(filepath_or_bytes, document_type: str = "estimati
     Args:
         filepath_or_bytes: Path to image file OR bytes data
         document_type: "estimation" or "vehicle_info"
-        is_bytes: If True, first arg is bytes data (not a filepath)
-    """
-    # Auto-detect if it's bytes
-    if isinstance(filepath_or_bytes, bytes):
-        is_bytes = True
-    
-    if is_bytes:
-        # Handle bytes input
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-            tmp_file.write(filepath_or_bytes)
-            tmp_path = tmp_file.name
-        try:
-            return process_with_google_vision_pure(tmp_path, document_type)
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
-    else:
-        return process_with_google_vision_pure(filepath_or_bytes, document_type)
+        is_bytes: Kept for compatibility; bytes input is detected automatically
+    """
+    # Bytes are sent to Vision as-is, no temp file needed
+    return process_with_google_vision_pure(filepath_or_bytes, document_type)
 
 
-# Keep the old GPT-based function available if needed
-def translate_and_extract_with_gpt(extracted_text: str, document_type: str = "estimation") -> Dict:
+def get_openai_client():
     """
-    DEPRECATED: Use GPT to translate and extract structured information.
-    Kept for backwards compatibility but not used in pure Google mode.
+    Return the shared OpenAI client (used only by the legacy GPT path),
+    creating it on first use so its HTTP connection pool is reused.
     """
-    try:
-        from openai import OpenAI
-        
-        api_key = os.environ.get('OPENAI_API_KEY', '').strip()
-        if not api_key:
-            raise Exception("OPENAI_API_KEY environment variable not set")
-        
-        client = OpenAI(api_key=api_key)
-        
-        prompt = """Analyze this OCR text from a vehicle repair estimation document.
-        
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is not None:
+        return _OPENAI_CLIENT
+    
+    from openai import OpenAI
+    import httpx  # installed with openai
+    
+    api_key = os.environ.get('OPENAI_API_KEY', '').strip()
+    if not api_key:
+        raise Exception("OPENAI_API_KEY environment variable not set")
+    
+    with _CLIENT_LOCK:
+        if _OPENAI_CLIENT is None:
+            # One long-lived pool sized for GPT_MAX_CONCURRENT keep-alive
+            # connections; HTTP/2 multiplexing when the h2 package is installed
+            http_client = httpx.Client(
+                http2=importlib.util.find_spec('h2') is not None,
+                limits=httpx.Limits(max_connections=2 * GPT_MAX_CONCURRENT,
+                                    max_keepalive_connections=GPT_MAX_CONCURRENT),
+                timeout=httpx.Timeout(120.0, connect=10.0)
+            )
+            atexit.register(http_client.close)
+            _OPENAI_CLIENT = OpenAI(api_key=api_key, http_client=http_client)
+    return _OPENAI_CLIENT
+
+
+# Legacy GPT path: try the cheap model first, escalate to the full model only
+# when its answer is unusable. Sinhala/Tamil text goes straight to the full model.
+GPT_FAST_MODEL = "gpt-4o-mini"
+GPT_FULL_MODEL = "gpt-4o"
+_INDIC_SCRIPT_RE = re.compile('[\u0D80-\u0DFF\u0B80-\u0BFF]')  # Sinhala, Tamil
+_gpt_stats = Counter()
+GPT_BATCH_POLL_INTERVAL = 60.0  # seconds between OpenAI Batch API status checks
+GPT_MIN_TEXT_CHARS = 20  # OCR text shorter than this (ignoring whitespace) skips GPT
+GPT_MAX_TOKENS = 4000
+GPT_TOKENS_PER_ROW = 60  # generous, so table rows are never cut off mid-JSON
+_DIGIT_RE = re.compile(r'\d')
+
+# Static instructions go in the system message so OpenAI can cache the prefix;
+# only the OCR text is sent as the user message
+GPT_ESTIMATION_SYSTEM_PROMPT = """Analyze the OCR text from a vehicle repair estimation document given by the user.
+
 Extract and return JSON with:
 - translated_text: Brief summary
 - table_data: Array of {description, estimate, approved}
 - document_info: {company_name, reference_number, date, vehicle_info}
-- totals: {estimate_total, approved_total, grand_total}
+- totals: {estimate_total, approved_total, grand_total}"""
 
-OCR Text:
-"""
+
+def _strict_object(properties: Dict) -> Dict:
+    """JSON Schema object in the form OpenAI strict structured outputs require."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+_STRING = {"type": "string"}
+
+# Structured-output schema matching GPT_ESTIMATION_SYSTEM_PROMPT; the API
+# guarantees replies conform, so no fence stripping or repair is needed
+GPT_ESTIMATION_SCHEMA = _strict_object({
+    "translated_text": _STRING,
+    "table_data": {
+        "type": "array",
+        "items": _strict_object({"description": _STRING, "estimate": _STRING, "approved": _STRING}),
+    },
+    "document_info": _strict_object({
+        "company_name": _STRING, "reference_number": _STRING, "date": _STRING, "vehicle_info": _STRING,
+    }),
+    "totals": _strict_object({"estimate_total": _STRING, "approved_total": _STRING, "grand_total": _STRING}),
+})
+
+
+def _insufficient_ocr_result(extracted_text: str, document_type: str) -> Optional[Dict]:
+    """
+    Return a stub result if the OCR text is too thin to be worth a GPT call
+    (under GPT_MIN_TEXT_CHARS non-space chars, mostly symbols, or an
+    estimation with no numbers at all); None otherwise.
+    """
+    meaningful = ''.join(extracted_text.split())
+    alnum = sum(c.isalnum() for c in meaningful)
+    if (len(meaningful) < GPT_MIN_TEXT_CHARS
+            or alnum < len(meaningful) * 0.1
+            or (document_type == "estimation" and not any(c.isdigit() for c in meaningful))):
+        return {
+            "translated_text": extracted_text,
+            "error": "Insufficient OCR content",
+            "table_data": [],
+            "document_info": {},
+            "totals": {}
+        }
+    return None
+
+
+def _gpt_max_tokens(extracted_text: str, document_type: str) -> int:
+    """
+    Output token cap sized to the document: roughly GPT_TOKENS_PER_ROW per
+    line that contains a number (candidate table rows) plus fixed overhead,
+    capped at GPT_MAX_TOKENS. Generation time scales with this budget.
+    """
+    if document_type != "estimation":
+        return 800
+    rows = sum(1 for line in extracted_text.splitlines() if _DIGIT_RE.search(line))
+    return min(GPT_MAX_TOKENS, 400 + GPT_TOKENS_PER_ROW * rows)
+
+
+def _gpt_request_body(model: str, extracted_text: str, document_type: str = "estimation") -> Dict:
+    """Chat completion parameters for the extraction prompt."""
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": GPT_ESTIMATION_SYSTEM_PROMPT},
+            {"role": "user", "content": extracted_text}
+        ],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "estimation", "schema": GPT_ESTIMATION_SCHEMA, "strict": True},
+        },
+        "max_tokens": _gpt_max_tokens(extracted_text, document_type),
+        "temperature": 0.1,
+    }
+
+
+def _gpt_cache_key(extracted_text: str, document_type: str) -> str:
+    return 'gpt:' + hashlib.sha256(
+        f"{GPT_PROMPT_VERSION}\x00{document_type}\x00{extracted_text}".encode('utf-8')
+    ).hexdigest()
+
+
+def _gpt_result_complete(result, document_type: str) -> bool:
+    """
+    Whether an extraction is good enough to skip escalating to a larger
+    model: estimations need table rows, vehicle_info needs the vehicle field.
+    """
+    if not isinstance(result, dict):
+        return False
+    if document_type == "estimation":
+        return bool(result.get('table_data'))
+    document_info = result.get('document_info')
+    return isinstance(document_info, dict) and bool(str(document_info.get('vehicle_info') or '').strip())
+
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = ' \t\r\n'
+
+
+def _next_json_field(buffer: str, pos: int) -> Optional[Tuple[str, object, int]]:
+    """
+    Parse the next '"key": value' pair of a partially received JSON object
+    starting at pos. Returns (key, value, end_pos), or None until the pair
+    has fully arrived.
+    """
+    length = len(buffer)
+    while pos < length and buffer[pos] in _JSON_WHITESPACE + ',':
+        pos += 1
+    if pos >= length or buffer[pos] == '}':
+        return None
+    try:
+        field, pos = _JSON_DECODER.raw_decode(buffer, pos)
+        while pos < length and buffer[pos] in _JSON_WHITESPACE:
+            pos += 1
+        if pos >= length or buffer[pos] != ':':
+            return None
+        pos += 1
+        while pos < length and buffer[pos] in _JSON_WHITESPACE:
+            pos += 1
+        value, pos = _JSON_DECODER.raw_decode(buffer, pos)
+    except json.JSONDecodeError:
+        return None
+    return field, value, pos
+
+
+def _gpt_extract_stream(client, model: str, extracted_text: str, document_type: str = "estimation"):
+    """
+    Run the extraction prompt on one model with a streamed reply, yielding
+    (field, value) pairs as each top-level field finishes arriving.
+    Raises ValueError if the model refuses or the reply is cut off.
+    """
+    stream = _call_with_retry(
+        client.chat.completions.create,
+        semaphore=_GPT_SEMAPHORE,
+        rate_limiter=_GPT_RATE_LIMITER,
+        stream=True,
+        **_gpt_request_body(model, extracted_text, document_type)
+    )
+    
+    buffer = ''
+    pos = None
+    refusal = ''
+    finish_reason = None
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish_reason = choice.finish_reason or finish_reason
+        refusal += getattr(choice.delta, 'refusal', None) or ''
+        if not choice.delta.content:
+            continue
+        buffer += choice.delta.content
         
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt + extracted_text}],
-            max_tokens=4000,
-            temperature=0.1
-        )
+        if pos is None:
+            start = buffer.find('{')
+            if start < 0:
+                continue
+            pos = start + 1
         
-        result_text = response.choices[0].message.content.strip()
+        while True:
+            parsed = _next_json_field(buffer, pos)
+            if parsed is None:
+                break
+            field, value, pos = parsed
+            yield field, value
+    
+    if pos is None:
+        raise ValueError(f"GPT refused: {refusal or None}")
+    if finish_reason != 'stop' or not buffer[pos:].lstrip(_JSON_WHITESPACE + ',').startswith('}'):
+        raise ValueError(f"GPT reply incomplete (finish_reason: {finish_reason})")
+
+
+def _gpt_extract(client, model: str, extracted_text: str, document_type: str = "estimation") -> Dict:
+    """Run the extraction prompt on one model; raises ValueError if the model refuses or is cut off."""
+    return dict(_gpt_extract_stream(client, model, extracted_text, document_type))
+
+
+# Keep the old GPT-based function available if needed
+def translate_and_extract_with_gpt(extracted_text: str, document_type: str = "estimation", use_cache: bool = True) -> Dict:
+    """
+    DEPRECATED: Use GPT to translate and extract structured information.
+    Kept for backwards compatibility but not used in pure Google mode.
+    Successful results are cached by (GPT_PROMPT_VERSION, document_type, text).
+    """
+    insufficient = _insufficient_ocr_result(extracted_text, document_type)
+    if insufficient is not None:
+        return insufficient
+    
+    cache_key = _gpt_cache_key(extracted_text, document_type)
+    if use_cache:
+        cached = _result_cache_get([cache_key]).get(cache_key)
+        if cached is not None:
+            return cached
+    
+    try:
+        client = get_openai_client()
+        
+        if _INDIC_SCRIPT_RE.search(extracted_text):
+            models = (GPT_FULL_MODEL,)
+        else:
+            models = (GPT_FAST_MODEL, GPT_FULL_MODEL)
         
-        if "```json" in result_text:
-            result_text = result_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in result_text:
-            result_text = result_text.split("```")[1].split("```")[0].strip()
+        _gpt_stats['documents'] += 1
+        for model in models:
+            is_last = model == models[-1]
+            try:
+                result = _gpt_extract(client, model, extracted_text, document_type)
+            except ValueError:
+                if is_last:
+                    raise
+                result = None
+            
+            if is_last or _gpt_result_complete(result, document_type):
+                break
+            _gpt_stats['upgrades'] += 1
+            logger.debug("[GPT] %s result unusable, escalating (upgrade ratio %d/%d)",
+                         model, _gpt_stats['upgrades'], _gpt_stats['documents'])
         
-        return json.loads(result_text)
+        if use_cache:
+            _result_cache_put({cache_key: result})
+        return result
         
     except Exception as e:
         return {"error": str(e), "raw_response": extracted_text}
+
+
+def translate_and_extract_with_gpt_stream(extracted_text: str, document_type: str = "estimation",
+                                          use_cache: bool = True):
+    """
+    Streaming variant of translate_and_extract_with_gpt: yields (field, value)
+    pairs as each top-level field of the reply finishes arriving, so callers
+    can show e.g. translated_text before table_data is complete.
+    Always uses GPT_FULL_MODEL (no escalation). API errors are raised, and
+    so is ValueError after the last field if the model refused or the reply
+    was cut off; only complete replies are cached.
+    """
+    insufficient = _insufficient_ocr_result(extracted_text, document_type)
+    if insufficient is not None:
+        yield from insufficient.items()
+        return
+    
+    cache_key = _gpt_cache_key(extracted_text, document_type)
+    if use_cache:
+        cached = _result_cache_get([cache_key]).get(cache_key)
+        if cached is not None:
+            yield from cached.items()
+            return
+    
+    result = {}
+    for field, value in _gpt_extract_stream(get_openai_client(), GPT_FULL_MODEL, extracted_text, document_type):
+        result[field] = value
+        yield field, value
+    
+    # Only a complete reply is cached, since the non-streaming function serves the same entries
+    if use_cache and all(field in result for field in GPT_ESTIMATION_SCHEMA['required']):
+        _result_cache_put({cache_key: result})
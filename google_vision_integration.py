@@ -6,21 +6,39 @@ in the Vehicle Damage Detection project.
 """
 
 import os
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Optional
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 try:
     from google.cloud import vision
     from google.cloud.vision_v1 import types
     GOOGLE_VISION_AVAILABLE = True
 except ImportError:
     GOOGLE_VISION_AVAILABLE = False
-    print("Warning: google-cloud-vision not installed. Install with: pip install google-cloud-vision")
+    logger.warning("google-cloud-vision not installed. Install with: pip install google-cloud-vision")
+
+try:
+    import cv2
+    import numpy as np
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+# The Vision client is created once and shared (it holds the gRPC channel)
+_CLIENT_LOCK = threading.Lock()
+_VISION_CLIENT = None
 
 
 def get_vision_client():
     """
-    Initialize and return a Google Vision API client.
+    Return the shared Google Vision API client, creating it on first use.
     
     Returns:
         vision.ImageAnnotatorClient: Vision API client
@@ -28,12 +46,18 @@ def get_vision_client():
     Raises:
         Exception: If credentials are not properly configured
     """
+    global _VISION_CLIENT
+    if _VISION_CLIENT is not None:
+        return _VISION_CLIENT
+    
     if not GOOGLE_VISION_AVAILABLE:
         raise ImportError("google-cloud-vision package is not installed. Install with: pip install google-cloud-vision")
     
     try:
-        client = vision.ImageAnnotatorClient()
-        return client
+        with _CLIENT_LOCK:
+            if _VISION_CLIENT is None:
+                _VISION_CLIENT = vision.ImageAnnotatorClient()
+        return _VISION_CLIENT
     except Exception as e:
         error_msg = str(e)
         if "credentials" in error_msg.lower():
@@ -47,6 +71,180 @@ def get_vision_client():
         raise Exception(f"Failed to initialize Vision API client: {error_msg}")
 
 
+# Vision accepts at most 16 images per batch_annotate_images request
+MAX_IMAGES_PER_BATCH = 16
+
+# Phone photos are downscaled before upload for features that don't
+# report pixel coordinates (objects use normalized vertices, labels none)
+IMAGE_MAX_SIDE = 1600
+IMAGE_JPEG_QUALITY = 85
+
+
+def _read_image_bytes(image_path: str) -> bytes:
+    """Read an image file; a missing file raises FileNotFoundError without a separate exists() check."""
+    try:
+        with open(image_path, 'rb') as image_file:
+            return image_file.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Image file not found: {image_path}") from None
+
+
+@lru_cache(maxsize=32)
+def _prepare_image_bytes_cached(image_path: str, mtime_ns: int, size: int, max_side: int, quality: int) -> bytes:
+    content = _read_image_bytes(image_path)
+    
+    if not OPENCV_AVAILABLE:
+        return content
+    
+    img = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return content
+    
+    height, width = img.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1:
+        img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+    
+    ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok or encoded.nbytes >= len(content):
+        return content
+    return encoded.tobytes()
+
+
+def prepare_image_bytes(image_path: str, max_side: int = IMAGE_MAX_SIDE, quality: int = IMAGE_JPEG_QUALITY) -> bytes:
+    """
+    Read an image for upload, shrunk to at most max_side pixels and
+    re-encoded as JPEG. Falls back to the original bytes if OpenCV is
+    missing or re-encoding doesn't make the file smaller.
+    
+    Results are cached per (path, mtime, size), so the same photo sent to
+    several providers is only decoded once.
+    """
+    try:
+        stat = os.stat(image_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Image file not found: {image_path}") from None
+    return _prepare_image_bytes_cached(image_path, stat.st_mtime_ns, stat.st_size, max_side, quality)
+
+
+def _bounding_box(vertices, missing: float = 0) -> Dict[str, float]:
+    """Corner dict from a polygon's first and third vertices; absent vertices read as `missing` (0 for x1/y1)."""
+    count = len(vertices)
+    if count > 2:
+        first, third = vertices[0], vertices[2]
+        return {'x1': first.x, 'y1': first.y, 'x2': third.x, 'y2': third.y}
+    if count:
+        first = vertices[0]
+        return {'x1': first.x, 'y1': first.y, 'x2': missing, 'y2': missing}
+    return {'x1': 0, 'y1': 0, 'x2': missing, 'y2': missing}
+
+
+def _parse_text_detection(response) -> Dict[str, any]:
+    """Build the extract_text_from_image result dict from one Vision response."""
+    if response.error.message:
+        raise Exception(f"Vision API error: {response.error.message}")
+    
+    # Walk the underlying protobuf message: proto-plus wraps every attribute
+    # access, which dominates parsing on pages with thousands of words
+    pb = getattr(response, '_pb', response)
+    texts = pb.text_annotations
+    
+    if not texts:
+        return {
+            'full_text': '',
+            'text_blocks': [],
+            'words': []
+        }
+    
+    # First annotation contains the full text
+    full_text = texts[0].description
+    
+    # Extract individual text blocks
+    text_blocks = [
+        {'text': text.description, 'bounding_box': _bounding_box(text.bounding_poly.vertices)}
+        for text in texts[1:]  # Skip first (it's the full text)
+    ]
+    
+    return {
+        'full_text': full_text,
+        'text_blocks': text_blocks,
+        'words': _parse_words(pb)
+    }
+
+
+def _parse_words(pb) -> List[Dict]:
+    """Words with confidence and boxes from a response's full_text_annotation."""
+    # No pages when there is no text
+    return [
+        {
+            'text': ''.join([symbol.text for symbol in word.symbols]),
+            'confidence': word.confidence,
+            'bounding_box': _bounding_box(word.bounding_box.vertices)
+        }
+        for page in pb.full_text_annotation.pages
+        for block in page.blocks
+        for paragraph in block.paragraphs
+        for word in paragraph.words
+    ]
+
+
+def _batch_annotate(image_paths: List[str], features: List, chunk: int = MAX_IMAGES_PER_BATCH,
+                    downscale: bool = False) -> List:
+    """
+    Run the same features over many images, packing up to `chunk` images
+    into each batch_annotate_images request. With downscale=True images go
+    through prepare_image_bytes first.
+    
+    Returns:
+        List of AnnotateImageResponse, in the same order as image_paths
+    """
+    chunk = max(1, min(chunk, MAX_IMAGES_PER_BATCH))
+    
+    # With several requests, check every file up front so a missing one is
+    # caught before any billable request; a single request fails on its own read
+    if len(image_paths) > chunk:
+        for image_path in image_paths:
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(f"Image file not found: {image_path}")
+    
+    client = get_vision_client()
+    responses = []
+    
+    for start in range(0, len(image_paths), chunk):
+        requests = []
+        for image_path in image_paths[start:start + chunk]:
+            content = prepare_image_bytes(image_path) if downscale else _read_image_bytes(image_path)
+            requests.append(vision.AnnotateImageRequest(image=vision.Image(content=content), features=features))
+        
+        response = client.batch_annotate_images(requests=requests)
+        responses.extend(response.responses)
+    
+    return responses
+
+
+def extract_text_from_images(image_paths: List[str]) -> List[Dict[str, any]]:
+    """
+    Extract text from several images, packing up to MAX_IMAGES_PER_BATCH
+    images into each Vision batch_annotate_images request.
+    
+    Args:
+        image_paths: Paths to the image files
+        
+    Returns:
+        List of extract_text_from_image result dicts, in the same order as image_paths
+    """
+    get_vision_client()  # surfaces install/credential errors unwrapped, as before
+    features = [vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)]
+    
+    try:
+        return [_parse_text_detection(r) for r in _batch_annotate(image_paths, features)]
+        
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise Exception(f"Error extracting text from image: {str(e)}")
+
+
 def extract_text_from_image(image_path: str) -> Dict[str, any]:
     """
     Extract text from an image using Google Vision API OCR.
@@ -60,79 +258,102 @@ def extract_text_from_image(image_path: str) -> Dict[str, any]:
             - 'text_blocks': List of text blocks with bounding boxes
             - 'words': List of individual words with positions
     """
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
+    return extract_text_from_images([image_path])[0]
+
+
+def annotate_image_multi(image_path: str, features: Optional[List] = None, max_results: int = 10):
+    """
+    Run several Vision features on one image in a single annotate_image call.
     
+    Args:
+        image_path: Path to the image file
+        features: vision.Feature.Type values to request
+                  (default: TEXT_DETECTION, OBJECT_LOCALIZATION, LABEL_DETECTION)
+        max_results: Maximum number of labels when LABEL_DETECTION is requested
+        
+    Returns:
+        vision.AnnotateImageResponse holding the results of every requested feature
+    """
     client = get_vision_client()
     
-    try:
-        with open(image_path, 'rb') as image_file:
-            content = image_file.read()
-        
-        image = vision.Image(content=content)
-        response = client.text_detection(image=image)
-        
-        if response.error.message:
-            raise Exception(f"Vision API error: {response.error.message}")
-        
-        texts = response.text_annotations
-        
-        if not texts:
-            return {
-                'full_text': '',
-                'text_blocks': [],
-                'words': []
-            }
-        
-        # First annotation contains the full text
-        full_text = texts[0].description
-        
-        # Extract individual text blocks and words
-        text_blocks = []
-        words = []
-        
-        for text in texts[1:]:  # Skip first (it's the full text)
-            vertices = text.bounding_poly.vertices
-            text_blocks.append({
-                'text': text.description,
-                'bounding_box': {
-                    'x1': vertices[0].x if len(vertices) > 0 else 0,
-                    'y1': vertices[0].y if len(vertices) > 0 else 0,
-                    'x2': vertices[2].x if len(vertices) > 2 else 0,
-                    'y2': vertices[2].y if len(vertices) > 2 else 0,
-                }
-            })
-        
-        # Extract words from full text response
-        document = response.full_text_annotation
-        if document:
-            for page in document.pages:
-                for block in page.blocks:
-                    for paragraph in block.paragraphs:
-                        for word in paragraph.words:
-                            word_text = ''.join([
-                                symbol.text for symbol in word.symbols
-                            ])
-                            vertices = word.bounding_box.vertices
-                            words.append({
-                                'text': word_text,
-                                'confidence': word.confidence if hasattr(word, 'confidence') else 1.0,
-                                'bounding_box': {
-                                    'x1': vertices[0].x if len(vertices) > 0 else 0,
-                                    'y1': vertices[0].y if len(vertices) > 0 else 0,
-                                    'x2': vertices[2].x if len(vertices) > 2 else 0,
-                                    'y2': vertices[2].y if len(vertices) > 2 else 0,
-                                }
-                            })
+    if features is None:
+        features = (
+            vision.Feature.Type.TEXT_DETECTION,
+            vision.Feature.Type.OBJECT_LOCALIZATION,
+            vision.Feature.Type.LABEL_DETECTION,
+        )
+    
+    # Text boxes come back in pixel coordinates, so keep full resolution for OCR
+    if vision.Feature.Type.TEXT_DETECTION in features:
+        content = _read_image_bytes(image_path)
+    else:
+        content = prepare_image_bytes(image_path)
+    
+    request = vision.AnnotateImageRequest(
+        image=vision.Image(content=content),
+        features=[
+            vision.Feature(type_=f, max_results=max_results)
+            if f == vision.Feature.Type.LABEL_DETECTION else vision.Feature(type_=f)
+            for f in features
+        ]
+    )
+    response = client.annotate_image(request=request)
+    
+    if response.error.message:
+        raise Exception(f"Vision API error: {response.error.message}")
+    
+    return response
+
+
+def _parse_object_localization(response) -> List[Dict]:
+    """Build the detect_objects_in_image result list from one Vision response."""
+    return [
+        {
+            'name': obj.name,
+            'score': obj.score,  # Confidence score
+            'bounding_box': _bounding_box(obj.bounding_poly.normalized_vertices, missing=1)
+        }
+        for obj in getattr(response, '_pb', response).localized_object_annotations
+    ]
+
+
+def _parse_label_detection(response) -> List[Dict]:
+    """Build the detect_labels_in_image result list from one Vision response."""
+    return [
+        {
+            'description': label.description,
+            'score': label.score,  # Confidence score (0-1)
+            'mid': label.mid  # Machine-generated identifier
+        }
+        for label in getattr(response, '_pb', response).label_annotations
+    ]
+
+
+def analyze_image(image_path: str, max_labels: int = 10) -> Dict[str, any]:
+    """
+    Extract text, objects and labels from an image with one Vision request.
+    
+    Args:
+        image_path: Path to the image file
+        max_labels: Maximum number of labels to return
         
+    Returns:
+        Dict containing:
+            - 'text': extract_text_from_image result
+            - 'objects': detect_objects_in_image result
+            - 'labels': detect_labels_in_image result
+    """
+    try:
+        response = annotate_image_multi(image_path, max_results=max_labels)
         return {
-            'full_text': full_text,
-            'text_blocks': text_blocks,
-            'words': words
+            'text': _parse_text_detection(response),
+            'objects': _parse_object_localization(response),
+            'labels': _parse_label_detection(response)
         }
-        
+    except (FileNotFoundError, ImportError):
+        raise
     except Exception as e:
-        raise Exception(f"Error extracting text from image: {str(e)}")
+        raise Exception(f"Error analyzing image: {str(e)}")
 
 
 def detect_objects_in_image(image_path: str) -> List[Dict]:
@@ -145,41 +366,44 @@ def detect_objects_in_image(image_path: str) -> List[Dict]:
     Returns:
         List of detected objects with their locations and labels
     """
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
-    
-    client = get_vision_client()
+    get_vision_client()  # surfaces install/credential errors unwrapped, as before
     
     try:
-        with open(image_path, 'rb') as image_file:
-            content = image_file.read()
-        
-        image = vision.Image(content=content)
-        response = client.object_localization(image=image)
-        
-        if response.error.message:
-            raise Exception(f"Vision API error: {response.error.message}")
-        
-        objects = []
-        for obj in response.localized_object_annotations:
-            vertices = obj.bounding_poly.normalized_vertices
-            objects.append({
-                'name': obj.name,
-                'score': obj.score,  # Confidence score
-                'bounding_box': {
-                    'x1': vertices[0].x if len(vertices) > 0 else 0,
-                    'y1': vertices[0].y if len(vertices) > 0 else 0,
-                    'x2': vertices[2].x if len(vertices) > 2 else 1,
-                    'y2': vertices[2].y if len(vertices) > 2 else 1,
-                }
-            })
-        
-        return objects
+        response = annotate_image_multi(image_path, features=(vision.Feature.Type.OBJECT_LOCALIZATION,))
+        return _parse_object_localization(response)
         
+    except FileNotFoundError:
+        raise
     except Exception as e:
         raise Exception(f"Error detecting objects in image: {str(e)}")
 
 
+def detect_objects_batch(image_paths: List[str], chunk: int = MAX_IMAGES_PER_BATCH) -> List[List[Dict]]:
+    """
+    Detect objects in several images with batched Vision requests.
+    
+    Args:
+        image_paths: Paths to the image files
+        chunk: Images per batch_annotate_images request (at most 16)
+        
+    Returns:
+        One detect_objects_in_image result list per image, in the same order as image_paths
+    """
+    try:
+        features = [vision.Feature(type_=vision.Feature.Type.OBJECT_LOCALIZATION)]
+        results = []
+        for response in _batch_annotate(image_paths, features, chunk, downscale=True):
+            if response.error.message:
+                raise Exception(f"Vision API error: {response.error.message}")
+            results.append(_parse_object_localization(response))
+        return results
+        
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise Exception(f"Error detecting objects in images: {str(e)}")
+
+
 def detect_labels_in_image(image_path: str, max_results: int = 10) -> List[Dict]:
     """
     Detect labels (categories) in an image.
@@ -191,55 +415,108 @@ def detect_labels_in_image(image_path: str, max_results: int = 10) -> List[Dict]
     Returns:
         List of labels with confidence scores
     """
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image file not found: {image_path}")
-    
-    client = get_vision_client()
+    get_vision_client()  # surfaces install/credential errors unwrapped, as before
     
     try:
-        with open(image_path, 'rb') as image_file:
-            content = image_file.read()
-        
-        image = vision.Image(content=content)
-        response = client.label_detection(image=image, max_results=max_results)
-        
-        if response.error.message:
-            raise Exception(f"Vision API error: {response.error.message}")
-        
-        labels = []
-        for label in response.label_annotations:
-            labels.append({
-                'description': label.description,
-                'score': label.score,  # Confidence score (0-1)
-                'mid': label.mid  # Machine-generated identifier
-            })
-        
-        return labels
+        response = annotate_image_multi(
+            image_path, features=(vision.Feature.Type.LABEL_DETECTION,), max_results=max_results
+        )
+        return _parse_label_detection(response)
         
+    except FileNotFoundError:
+        raise
     except Exception as e:
         raise Exception(f"Error detecting labels in image: {str(e)}")
 
 
+# Vision's synchronous file annotation handles at most 5 pages per request
+PDF_PAGES_PER_REQUEST = 5
+PDF_MAX_WORKERS = 4
+
+
 def extract_text_from_pdf(pdf_path: str) -> Dict[str, any]:
     """
     Extract text from a PDF file using Google Vision API.
     
-    Note: Vision API can process PDFs, but they must be converted to images first,
-    or you can use Document AI API for better PDF handling.
+    The PDF is sent inline to batch_annotate_files, which OCRs pages
+    server-side, so no page-to-image conversion or GCS bucket is needed.
+    Pages are requested PDF_PAGES_PER_REQUEST at a time, with the chunks
+    after the first sent concurrently.
     
     Args:
         pdf_path: Path to the PDF file
         
     Returns:
-        Dict with extracted text (similar to extract_text_from_image)
+        Dict with extracted text (same keys as extract_text_from_image, plus
+        'total_pages'); page texts are joined with newlines
     """
-    # Note: For PDF processing, Google Document AI API is recommended
-    # This function is a placeholder - PDF support requires converting pages to images
-    # or using Document AI API
-    raise NotImplementedError(
-        "PDF text extraction requires Google Document AI API or converting PDF pages to images first. "
-        "Consider using Document AI API for better PDF handling."
-    )
+    try:
+        with open(pdf_path, 'rb') as pdf_file:
+            content = pdf_file.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}") from None
+    
+    client = get_vision_client()
+    
+    try:
+        input_config = vision.InputConfig(content=content, mime_type='application/pdf')
+        features = [vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)]
+        
+        def annotate(pages=()):
+            request = vision.AnnotateFileRequest(input_config=input_config, features=features)
+            if pages:
+                request.pages = pages
+            return client.batch_annotate_files(requests=[request]).responses[0]
+        
+        # Without explicit pages Vision returns the first five, plus the page count
+        file_responses = [annotate()]
+        if file_responses[0].error.message:
+            raise Exception(f"Vision API error: {file_responses[0].error.message}")
+        total_pages = file_responses[0].total_pages
+        
+        page_chunks = [
+            list(range(start, min(start + PDF_PAGES_PER_REQUEST, total_pages + 1)))
+            for start in range(PDF_PAGES_PER_REQUEST + 1, total_pages + 1, PDF_PAGES_PER_REQUEST)
+        ]
+        if page_chunks:
+            with ThreadPoolExecutor(max_workers=min(PDF_MAX_WORKERS, len(page_chunks))) as executor:
+                file_responses.extend(executor.map(annotate, page_chunks))
+        
+        page_texts = []
+        text_blocks = []
+        words = []
+        for file_response in file_responses:
+            if file_response.error.message:
+                raise Exception(f"Vision API error: {file_response.error.message}")
+            for response in file_response.responses:
+                page = _parse_text_detection(response)
+                text_blocks.extend(page['text_blocks'])
+                # File responses may carry only full_text_annotation
+                if page['full_text']:
+                    page_texts.append(page['full_text'])
+                    words.extend(page['words'])
+                else:
+                    pb = getattr(response, '_pb', response)
+                    page_texts.append(pb.full_text_annotation.text)
+                    words.extend(_parse_words(pb))
+        
+        return {
+            'full_text': '\n'.join(page_texts),
+            'text_blocks': text_blocks,
+            'words': words,
+            'total_pages': total_pages
+        }
+        
+    except Exception as e:
+        raise Exception(f"Error extracting text from PDF: {str(e)}")
+
+
+# License plate patterns (vary by country)
+_PLATE_PATTERNS = [
+    re.compile(r'[A-Z]{2,3}\s*[0-9]{1,4}\s*[A-Z]{1,2}\s*[0-9]{4}', re.IGNORECASE),  # Indian format
+    re.compile(r'[A-Z]{1,3}[0-9]{1,4}[A-Z]{1,3}', re.IGNORECASE),  # Generic format
+]
+_YEAR_PATTERN = re.compile(r'(?:19|20)\d{2}')
 
 
 def analyze_vehicle_document(image_path: str) -> Dict[str, any]:
@@ -268,21 +545,13 @@ def analyze_vehicle_document(image_path: str) -> Dict[str, any]:
         vehicle_info = {}
         
         # Look for common patterns (enhance these based on your document formats)
-        import re
-        
-        # License plate patterns (vary by country)
-        plate_patterns = [
-            r'[A-Z]{2,3}\s*[0-9]{1,4}\s*[A-Z]{1,2}\s*[0-9]{4}',  # Indian format
-            r'[A-Z]{1,3}[0-9]{1,4}[A-Z]{1,3}',  # Generic format
-        ]
-        for pattern in plate_patterns:
-            match = re.search(pattern, full_text, re.IGNORECASE)
+        for pattern in _PLATE_PATTERNS:
+            match = pattern.search(full_text)
             if match:
                 vehicle_info['registration_number'] = match.group().strip()
                 break
         
-        # Year patterns
-        year_match = re.search(r'(19|20)\d{2}', full_text)
+        year_match = _YEAR_PATTERN.search(full_text)
         if year_match:
             vehicle_info['year'] = year_match.group()
         
@@ -319,9 +588,10 @@ if __name__ == "__main__":
         print("Google Vision API - Text Extraction Test")
         print("=" * 70)
         
-        # Test text extraction
+        # Text, labels and objects come back from a single request
         print("\n1. Extracting text...")
-        text_result = extract_text_from_image(image_path)
+        result = analyze_image(image_path, max_labels=5)
+        text_result = result['text']
         print(f"\nFull Text:\n{text_result['full_text']}")
         print(f"\nNumber of text blocks: {len(text_result['text_blocks'])}")
         print(f"Number of words: {len(text_result['words'])}")
@@ -329,15 +599,13 @@ if __name__ == "__main__":
         # Test label detection
         print("\n" + "=" * 70)
         print("2. Detecting labels...")
-        labels = detect_labels_in_image(image_path, max_results=5)
-        for label in labels:
+        for label in result['labels']:
             print(f"  - {label['description']}: {label['score']:.2%}")
         
         # Test object detection
         print("\n" + "=" * 70)
         print("3. Detecting objects...")
-        objects = detect_objects_in_image(image_path)
-        for obj in objects[:5]:  # Show first 5
+        for obj in result['objects'][:5]:  # Show first 5
             print(f"  - {obj['name']}: {obj['score']:.2%}")
         
         print("\n" + "=" * 70)
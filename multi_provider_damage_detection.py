@@ -20,11 +20,91 @@ Usage:
 """
 
 import os
-import json
+import time
+import numbers
+import threading
+from collections import defaultdict
+from functools import lru_cache, wraps
 from typing import Dict, List, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from disk_cache import JsonDiskCache, cache_key, file_digest
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+# Successful provider results are cached by image content, so re-running the
+# ensemble on the same photo (retries, trying other provider lists) costs no
+# API calls. Bump PROVIDER_CACHE_VERSION when result formats change.
+PROVIDER_CACHE_VERSION = 2
+PROVIDER_CACHE_DIR = os.environ.get(
+    'PROVIDER_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'damage_detect_providers')
+)
+PROVIDER_MEMO_SIZE = 128
+PROVIDER_CACHE_TTL = float(os.environ.get('PROVIDER_CACHE_TTL', str(7 * 24 * 3600)))  # Seconds; 0 = never expire
+PROVIDER_CACHE_MAX_ENTRIES = int(os.environ.get('PROVIDER_CACHE_MAX_ENTRIES', '1000'))  # Per provider
+
+
+@lru_cache(maxsize=None)
+def _provider_cache(provider: str) -> JsonDiskCache:
+    """The result cache for one provider, under PROVIDER_CACHE_DIR/<provider>."""
+    return JsonDiskCache(
+        os.path.join(PROVIDER_CACHE_DIR, provider),
+        ttl_seconds=PROVIDER_CACHE_TTL,
+        max_entries=PROVIDER_CACHE_MAX_ENTRIES,
+        memo_size=PROVIDER_MEMO_SIZE
+    )
+
+
+def _cached_provider(provider: str, skip_if: tuple = ()):
+    """
+    Cache a provider function's successful results in memory and under
+    PROVIDER_CACHE_DIR/<provider>/<key>.json (see disk_cache.JsonDiskCache).
+    The key covers the image bytes and the remaining arguments; entries
+    expire after PROVIDER_CACHE_TTL. Callers get a fresh copy each time,
+    since the ensemble annotates damage dicts in place.
+    
+    Calls that pass any keyword named in skip_if (e.g. extra image lists,
+    whose contents aren't part of the key) go straight to the provider.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(image_path: str, *args, use_cache: bool = True, **kwargs) -> Dict:
+            if not use_cache or not os.path.isfile(image_path) or any(kwargs.get(k) for k in skip_if):
+                return func(image_path, *args, **kwargs)
+            
+            cache = _provider_cache(provider)
+            key = cache_key(file_digest(image_path), PROVIDER_CACHE_VERSION, args, kwargs)
+            result = cache.get(key)
+            if result is not None:
+                annotated = result.get('annotated_path')
+                if not annotated or os.path.exists(annotated):
+                    return result
+            
+            result = func(image_path, *args, **kwargs)
+            if not result.get('success') or not cache.put(key, result):
+                return result
+            return cache.get(key) or result
+        return wrapper
+    return decorator
+
+
+@_cached_provider('openai')
 def analyze_with_openai(image_path: str, damage_hints: List = None) -> Dict:
     """Use OpenAI GPT-4o for damage detection."""
     try:
@@ -44,15 +124,18 @@ def analyze_with_openai(image_path: str, damage_hints: List = None) -> Dict:
         return {'success': False, 'provider': 'OpenAI', 'error': str(e), 'damages': []}
 
 
+@_cached_provider('roboflow')
 def analyze_with_roboflow(image_path: str, model_id: str = None) -> Dict:
     """Use Roboflow for damage detection."""
     try:
         from roboflow_damage_detection import detect_damage_roboflow
-        return detect_damage_roboflow(image_path, model_id=model_id or "car-damage-detection")
+        # Cached once, by the decorator, rather than also in roboflow_damage_detection's own cache
+        return detect_damage_roboflow(image_path, model_id=model_id or "car-damage-detection", use_cache=False)
     except Exception as e:
         return {'success': False, 'provider': 'Roboflow', 'error': str(e), 'damages': []}
 
 
+@_cached_provider('clarifai')
 def analyze_with_clarifai(image_path: str) -> Dict:
     """Use Clarifai for damage detection."""
     try:
@@ -62,11 +145,60 @@ def analyze_with_clarifai(image_path: str) -> Dict:
         return {'success': False, 'provider': 'Clarifai', 'error': str(e), 'damages': []}
 
 
-def analyze_with_google_vision(image_path: str) -> Dict:
-    """Use Google Cloud Vision for object detection."""
+@lru_cache(maxsize=1)
+def _get_google_vision_client(creds_path: str):
+    """Build the Vision client for a key file once; it keeps its channel and auth token alive."""
+    from google.cloud import vision
+    from google.oauth2 import service_account
+    
+    credentials = service_account.Credentials.from_service_account_file(creds_path)
+    return vision.ImageAnnotatorClient(credentials=credentials)
+
+
+# Vision accepts at most 16 images per batch_annotate_images request
+GOOGLE_VISION_MAX_BATCH = 16
+
+
+# Google objects whose name contains one of these are kept regardless of score
+_GOOGLE_DAMAGE_KEYWORDS = ('damage', 'dent', 'scratch', 'car', 'vehicle', 'bumper', 'fender', 'hood', 'door')
+
+
+def _google_vision_damages(response) -> List[Dict]:
+    """Turn one object_localization response into damage entries."""
+    damages = []
+    for obj in response.localized_object_annotations:
+        # Filter for vehicle-related and damage-related objects (cheap score test first)
+        if not obj.score > 0.7:
+            name = obj.name.lower()
+            if not any(kw in name for kw in _GOOGLE_DAMAGE_KEYWORDS):
+                continue
+        vertices = obj.bounding_poly.normalized_vertices
+        if len(vertices) >= 4:
+            damages.append({
+                'label': obj.name,
+                'confidence': obj.score * 100,
+                'extent': 'Moderate' if obj.score > 0.6 else 'Minor',
+                'box': {
+                    'x_percent': vertices[0].x * 100,
+                    'y_percent': vertices[0].y * 100,
+                    'width_percent': (vertices[2].x - vertices[0].x) * 100,
+                    'height_percent': (vertices[2].y - vertices[0].y) * 100
+                }
+            })
+    return damages
+
+
+@_cached_provider('google', skip_if=('images',))
+def analyze_with_google_vision(image_path: str, images: List[str] = None) -> Dict:
+    """
+    Use Google Cloud Vision for object detection.
+    
+    When `images` is given, all of them are sent in batch_annotate_images
+    requests (up to 16 per call) and every damage is tagged with its 'image'.
+    """
     try:
         from google.cloud import vision
-        from google.oauth2 import service_account
+        from google_vision_integration import prepare_image_bytes
         
         # Get credentials
         creds_path = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')
@@ -74,52 +206,136 @@ def analyze_with_google_vision(image_path: str) -> Dict:
             creds_path = os.path.join(os.path.dirname(__file__), 'google-vision-key.json')
         
         if os.path.exists(creds_path):
-            credentials = service_account.Credentials.from_service_account_file(creds_path)
-            client = vision.ImageAnnotatorClient(credentials=credentials)
+            client = _get_google_vision_client(creds_path)
         else:
             return {'success': False, 'provider': 'Google Vision', 'error': 'Credentials not found', 'damages': []}
         
-        # Read image
-        with open(image_path, 'rb') as f:
-            content = f.read()
+        if images:
+            features = [vision.Feature(type_=vision.Feature.Type.OBJECT_LOCALIZATION)]
+            damages = []
+            total_objects = 0
+            for start in range(0, len(images), GOOGLE_VISION_MAX_BATCH):
+                batch = images[start:start + GOOGLE_VISION_MAX_BATCH]
+                requests = []
+                for path in batch:
+                    image = vision.Image(content=prepare_image_bytes(path))
+                    requests.append(vision.AnnotateImageRequest(image=image, features=features))
+                
+                response = client.batch_annotate_images(requests=requests)
+                for path, image_response in zip(batch, response.responses):
+                    if image_response.error.message:
+                        raise Exception(f"Vision API error for {path}: {image_response.error.message}")
+                    total_objects += len(image_response.localized_object_annotations)
+                    for d in _google_vision_damages(image_response):
+                        d['image'] = path
+                        damages.append(d)
+            
+            return {
+                'success': True,
+                'provider': 'Google Cloud Vision',
+                'damages': damages,
+                'total_objects': total_objects,
+                'images': len(images)
+            }
         
-        image = vision.Image(content=content)
+        # Read image (downscaled; object boxes are normalized so resolution doesn't matter)
+        image = vision.Image(content=prepare_image_bytes(image_path))
         
         # Detect objects
         response = client.object_localization(image=image)
-        objects = response.localized_object_annotations
-        
-        # Filter for vehicle-related and damage-related objects
-        damage_keywords = ['damage', 'dent', 'scratch', 'car', 'vehicle', 'bumper', 'fender', 'hood', 'door']
-        
-        damages = []
-        for obj in objects:
-            if any(kw in obj.name.lower() for kw in damage_keywords) or obj.score > 0.7:
-                vertices = obj.bounding_poly.normalized_vertices
-                if len(vertices) >= 4:
-                    damages.append({
-                        'label': obj.name,
-                        'confidence': obj.score * 100,
-                        'extent': 'Moderate' if obj.score > 0.6 else 'Minor',
-                        'box': {
-                            'x_percent': vertices[0].x * 100,
-                            'y_percent': vertices[0].y * 100,
-                            'width_percent': (vertices[2].x - vertices[0].x) * 100,
-                            'height_percent': (vertices[2].y - vertices[0].y) * 100
-                        }
-                    })
         
         return {
             'success': True,
             'provider': 'Google Cloud Vision',
-            'damages': damages,
-            'total_objects': len(objects)
+            'damages': _google_vision_damages(response),
+            'total_objects': len(response.localized_object_annotations)
         }
         
     except Exception as e:
         return {'success': False, 'provider': 'Google Vision', 'error': str(e), 'damages': []}
 
 
+# Provider calls from every ensemble run share one long-lived thread pool
+PROVIDER_MAX_WORKERS = int(os.environ.get('PROVIDER_MAX_WORKERS', '16'))
+
+# Cap on in-flight requests to any single provider, across all callers, so
+# large photo sets stay within each API's rate limits; extra calls wait
+PROVIDER_MAX_CONCURRENT = int(os.environ.get('PROVIDER_MAX_CONCURRENT', '10'))
+_PROVIDER_SEMAPHORES = {
+    p: threading.BoundedSemaphore(PROVIDER_MAX_CONCURRENT) for p in ('openai', 'roboflow', 'clarifai', 'google')
+}
+
+# Parallel providers start this many seconds apart, so one provider's image
+# encoding overlaps another's upload instead of all of them hitting the
+# network at the same instant
+PROVIDER_START_STAGGER = float(os.environ.get('PROVIDER_START_STAGGER', '0.05'))
+
+_EXECUTOR_LOCK = threading.Lock()
+_PROVIDER_EXECUTOR = None
+
+
+def _get_provider_executor() -> ThreadPoolExecutor:
+    global _PROVIDER_EXECUTOR
+    if _PROVIDER_EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _PROVIDER_EXECUTOR is None:
+                _PROVIDER_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=PROVIDER_MAX_WORKERS, thread_name_prefix='damage-provider'
+                )
+    return _PROVIDER_EXECUTOR
+
+
+def _provider_call(provider: str, image_path: str, damage_hints: List = None):
+    """Return a zero-argument callable running one provider on one image, or None if unknown."""
+    provider_funcs = {
+        'openai': lambda: analyze_with_openai(image_path, damage_hints),
+        'roboflow': lambda: analyze_with_roboflow(image_path),
+        'clarifai': lambda: analyze_with_clarifai(image_path),
+        'google': lambda: analyze_with_google_vision(image_path)
+    }
+    func = provider_funcs.get(provider)
+    if func is None:
+        return None
+    
+    def run():
+        with _PROVIDER_SEMAPHORES[provider]:
+            return func()
+    return run
+
+
+def _staggered(call, delay: float):
+    """Wrap a provider call so it starts after `delay` seconds."""
+    if delay <= 0:
+        return call
+    
+    def run():
+        time.sleep(delay)
+        return call()
+    return run
+
+
+def _add_provider_result(results: Dict, all_damages: List, provider: str, result: Dict):
+    results[provider] = result
+    if result.get('success') and result.get('damages'):
+        for d in result['damages']:
+            d['source_provider'] = provider
+            all_damages.append(d)
+
+
+def _ensemble_result(results: Dict, all_damages: List) -> Dict:
+    # Combine and deduplicate damages (simple approach)
+    combined_damages = merge_overlapping_damages(all_damages)
+    
+    return {
+        'success': any(r.get('success') for r in results.values()),
+        'providers_used': list(results.keys()),
+        'provider_results': results,
+        'combined_damages': combined_damages,
+        'total_damages': len(combined_damages),
+        'all_damages_raw': all_damages
+    }
+
+
 def analyze_with_multiple_providers(
     image_path: str,
     providers: List[str] = None,
@@ -141,56 +357,69 @@ def analyze_with_multiple_providers(
     if providers is None:
         providers = ['openai']  # Default to OpenAI only
     
-    provider_funcs = {
-        'openai': lambda: analyze_with_openai(image_path, damage_hints),
-        'roboflow': lambda: analyze_with_roboflow(image_path),
-        'clarifai': lambda: analyze_with_clarifai(image_path),
-        'google': lambda: analyze_with_google_vision(image_path)
-    }
-    
     results = {}
     all_damages = []
     
     if parallel and len(providers) > 1:
         # Run in parallel
-        with ThreadPoolExecutor(max_workers=len(providers)) as executor:
-            futures = {
-                executor.submit(provider_funcs[p]): p 
-                for p in providers if p in provider_funcs
-            }
-            for future in as_completed(futures):
-                provider = futures[future]
-                try:
-                    result = future.result()
-                    results[provider] = result
-                    if result.get('success') and result.get('damages'):
-                        for d in result['damages']:
-                            d['source_provider'] = provider
-                            all_damages.append(d)
-                except Exception as e:
-                    results[provider] = {'success': False, 'error': str(e)}
+        executor = _get_provider_executor()
+        futures = {}
+        for p in providers:
+            call = _provider_call(p, image_path, damage_hints)
+            if call is not None:
+                futures[executor.submit(_staggered(call, len(futures) * PROVIDER_START_STAGGER))] = p
+        for future in as_completed(futures):
+            provider = futures[future]
+            try:
+                _add_provider_result(results, all_damages, provider, future.result())
+            except Exception as e:
+                results[provider] = {'success': False, 'error': str(e)}
     else:
         # Run sequentially
         for provider in providers:
-            if provider in provider_funcs:
-                result = provider_funcs[provider]()
-                results[provider] = result
-                if result.get('success') and result.get('damages'):
-                    for d in result['damages']:
-                        d['source_provider'] = provider
-                        all_damages.append(d)
+            call = _provider_call(provider, image_path, damage_hints)
+            if call is not None:
+                _add_provider_result(results, all_damages, provider, call())
     
-    # Combine and deduplicate damages (simple approach)
-    combined_damages = merge_overlapping_damages(all_damages)
+    return _ensemble_result(results, all_damages)
+
+
+def analyze_images_with_multiple_providers(
+    image_paths: List[str],
+    providers: List[str] = None,
+    damage_hints: List = None
+) -> List[Dict]:
+    """
+    Run the provider ensemble over several images at once.
     
-    return {
-        'success': any(r.get('success') for r in results.values()),
-        'providers_used': list(results.keys()),
-        'provider_results': results,
-        'combined_damages': combined_damages,
-        'total_damages': len(combined_damages),
-        'all_damages_raw': all_damages
-    }
+    Every (image, provider) call goes onto the shared provider pool together,
+    so a photo set keeps up to PROVIDER_MAX_WORKERS requests in flight instead
+    of waiting for each image's ensemble to finish before starting the next.
+    
+    Returns:
+        One analyze_with_multiple_providers result per image, in input order
+    """
+    if providers is None:
+        providers = ['openai']  # Default to OpenAI only
+    
+    executor = _get_provider_executor()
+    results = [{} for _ in image_paths]
+    all_damages = [[] for _ in image_paths]
+    futures = {}
+    for i, image_path in enumerate(image_paths):
+        for slot, p in enumerate(providers):
+            call = _provider_call(p, image_path, damage_hints)
+            if call is not None:
+                futures[executor.submit(_staggered(call, slot * PROVIDER_START_STAGGER))] = (i, p)
+    
+    for future in as_completed(futures):
+        i, provider = futures[future]
+        try:
+            _add_provider_result(results[i], all_damages[i], provider, future.result())
+        except Exception as e:
+            results[i][provider] = {'success': False, 'error': str(e)}
+    
+    return [_ensemble_result(r, d) for r, d in zip(results, all_damages)]
 
 
 def merge_overlapping_damages(damages: List[Dict], iou_threshold: float = 0.3) -> List[Dict]:
@@ -212,18 +441,48 @@ def merge_overlapping_damages(damages: List[Dict], iou_threshold: float = 0.3) -
     merged = []
     used = set()
     
+    if NUMBA_AVAILABLE and len(damages) >= MERGE_NUMPY_MIN_DAMAGES:
+        # Compiled greedy pass; no N x N intermediates, so it scales to video-length lists
+        coords, valid = _pack_boxes(damages)
+        members = defaultdict(list)
+        for j, first in enumerate(_greedy_overlap_groups(coords, valid, float(iou_threshold)).tolist()):
+            if first != j:
+                members[first].append(j)
+        
+        def matches(i):
+            return members.get(i, [])
+    elif NUMPY_AVAILABLE and MERGE_NUMPY_MIN_DAMAGES <= len(damages) <= MERGE_DENSE_MAX_DAMAGES:
+        # All pairwise IoUs in one vectorized pass; the N x N matrices are
+        # only affordable for moderate N, longer lists use the grid below
+        overlaps = _overlap_matrix(*_pack_boxes(damages), iou_threshold)
+        
+        def matches(i):
+            return [j for j in (np.flatnonzero(overlaps[i, i + 1:]) + i + 1).tolist() if j not in used]
+    else:
+        # Bucket boxes into a coarse grid so each damage is only compared with
+        # the ones sharing a cell, instead of with every other damage
+        grid = defaultdict(list)
+        cells = []
+        for i, d in enumerate(damages):
+            box_cells = _grid_cells(d.get('box', {}))
+            cells.append(box_cells)
+            for cell in box_cells:
+                grid[cell].append(i)
+        
+        def matches(i):
+            box = damages[i].get('box', {})
+            candidates = sorted({j for cell in cells[i] for j in grid[cell] if j > i and j not in used})
+            return [j for j in candidates if boxes_overlap(box, damages[j].get('box', {}), iou_threshold)]
+    
     for i, d1 in enumerate(damages):
         if i in used:
             continue
         
         # Find similar damages
         similar = [d1]
-        for j, d2 in enumerate(damages[i+1:], start=i+1):
-            if j in used:
-                continue
-            if boxes_overlap(d1.get('box', {}), d2.get('box', {}), iou_threshold):
-                similar.append(d2)
-                used.add(j)
+        for j in matches(i):
+            similar.append(damages[j])
+            used.add(j)
         
         # Merge similar damages
         if len(similar) > 1:
@@ -251,6 +510,124 @@ def merge_overlapping_damages(damages: List[Dict], iou_threshold: float = 0.3) -
     return merged
 
 
+# Grid used by merge_overlapping_damages; coordinates are percentages
+MERGE_GRID_CELL = 10.0
+MERGE_GRID_SIZE = 10
+
+# Below this many damages the grid is cheaper than building NumPy arrays
+# (or calling the Numba kernel, when numba is installed)
+MERGE_NUMPY_MIN_DAMAGES = 32
+# Above this many the dense N x N float64 matrices (several MB at 512) cost
+# more memory than they save time, so the grid is used again
+MERGE_DENSE_MAX_DAMAGES = 512
+
+
+def _pack_boxes(damages: List[Dict]):
+    """
+    Pack damage boxes into an (N, 5) float64 array of [x1, y1, x2, y2, area]
+    plus a validity mask. Boxes that aren't dicts of finite numbers are
+    invalid and never overlap anything, matching boxes_overlap.
+    """
+    rows = []
+    valid = []
+    for d in damages:
+        box = d.get('box', {})
+        try:
+            if not box or not isinstance(box, dict):
+                raise TypeError
+            x1, y1 = box.get('x_percent', 0), box.get('y_percent', 0)
+            w, h = box.get('width_percent', 0), box.get('height_percent', 0)
+            if not all(isinstance(v, numbers.Real) for v in (x1, y1, w, h)):
+                raise TypeError
+            rows.append((x1, y1, x1 + w, y1 + h, w * h))
+            valid.append(True)
+        except TypeError:
+            rows.append((0.0, 0.0, 0.0, 0.0, 0.0))
+            valid.append(False)
+    
+    coords = np.array(rows, dtype=np.float64)
+    return coords, np.array(valid) & np.isfinite(coords).all(axis=1)
+
+
+def _greedy_overlap_groups(coords, valid, threshold):
+    """
+    The greedy grouping of merge_overlapping_damages as a scalar loop for
+    Numba: returns, for every box, the index of the box whose group it joined.
+    """
+    n = coords.shape[0]
+    group = np.full(n, -1, dtype=np.int64)
+    for i in range(n):
+        if group[i] != -1:
+            continue
+        group[i] = i
+        if not valid[i]:
+            continue
+        for j in range(i + 1, n):
+            if group[j] != -1 or not valid[j]:
+                continue
+            x_left = max(coords[i, 0], coords[j, 0])
+            y_top = max(coords[i, 1], coords[j, 1])
+            x_right = min(coords[i, 2], coords[j, 2])
+            y_bottom = min(coords[i, 3], coords[j, 3])
+            if x_right < x_left or y_bottom < y_top:
+                continue
+            intersection = (x_right - x_left) * (y_bottom - y_top)
+            union = coords[i, 4] + coords[j, 4] - intersection
+            if union > 0 and intersection / union > threshold:
+                group[j] = i
+    return group
+
+
+if NUMBA_AVAILABLE:
+    _greedy_overlap_groups = njit(cache=True)(_greedy_overlap_groups)
+
+
+def _overlap_matrix(coords, valid, threshold: float):
+    """
+    Boolean N x N matrix of boxes_overlap results for every pair of packed
+    boxes, computed with NumPy broadcasting.
+    """
+    x1, y1, x2, y2, area = coords.T
+    
+    x_left = np.maximum.outer(x1, x1)
+    y_top = np.maximum.outer(y1, y1)
+    x_right = np.minimum.outer(x2, x2)
+    y_bottom = np.minimum.outer(y2, y2)
+    
+    intersection = (x_right - x_left) * (y_bottom - y_top)
+    union = area[:, None] + area[None, :] - intersection
+    with np.errstate(divide='ignore', invalid='ignore'):
+        iou = intersection / union
+    
+    return (
+        (x_right >= x_left) & (y_bottom >= y_top) & (union > 0) & (iou > threshold)
+        & valid[:, None] & valid[None, :]
+    )
+
+
+def _grid_cells(box: Dict) -> List[tuple]:
+    """
+    Grid cells touched by a percent-coordinate box. Cell indices are clamped
+    to the grid, so two boxes that intersect anywhere always share a cell.
+    Boxes that boxes_overlap can never match (missing, malformed, negative size)
+    get no cells.
+    """
+    if not box or not isinstance(box, dict):
+        return []
+    try:
+        x1, y1 = box.get('x_percent', 0), box.get('y_percent', 0)
+        x2 = x1 + box.get('width_percent', 0)
+        y2 = y1 + box.get('height_percent', 0)
+        if not (x1 <= x2 and y1 <= y2):
+            return []
+        last = MERGE_GRID_SIZE - 1
+        cx1, cx2 = (min(max(int(v // MERGE_GRID_CELL), 0), last) for v in (x1, x2))
+        cy1, cy2 = (min(max(int(v // MERGE_GRID_CELL), 0), last) for v in (y1, y2))
+    except (TypeError, ValueError, OverflowError):
+        return []
+    return [(cx, cy) for cx in range(cx1, cx2 + 1) for cy in range(cy1, cy2 + 1)]
+
+
 def boxes_overlap(box1: Dict, box2: Dict, threshold: float = 0.3) -> bool:
     """Check if two bounding boxes overlap significantly."""
     if not box1 or not box2:
@@ -325,8 +702,15 @@ AVAILABLE_PROVIDERS = {
 }
 
 
+@lru_cache(maxsize=1)
 def check_provider_availability() -> Dict:
-    """Check which providers are configured and available."""
+    """
+    Check which providers are configured and available.
+    
+    The status is computed once per process and the same dict is returned
+    afterwards; call check_provider_availability.cache_clear() after changing
+    provider environment variables.
+    """
     status = {}
     for provider, info in AVAILABLE_PROVIDERS.items():
         env_var = info['env_var']
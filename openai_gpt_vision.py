@@ -15,25 +15,69 @@ Author: Insurance AI Solutions
 Version: 2.0
 """
 
-from openai import OpenAI
 import base64
 import os
 import sys
 import argparse
 import tempfile
+import re
 import json
+import time
+import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
+from disk_cache import JsonDiskCache, cache_key
+
+# pybase64 encodes with SIMD, several times faster than stdlib base64 on image-sized payloads
+try:
+    import pybase64
+    _b64encode_str = pybase64.b64encode_as_string
+except ImportError:
+    def _b64encode_str(content):
+        return base64.b64encode(content).decode('utf-8')
+
+# orjson parses faster; fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Try to import video processing libraries
 try:
     import cv2
+    import numpy as np
     VIDEO_SUPPORT = True
 except ImportError:
     VIDEO_SUPPORT = False
     print("Warning: cv2 (opencv-python) not installed. Video support disabled.")
     print("Install with: pip install opencv-python")
 
+# Optional libjpeg-turbo binding for saving annotated images; needs the native library too
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    _turbo_jpeg = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except (ImportError, OSError, RuntimeError):
+    TURBOJPEG_AVAILABLE = False
+
+# Optional FFmpeg-backed reader: decodes sampled frames in one multi-threaded batch
+try:
+    import decord
+    DECORD_AVAILABLE = True
+except ImportError:
+    DECORD_AVAILABLE = False
+
+# ffmpeg binary: sampled frames can be piped out as JPEG without OpenCV decoding them
+FFMPEG_BINARY = shutil.which(os.environ.get('FFMPEG_BINARY', 'ffmpeg'))
+FFMPEG_AVAILABLE = FFMPEG_BINARY is not None
+
 # Import tkinter for file picker
 try:
     import tkinter as tk
@@ -42,15 +86,14 @@ try:
 except ImportError:
     FILE_PICKER_AVAILABLE = False
 
-# Load API key from environment variable only (security best practice)
-api_key = os.getenv("OPENAI_API_KEY")
+def _load_api_key():
+    """Read the API key from the environment only (security best practice)."""
+    # Strip any whitespace or newlines from the API key (common copy-paste issue)
+    return os.getenv("OPENAI_API_KEY", "").strip()
 
-# Strip any whitespace or newlines from the API key (common copy-paste issue)
-if api_key:
-    api_key = api_key.strip()
 
-# Require API key to be set via environment variable
-if not api_key:
+def _print_missing_api_key():
+    """Explain how to set the API key."""
     print("=" * 70)
     print("ERROR: OpenAI API key not found!")
     print("=" * 70)
@@ -60,18 +103,46 @@ if not api_key:
     print("  Linux/Mac: export OPENAI_API_KEY=\"your-api-key-here\"")
     print("\nGet your API key from: https://platform.openai.com/api-keys")
     print("=" * 70)
-    sys.exit(1)
 
-# Validate API key format
-if not api_key.startswith("sk-"):
-    print("Warning: API key format may be incorrect. OpenAI API keys typically start with 'sk-'")
 
-# Initialize OpenAI client
-try:
-    client = OpenAI(api_key=api_key)
-except Exception as e:
-    print(f"Error initializing OpenAI client: {str(e)}")
-    sys.exit(1)
+@lru_cache(maxsize=1)
+def get_client():
+    """
+    Create the OpenAI client on first use.
+    
+    Importing this module needs no API key (or the SDK's HTTP stack), so
+    helpers like draw_damage_boxes and worker processes can use it freely.
+    
+    The client shares one keep-alive connection pool (HTTP/2 if h2 is
+    installed) across all threads, so concurrent frame requests reuse TLS
+    sessions. Rate-limit and 5xx responses are retried by the SDK with
+    exponential backoff; failed connects are also retried at the transport.
+    """
+    import httpx
+    from openai import OpenAI
+    
+    api_key = _load_api_key()
+    if not api_key:
+        raise RuntimeError("OpenAI API key not found. Set the OPENAI_API_KEY environment variable.")
+    
+    # Validate API key format
+    if not api_key.startswith("sk-"):
+        print("Warning: API key format may be incorrect. OpenAI API keys typically start with 'sk-'")
+    
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    
+    http_client = httpx.Client(
+        transport=httpx.HTTPTransport(retries=3, http2=http2),
+        limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS),
+        timeout=httpx.Timeout(600.0, connect=5.0),  # The SDK's default timeout
+        follow_redirects=True
+    )
+    return OpenAI(api_key=api_key, http_client=http_client, max_retries=OPENAI_MAX_RETRIES)
+
 
 # Model Configuration
 # Available models for vision tasks (in order of capability):
@@ -86,10 +157,29 @@ except Exception as e:
 # You can change this to try different models
 GPT_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o')  # Default to latest gpt-4o
 IMAGE_DETAIL = "high"  # Use high detail for better damage detection accuracy
+IMAGE_MAX_EDGE = {'high': 2048, 'low': 768}  # Longest side sent per detail level (larger is resized server-side anyway)
+UPLOAD_JPEG_QUALITY = 85
 MAX_TOKENS_BOXES = 4000  # Increased for multiple damage descriptions
 MAX_TOKENS_REPORT = 2000  # Increased to handle multiple damages
+MAX_TOKENS_COMBINED = MAX_TOKENS_BOXES + MAX_TOKENS_REPORT  # Fused boxes + report reply
 TEMPERATURE = 0.1  # Low temperature for consistent, precise results
 TOP_P = 0.95  # Nucleus sampling for better quality
+# Responses are cached on disk by request content; bump GPT_CACHE_VERSION when prompts change meaningfully
+GPT_RESPONSE_CACHE = os.environ.get('OPENAI_RESPONSE_CACHE', '1') != '0'
+GPT_CACHE_VERSION = 2
+GPT_CACHE_DIR = os.environ.get(
+    'OPENAI_RESPONSE_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'damage_detect_openai')
+)
+GPT_CACHE_TTL = float(os.environ.get('OPENAI_RESPONSE_CACHE_TTL', str(7 * 24 * 3600)))  # Seconds; 0 = never expire
+GPT_CACHE_MAX_ENTRIES = int(os.environ.get('OPENAI_RESPONSE_CACHE_MAX_ENTRIES', '1000'))
+OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', '5'))  # SDK retries (backoff) on rate limits / 5xx
+OPENAI_MAX_CONNECTIONS = int(os.environ.get('OPENAI_MAX_CONNECTIONS', '20'))  # Keep-alive pool size
+MAX_PARALLEL_FRAMES = int(os.environ.get('OPENAI_MAX_PARALLEL_FRAMES', '5'))  # Concurrent requests in multi-frame mode
+MULTI_FRAME_BATCH = os.environ.get('OPENAI_BATCH_FRAMES', '1') != '0'  # Send all sampled frames in one request
+ENCODE_WORKERS = int(os.environ.get('OPENAI_ENCODE_WORKERS', str(min(8, os.cpu_count() or 1))))  # Threads resizing/base64-encoding uploads
+FRAME_DEDUP_DISTANCE = int(os.environ.get('FRAME_DEDUP_DISTANCE', '8'))  # Skip frames within this pHash Hamming distance (0 disables)
+VIDEO_DECODE_THREADS = int(os.environ.get('VIDEO_DECODE_THREADS', '4'))  # decord decoder threads
 
 print(f"[OpenAI] Using model: {GPT_MODEL}")
 
@@ -250,108 +340,301 @@ IMPORTANT:
 - For linear damage (scratches, cracks), ensure the box spans the full length PLUS side margins
 - For area damage (dents, paint chips), ensure the box covers the complete affected region PLUS surrounding buffer"""
 
+# Appended to the bounding-box prompt so one request returns both the boxes and
+# the written report, instead of sending the same image a second time
+COMBINED_REPORT_PROMPT = """
+
+ADDITIONALLY: add a top-level "report" string to the same JSON object containing
+your written assessment of the image, formatted EXACTLY like this:
+
+DAMAGE FOUND: [Yes/No]
+---
+DAMAGE 1:
+- Location: [specific location on vehicle]
+- Type: [type of damage]
+- Extent: [Minor/Moderate/Severe]
+---
+(one block per damage, in the same order as the "damages" array)
+
+If NO damage is found, the report must simply state:
+NO DAMAGE DETECTED - Vehicle appears to be in good condition.
+
+The final JSON object therefore has the form: {"damages": [...], "report": "..."}"""
 
-def extract_video_frames(video_path, num_frames=5):
+# Appended to the report prompt when several video frames are sent in one request
+MULTI_FRAME_REPORT_PROMPT = """
+
+You are given {num_frames} frames from the same video, in order. Assess EACH frame
+separately using the format above (frames may show the same damage from different
+angles - report what is visible in each frame). Return a JSON object with one
+report string per frame, in frame order:
+
+{{"frames": [{{"report": "..."}}, ...]}}"""
+
+
+@contextmanager
+def _open_video(video_path):
+    """Open a VideoCapture for video_path and release it when the block exits."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        yield cap
+    finally:
+        # Releasing promptly closes the file handle, so the caller can delete an upload right away
+        cap.release()
+
+
+def _sample_frame_positions(total_frames, num_frames):
+    """Evenly spaced frame indices to sample, in ascending order."""
+    interval = max(1, total_frames // num_frames)
+    return [i * interval for i in range(num_frames) if i * interval < total_frames]
+
+
+def _decord_video_frames(video_path, num_frames):
+    """Decode the sampled frames with decord in a single batch; returns JPEG bytes."""
+    vr = decord.VideoReader(video_path, num_threads=VIDEO_DECODE_THREADS)
+    positions = _sample_frame_positions(len(vr), num_frames)
+    if not positions:
+        return []
+    
+    frames = []
+    for rgb in vr.get_batch(positions).asnumpy():
+        ok, buf = cv2.imencode('.jpg', cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+        if ok:
+            frames.append(buf.tobytes())
+    return frames
+
+
+def _split_jpeg_stream(data):
+    """Split concatenated JPEG images on their SOI/EOI markers."""
+    frames = []
+    start = data.find(b'\xff\xd8')
+    while start != -1:
+        end = data.find(b'\xff\xd9', start + 2)
+        if end == -1:
+            break
+        frames.append(data[start:end + 2])
+        start = data.find(b'\xff\xd8', end + 2)
+    return frames
+
+
+def _ffmpeg_sample_jpegs(video_path, num_frames):
+    """Have ffmpeg select the sampled frames and pipe them out as MJPEG; returns JPEG bytes."""
+    with _open_video(video_path) as cap:
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    positions = _sample_frame_positions(total_frames, num_frames)
+    if not positions:
+        return []
+    
+    select = '+'.join(f'eq(n\\,{pos})' for pos in positions)
+    cmd = [
+        FFMPEG_BINARY, '-nostdin', '-loglevel', 'error', '-i', video_path,
+        '-vf', f'select={select}', '-vsync', '0', '-frames:v', str(len(positions)),
+        '-f', 'image2pipe', '-vcodec', 'mjpeg', '-q:v', '3', '-'
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+    return _split_jpeg_stream(proc.stdout)
+
+
+def _frame_phash(jpeg_bytes):
+    """64-bit DCT perceptual hash of a JPEG frame, or None if it cannot be decoded."""
+    gray = cv2.imdecode(np.frombuffer(jpeg_bytes, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low)
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def dedupe_frames(frames, max_distance=None):
+    """
+    Drop frames that look like an already-kept frame.
+    
+    Inspection videos are often of a parked vehicle, so evenly sampled frames
+    are frequently near-identical; each one kept costs a full image in the
+    request. Frames are compared by perceptual hash and skipped when within
+    max_distance bits (default FRAME_DEDUP_DISTANCE) of a kept frame.
+    """
+    if max_distance is None:
+        max_distance = FRAME_DEDUP_DISTANCE
+    if max_distance <= 0 or len(frames) < 2:
+        return list(frames)
+    
+    kept, kept_hashes = [], []
+    for frame in frames:
+        frame_hash = _frame_phash(frame)
+        if frame_hash is not None and any((frame_hash ^ h).bit_count() < max_distance for h in kept_hashes):
+            continue
+        kept.append(frame)
+        if frame_hash is not None:
+            kept_hashes.append(frame_hash)
+    return kept
+
+
+def extract_video_frames(video_path, num_frames=5, log=print):
     """
     Extract multiple frames from a video for comprehensive analysis.
     
     Args:
         video_path (str): Path to the video file
         num_frames (int): Number of frames to extract
+        log: Called with each progress/error message (default print)
         
     Returns:
-        list: List of paths to extracted frame images
+        list: List of JPEG-encoded frames (bytes), kept in memory
     """
     if not VIDEO_SUPPORT:
         return []
     
+    if DECORD_AVAILABLE:
+        try:
+            return _decord_video_frames(video_path, num_frames)
+        except Exception as e:
+            log(f"decord could not read video, falling back to OpenCV: {str(e)}")
+    elif FFMPEG_AVAILABLE:
+        try:
+            frames = _ffmpeg_sample_jpegs(video_path, num_frames)
+            if frames:
+                return frames
+        except Exception as e:
+            log(f"ffmpeg could not read video, falling back to OpenCV: {str(e)}")
+    
     frames = []
     try:
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            return []
-        
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        if total_frames == 0:
-            return []
-        
-        # Calculate frame intervals
-        interval = max(1, total_frames // num_frames)
-        frame_positions = [i * interval for i in range(num_frames)]
-        
-        for pos in frame_positions:
-            if pos >= total_frames:
-                break
-            cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
-            ret, frame = cap.read()
-            if ret:
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-                temp_path = temp_file.name
-                temp_file.close()
-                cv2.imwrite(temp_path, frame)
-                frames.append(temp_path)
+        with _open_video(video_path) as cap:
+            if not cap.isOpened():
+                return []
+            
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if total_frames <= 0:
+                return []
+            
+            frame_positions = set(_sample_frame_positions(total_frames, num_frames))
+            
+            # Walk the stream once: grab() advances without converting the frame,
+            # and only the sampled positions are retrieved. Seeking to each position
+            # instead makes most codecs re-decode from the previous keyframe.
+            last_position = max(frame_positions)
+            pos = 0
+            while pos <= last_position and cap.grab():
+                if pos in frame_positions:
+                    ret, frame = cap.retrieve()
+                    if ret:
+                        ok, buf = cv2.imencode('.jpg', frame)
+                        if ok:
+                            frames.append(buf.tobytes())
+                pos += 1
         
-        cap.release()
         return frames
         
     except Exception as e:
-        print(f"Error extracting video frames: {str(e)}")
+        log(f"Error extracting video frames: {str(e)}")
         return []
 
 
-def extract_single_frame(video_path, frame_number=0):
-    """Extract a single frame from a video file."""
+def extract_single_frame(video_path, frame_number=0, log=print):
+    """Extract a single frame from a video file as JPEG bytes; errors are reported through log."""
     if not VIDEO_SUPPORT:
         return None
     
     try:
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            return None
-        
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        if frame_number >= total_frames:
-            frame_number = 0
-        
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, frame = cap.read()
-        cap.release()
+        with _open_video(video_path) as cap:
+            if not cap.isOpened():
+                return None
+            
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if frame_number >= total_frames:
+                frame_number = 0
+            
+            if frame_number:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ret, frame = cap.read()
         
         if not ret:
             return None
         
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-        temp_path = temp_file.name
-        temp_file.close()
-        cv2.imwrite(temp_path, frame)
-        return temp_path
+        ok, buf = cv2.imencode('.jpg', frame)
+        return buf.tobytes() if ok else None
         
     except Exception as e:
-        print(f"Error extracting video frame: {str(e)}")
+        log(f"Error extracting video frame: {str(e)}")
         return None
 
 
 def encode_image(image_path):
     """Load and encode an image to base64."""
     with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+        return encode_image_bytes(image_file.read())
+
+
+def encode_image_bytes(content):
+    """Encode already-loaded image bytes to base64."""
+    return _b64encode_str(content)
+
+
+def encode_image_for_upload(image_path, detail=None, image_bytes=None):
+    """
+    Encode an image for a vision request, downscaled first.
+    
+    OpenAI resizes images server-side to fit the detail level anyway, so
+    anything larger than IMAGE_MAX_EDGE[detail] only costs upload time.
+    Boxes are requested in percentages, so no coordinates need rescaling.
+    If image_bytes is given (e.g. an extracted video frame), it is used
+    instead of reading image_path and is treated as JPEG.
+    
+    Returns:
+        Tuple of (base64_data, mime_type)
+    """
+    image_data, mime_type, _ = _encode_image_for_upload(image_path, detail, image_bytes)
+    return image_data, mime_type
+
+
+def _encode_image_for_upload(image_path, detail=None, image_bytes=None):
+    """
+    encode_image_for_upload that also returns the full-size decoded BGR image
+    (None without OpenCV or if undecodable), so annotation needn't decode again.
+    """
+    max_edge = IMAGE_MAX_EDGE.get(detail or IMAGE_DETAIL, IMAGE_MAX_EDGE['high'])
+    if image_bytes is not None:
+        content = image_bytes
+        mime_type = 'image/jpeg'
+    else:
+        with open(image_path, "rb") as image_file:
+            content = image_file.read()
+        mime_type = get_mime_type(image_path)
+    
+    decoded = None
+    if VIDEO_SUPPORT:
+        decoded = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if decoded is not None:
+            img = decoded
+            height, width = img.shape[:2]
+            scale = max_edge / max(height, width)
+            if scale < 1:
+                img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+            ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, UPLOAD_JPEG_QUALITY])
+            if ok and encoded.nbytes < len(content):
+                return encode_image_bytes(encoded), 'image/jpeg', decoded
+    
+    return encode_image_bytes(content), mime_type, decoded
+
+
+_MIME_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.webp': 'image/webp'
+}
 
 
 def get_mime_type(file_path):
     """Determine the MIME type based on file extension."""
-    ext = Path(file_path).suffix.lower()
-    mime_types = {
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.png': 'image/png',
-        '.gif': 'image/gif',
-        '.bmp': 'image/bmp',
-        '.webp': 'image/webp'
-    }
-    return mime_types.get(ext, 'image/jpeg')
+    return _MIME_TYPES.get(os.path.splitext(file_path)[1].lower(), 'image/jpeg')
 
 
-def analyze_vehicle_damage(file_path, is_video=False, multi_frame=False, damage_hints=None):
+def analyze_vehicle_damage(file_path, is_video=False, multi_frame=False, damage_hints=None, log=print):
     """
     Analyze a vehicle image or video for damage assessment.
     
@@ -361,6 +644,8 @@ def analyze_vehicle_damage(file_path, is_video=False, multi_frame=False, damage_
         multi_frame (bool): For videos, analyze multiple frames
         damage_hints (list): Optional list of damaged parts/areas from estimation document.
                             If provided, helps guide the model to focus on these specific areas.
+        log: Called with each progress message (default print); concurrent
+             callers can collect them per file instead
         
     Returns:
         Tuple of (report_text, annotated_image_path, damages_list)
@@ -368,55 +653,66 @@ def analyze_vehicle_damage(file_path, is_video=False, multi_frame=False, damage_
     if not os.path.exists(file_path):
         return f"Error: File '{file_path}' not found.", None, []
     
-    temp_frames = []
     annotated_path = None
     
     if damage_hints:
-        print(f"[Damage Detection] Received {len(damage_hints)} damage hints from estimation document")
+        log(f"[Damage Detection] Received {len(damage_hints)} damage hints from estimation document")
     
-    try:
-        if is_video:
-            if not VIDEO_SUPPORT:
-                return "Error: Video support not available. Install opencv-python: pip install opencv-python", None, []
+    if is_video:
+        if not VIDEO_SUPPORT:
+            return "Error: Video support not available. Install opencv-python: pip install opencv-python", None, []
+        
+        if multi_frame:
+            log("Extracting multiple frames from video for comprehensive analysis...")
+            frames = extract_video_frames(file_path, num_frames=5, log=log)
+            if not frames:
+                return "Error: Could not extract frames from video.", None, []
             
-            if multi_frame:
-                print("Extracting multiple frames from video for comprehensive analysis...")
-                temp_frames = extract_video_frames(file_path, num_frames=5)
-                if not temp_frames:
-                    return "Error: Could not extract frames from video.", None, []
-                
-                # Analyze multiple frames and combine results
-                all_analyses = []
-                for i, frame_path in enumerate(temp_frames):
-                    print(f"  Analyzing frame {i+1}/{len(temp_frames)}...")
-                    analysis, _, _ = _analyze_single_image(frame_path, highlight_damage=False, damage_hints=damage_hints)
-                    all_analyses.append(f"### Frame {i+1} Analysis:\n{analysis}")
-                
-                combined = "\n\n" + "="*70 + "\n\n".join(all_analyses)
-                return f"MULTI-FRAME VIDEO ANALYSIS\n{'='*70}\n{combined}", None, []
-            else:
-                print("Extracting frame from video...")
-                frame_path = extract_single_frame(file_path, 0)
-                if not frame_path:
-                    return "Error: Could not extract frame from video.", None, []
-                temp_frames.append(frame_path)
-                report, annotated_path, damages_list = _analyze_single_image(frame_path, damage_hints=damage_hints)
-                return report, annotated_path, damages_list
+            unique_frames = dedupe_frames(frames)
+            if len(unique_frames) < len(frames):
+                log(f"  Skipped {len(frames) - len(unique_frames)} near-duplicate frame(s)")
+                frames = unique_frames
+            
+            log(f"  Analyzing {len(frames)} frames...")
+            analyses = _analyze_frames_batch(file_path, frames, damage_hints, log=log) if MULTI_FRAME_BATCH else None
+            if analyses is None:
+                # Analyze frames concurrently instead (each request is network-bound)
+                with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_FRAMES, len(frames)))) as executor:
+                    results = list(executor.map(
+                        lambda frame: _analyze_single_image(file_path, highlight_damage=False, damage_hints=damage_hints,
+                                                            image_bytes=frame, log=log),
+                        frames
+                    ))
+                analyses = [analysis for analysis, _, _ in results]
+            all_analyses = [
+                f"### Frame {i+1} Analysis:\n{analysis}" for i, analysis in enumerate(analyses)
+            ]
+            
+            combined = "\n\n" + "="*70 + "\n\n".join(all_analyses)
+            return f"MULTI-FRAME VIDEO ANALYSIS\n{'='*70}\n{combined}", None, []
         else:
-            report, annotated_path, damages_list = _analyze_single_image(file_path, damage_hints=damage_hints)
+            log("Extracting frame from video...")
+            frame = extract_single_frame(file_path, 0, log=log)
+            if not frame:
+                return "Error: Could not extract frame from video.", None, []
+            report, annotated_path, damages_list = _analyze_single_image(
+                file_path, damage_hints=damage_hints, image_bytes=frame, log=log)
             return report, annotated_path, damages_list
-            
-    finally:
-        # Clean up temporary files
-        for temp_path in temp_frames:
-            try:
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-            except:
-                pass
+    else:
+        report, annotated_path, damages_list = _analyze_single_image(file_path, damage_hints=damage_hints, log=log)
+        return report, annotated_path, damages_list
+
+
+def _write_jpeg(output_path, img, quality):
+    """Save a BGR image, through TurboJPEG for .jpg paths when it is available."""
+    if TURBOJPEG_AVAILABLE and os.path.splitext(output_path)[1].lower() in ('.jpg', '.jpeg'):
+        with open(output_path, 'wb') as f:
+            f.write(_turbo_jpeg.encode(img, quality=quality, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420))
+    else:
+        cv2.imwrite(output_path, img, [cv2.IMWRITE_JPEG_QUALITY, quality])
 
 
-def draw_damage_boxes(image_path, damages, output_path=None):
+def draw_damage_boxes(image_path, damages, output_path=None, image_bytes=None, image=None, log=print):
     """
     Draw rectangular boxes around detected damage areas on the image.
     
@@ -424,17 +720,25 @@ def draw_damage_boxes(image_path, damages, output_path=None):
         image_path: Path to the original image
         damages: List of damage dictionaries with bounding box info
         output_path: Path to save annotated image (optional)
+        image_bytes: Encoded image to draw on instead of reading image_path (optional)
+        image: Already-decoded BGR image to draw on (optional, left unmodified)
+        log: Called with warning/error messages (default print)
     
     Returns:
         Path to the annotated image
     """
     if not VIDEO_SUPPORT:
-        print("Warning: OpenCV not available. Cannot draw damage boxes.")
+        log("Warning: OpenCV not available. Cannot draw damage boxes.")
         return None
     
     try:
         # Read the image
-        img = cv2.imread(image_path)
+        if image is not None:
+            img = image.copy()
+        elif image_bytes is not None:
+            img = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        else:
+            img = cv2.imread(image_path)
         if img is None:
             return None
         
@@ -451,40 +755,41 @@ def draw_damage_boxes(image_path, damages, output_path=None):
         # Create overlay for semi-transparent boxes
         overlay = img.copy()
         
-        for i, damage in enumerate(damages):
-            box = damage.get('box', {})
-            
-            # Convert percentages to pixel coordinates
-            x = float(box.get('x_percent', 0)) * width / 100
-            y = float(box.get('y_percent', 0)) * height / 100
-            w = float(box.get('width_percent', 10)) * width / 100
-            h = float(box.get('height_percent', 10)) * height / 100
-            
-            # Ensure minimum box size (at least 30 pixels for better visibility)
-            min_pixels = 30
-            if w < min_pixels:
-                # Expand width while keeping center
-                expansion = (min_pixels - w) / 2
-                x = max(0, x - expansion)
-                w = min(width - x, min_pixels)
-            if h < min_pixels:
-                # Expand height while keeping center
-                expansion = (min_pixels - h) / 2
-                y = max(0, y - expansion)
-                h = min(height - y, min_pixels)
-            
-            # Convert to integers after all calculations
-            x = int(x)
-            y = int(y)
-            w = int(w)
-            h = int(h)
-            
-            # Ensure box stays within image bounds
-            x = max(0, min(x, width - 1))
-            y = max(0, min(y, height - 1))
-            w = min(w, width - x)
-            h = min(h, height - y)
-            
+        # Convert percentages to pixel coordinates for all boxes at once
+        boxes = np.array([
+            [float(box.get('x_percent', 0)), float(box.get('y_percent', 0)),
+             float(box.get('width_percent', 10)), float(box.get('height_percent', 10))]
+            for box in (damage.get('box', {}) for damage in damages)
+        ], dtype=np.float64).reshape(-1, 4)
+        boxes *= (width, height, width, height)
+        boxes /= 100
+        x, y, w, h = boxes.T
+        
+        # Ensure minimum box size (at least 30 pixels for better visibility),
+        # expanding while keeping center
+        min_pixels = 30
+        small = w < min_pixels
+        x = np.where(small, np.maximum(0, x - (min_pixels - w) / 2), x)
+        w = np.where(small, np.minimum(width - x, min_pixels), w)
+        small = h < min_pixels
+        y = np.where(small, np.maximum(0, y - (min_pixels - h) / 2), y)
+        h = np.where(small, np.minimum(height - y, min_pixels), h)
+        
+        # Convert to integers after all calculations, then keep boxes within image bounds
+        x, y, w, h = (v.astype(np.int64) for v in (x, y, w, h))
+        x = np.clip(x, 0, width - 1)
+        y = np.clip(y, 0, height - 1)
+        w = np.minimum(w, width - x)
+        h = np.minimum(h, height - y)
+        pixel_boxes = np.stack([x, y, w, h], axis=1).tolist()
+        
+        # Line and label sizes scale with the image, not the box
+        thickness = max(2, int(min(width, height) / 200))
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        font_scale = max(0.5, min(width, height) / 1500)
+        label_thickness = max(1, int(font_scale * 2))
+        
+        for i, (damage, (x, y, w, h)) in enumerate(zip(damages, pixel_boxes)):
             # Get color based on severity
             extent = damage.get('extent', 'default').lower()
             color = colors.get(extent, colors['default'])
@@ -493,23 +798,17 @@ def draw_damage_boxes(image_path, damages, output_path=None):
             cv2.rectangle(overlay, (x, y), (x + w, y + h), color, -1)
             
             # Draw thick border rectangle
-            thickness = max(2, int(min(width, height) / 200))  # Scale thickness with image size
             cv2.rectangle(img, (x, y), (x + w, y + h), color, thickness)
             
             # Draw corner brackets for emphasis
             corner_len = min(20, w // 4, h // 4)
-            # Top-left corner
-            cv2.line(img, (x, y), (x + corner_len, y), color, thickness + 2)
-            cv2.line(img, (x, y), (x, y + corner_len), color, thickness + 2)
-            # Top-right corner
-            cv2.line(img, (x + w, y), (x + w - corner_len, y), color, thickness + 2)
-            cv2.line(img, (x + w, y), (x + w, y + corner_len), color, thickness + 2)
-            # Bottom-left corner
-            cv2.line(img, (x, y + h), (x + corner_len, y + h), color, thickness + 2)
-            cv2.line(img, (x, y + h), (x, y + h - corner_len), color, thickness + 2)
-            # Bottom-right corner
-            cv2.line(img, (x + w, y + h), (x + w - corner_len, y + h), color, thickness + 2)
-            cv2.line(img, (x + w, y + h), (x + w, y + h - corner_len), color, thickness + 2)
+            # All four brackets as one polyline call: each is an elbow through its corner
+            cv2.polylines(img, np.array([
+                [[x + corner_len, y], [x, y], [x, y + corner_len]],                        # Top-left
+                [[x + w - corner_len, y], [x + w, y], [x + w, y + corner_len]],            # Top-right
+                [[x + corner_len, y + h], [x, y + h], [x, y + h - corner_len]],            # Bottom-left
+                [[x + w - corner_len, y + h], [x + w, y + h], [x + w, y + h - corner_len]]  # Bottom-right
+            ], dtype=np.int32), False, color, thickness + 2)
             
             # Create label
             label = damage.get('label', f'Damage {i+1}')
@@ -517,9 +816,6 @@ def draw_damage_boxes(image_path, damages, output_path=None):
             full_label = f"{i+1}. {label} ({extent_text})" if extent_text else f"{i+1}. {label}"
             
             # Draw label with background
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = max(0.5, min(width, height) / 1500)  # Scale font with image
-            label_thickness = max(1, int(font_scale * 2))
             (text_width, text_height), baseline = cv2.getTextSize(full_label, font, font_scale, label_thickness)
             
             # Position label above the box (or below if too close to top)
@@ -549,14 +845,298 @@ def draw_damage_boxes(image_path, damages, output_path=None):
             output_path = str(output_dir / f"{base_name}_annotated_{timestamp}.jpg")
         
         # Save annotated image with high quality
-        cv2.imwrite(output_path, img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        _write_jpeg(output_path, img, 95)
         return output_path
         
     except Exception as e:
-        print(f"Error drawing damage boxes: {str(e)}")
+        log(f"Error drawing damage boxes: {str(e)}")
         return None
 
 
+def _create_completion(request, on_delta=None):
+    """
+    Call the API and return (message text, finish_reason).
+    
+    With on_delta the reply is streamed and each text chunk is passed to
+    on_delta as it arrives, so callers can act on partial output.
+    """
+    if on_delta is None:
+        choice = get_client().chat.completions.create(**request).choices[0]
+        return choice.message.content, choice.finish_reason
+    
+    parts = []
+    finish_reason = None
+    for chunk in get_client().chat.completions.create(stream=True, **request):
+        if not chunk.choices:
+            continue
+        if chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            on_delta(parts[-1])
+        finish_reason = chunk.choices[0].finish_reason or finish_reason
+    return ''.join(parts) or None, finish_reason
+
+
+_RESPONSE_CACHE = JsonDiskCache(GPT_CACHE_DIR, ttl_seconds=GPT_CACHE_TTL, max_entries=GPT_CACHE_MAX_ENTRIES)
+
+
+def _chat_completion_text(on_delta=None, validate=None, **request):
+    """
+    Run a chat completion and return the message text, cached on disk.
+    
+    The cache key is a hash over the whole request (model, prompt, image
+    data, sampling parameters) plus GPT_CACHE_VERSION, so re-analysing the
+    same image with the same prompt skips the API call. Entries expire after
+    GPT_CACHE_TTL and the directory is trimmed to GPT_CACHE_MAX_ENTRIES. Set
+    OPENAI_RESPONSE_CACHE=0 to disable. on_delta is passed to
+    _create_completion and is not called on a cache hit.
+    
+    Only complete replies (finish_reason "stop") are cached, and if validate
+    is given (e.g. the caller's JSON parser) only replies it accepts without
+    raising, so a truncated or malformed reply is never replayed.
+    """
+    if not GPT_RESPONSE_CACHE:
+        return _create_completion(request, on_delta)[0]
+    
+    key = cache_key(GPT_CACHE_VERSION, request)
+    cached = _RESPONSE_CACHE.get(key)
+    if cached is not None:
+        return cached
+    
+    content, finish_reason = _create_completion(request, on_delta)
+    if content and finish_reason == 'stop' and _reply_is_valid(content, validate):
+        _RESPONSE_CACHE.put(key, content)
+    return content
+
+
+def _reply_is_valid(content, validate):
+    """Whether validate(content) succeeds; no validator accepts everything."""
+    if validate is None:
+        return True
+    try:
+        validate(content)
+    except Exception:
+        return False
+    return True
+
+
+def _damage_box_prompt(damage_hints=None, log=print):
+    """BOUNDING_BOX_PROMPT plus the mandatory-areas section built from damage_hints (listed through log)."""
+    prompt = BOUNDING_BOX_PROMPT
+    
+    if damage_hints and len(damage_hints) > 0:
+        hints_text = "\n\n" + "=" * 70 + "\n"
+        hints_text += "🚨 MANDATORY: DAMAGE AREAS FROM INSURANCE ESTIMATION DOCUMENT\n"
+        hints_text += "=" * 70 + "\n"
+        hints_text += "The insurance estimation document has identified these SPECIFIC damaged parts.\n"
+        hints_text += "You MUST create a bounding box for EACH of these areas:\n\n"
+        
+        for i, hint in enumerate(damage_hints, 1):
+            if isinstance(hint, dict):
+                part = hint.get('part', hint.get('description', str(hint)))
+                damage_type = hint.get('type', hint.get('damage_type', ''))
+                if damage_type:
+                    hints_text += f"  📍 REQUIRED BOX {i}: {part} ({damage_type})\n"
+                else:
+                    hints_text += f"  📍 REQUIRED BOX {i}: {part}\n"
+            else:
+                hints_text += f"  📍 REQUIRED BOX {i}: {hint}\n"
+        
+        hints_text += "\n" + "⚠️" * 10 + " CRITICAL REQUIREMENTS " + "⚠️" * 10 + "\n"
+        hints_text += "1. CREATE A BOUNDING BOX FOR EACH ITEM LISTED ABOVE - This is MANDATORY\n"
+        hints_text += "2. The 'location' field in your JSON MUST use the EXACT part name from the document\n"
+        hints_text += "   - If document says 'FRONT LHS - BUFFER', use 'FRONT LHS - BUFFER' as location\n"
+        hints_text += "   - If document says 'Front Bumper', use 'Front Bumper' as location\n"
+        hints_text += "3. 'Buffer' = 'Bumper' (same part, different terminology)\n"
+        hints_text += "4. 'LHS' = Left Hand Side, 'RHS' = Right Hand Side\n"
+        hints_text += "5. Look at the FRONT BUMPER area specifically if 'buffer' is mentioned\n"
+        hints_text += "6. You may also detect additional damages visible but not in the document\n"
+        hints_text += "7. MINIMUM BOXES: You must return at least " + str(len(damage_hints)) + " boxes\n"
+        hints_text += "=" * 70 + "\n"
+        
+        prompt = prompt + hints_text
+        log(f"[Damage Detection] Using {len(damage_hints)} damage hints from estimation document")
+        for hint in damage_hints:
+            if isinstance(hint, dict):
+                log(f"  - {hint.get('part', hint.get('description', str(hint)))}")
+            else:
+                log(f"  - {hint}")
+    
+    return prompt
+
+
+def _validate_damage_boxes(damages):
+    """Expand each damage box to a minimum size plus safety margin, clamped to the image."""
+    validated_damages = []
+    for damage in damages:
+        box = damage.get('box', {})
+        x = float(box.get('x_percent', 0))
+        y = float(box.get('y_percent', 0))
+        w = float(box.get('width_percent', 0))
+        h = float(box.get('height_percent', 0))
+        
+        # Ensure minimum size (at least 3% of image dimension)
+        min_size = 3.0
+        if w < min_size:
+            # Expand width while keeping center
+            expansion = (min_size - w) / 2
+            x = max(0, x - expansion)
+            w = min(100 - x, min_size)
+        if h < min_size:
+            # Expand height while keeping center
+            expansion = (min_size - h) / 2
+            y = max(0, y - expansion)
+            h = min(100 - y, min_size)
+        
+        # Add additional safety margin (2% on each side)
+        margin = 2.0
+        x = max(0, x - margin)
+        y = max(0, y - margin)
+        w = min(100 - x, w + (margin * 2))
+        h = min(100 - y, h + (margin * 2))
+        
+        # Ensure box stays within bounds
+        if x + w > 100:
+            w = 100 - x
+        if y + h > 100:
+            h = 100 - y
+        
+        # Update the box with validated coordinates
+        damage['box'] = {
+            'x_percent': round(x, 2),
+            'y_percent': round(y, 2),
+            'width_percent': round(w, 2),
+            'height_percent': round(h, 2)
+        }
+        
+        validated_damages.append(damage)
+    
+    return validated_damages
+
+
+# Body of a ```json fenced block (closing fence optional)
+_JSON_FENCE_RE = re.compile(r'\s*```(?:json)?(.*?)(?:```|$)', re.S)
+
+
+def _parse_json_reply(response_text):
+    """Parse a JSON reply, removing markdown code fences if the model added them."""
+    fenced = _JSON_FENCE_RE.match(response_text)
+    if fenced:
+        response_text = fenced.group(1)
+    return _json_loads(response_text.strip())
+
+
+def _damage_json_request(prompt, image_data, mime_type, max_tokens=None):
+    """Chat-completion parameters for a JSON damage request on one image."""
+    # Use optimized parameters for maximum accuracy in damage detection
+    return dict(
+        model=GPT_MODEL,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{mime_type};base64,{image_data}",
+                            "detail": IMAGE_DETAIL
+                        }
+                    }
+                ]
+            }
+        ],
+        max_tokens=max_tokens or MAX_TOKENS_BOXES,
+        temperature=TEMPERATURE,
+        top_p=TOP_P,
+        response_format={"type": "json_object"}
+    )
+
+
+class _DamageStream:
+    """
+    Pull completed objects out of a streamed {"damages": [...], ...} reply.
+    
+    Each damage is handed to on_damage(number, damage) as soon as its closing
+    brace arrives, while the rest of the reply is still being generated.
+    """
+    
+    _ARRAY_START = re.compile(r'"damages"\s*:\s*\[')
+    _SEPARATOR = re.compile(r'[\s,]*')
+    
+    def __init__(self, on_damage):
+        self.on_damage = on_damage
+        self.buffer = ''
+        self.pos = None
+        self.count = 0
+        self.done = False
+        self.decoder = json.JSONDecoder()
+    
+    def feed(self, text):
+        self.buffer += text
+        if self.done:
+            return
+        if self.pos is None:
+            start = self._ARRAY_START.search(self.buffer)
+            if not start:
+                return
+            self.pos = start.end()
+        
+        while True:
+            pos = self._SEPARATOR.match(self.buffer, self.pos).end()
+            if pos >= len(self.buffer):
+                return
+            if self.buffer[pos] == ']':
+                self.done = True
+                return
+            try:
+                damage, self.pos = self.decoder.raw_decode(self.buffer, pos)
+            except ValueError:
+                return  # Object not complete yet
+            self.count += 1
+            self.on_damage(self.count, damage)
+
+
+def _print_streamed_damage(number, damage, log=print):
+    """Report a damage from the streamed reply before the full response is in."""
+    if isinstance(damage, dict):
+        log(f"  - Damage {number}: {damage.get('label', 'Unknown')} ({damage.get('extent', 'Unknown')}) "
+            f"at {damage.get('location', 'unspecified location')}")
+
+
+def _request_damage_json(image_path, prompt, image_data=None, mime_type=None, on_damage=None, max_tokens=None,
+                         log=print):
+    """
+    Send the image with a JSON-returning prompt and parse the reply.
+    Returns (data, None) on success or (None, error) on failure.
+    If on_damage is given, the reply is streamed and on_damage(number, damage)
+    is called for each entry of "damages" as it completes. max_tokens
+    defaults to MAX_TOKENS_BOXES. Warnings go to log.
+    """
+    response_text = None
+    try:
+        if image_data is None:
+            image_data, mime_type = encode_image_for_upload(image_path)
+        
+        on_delta = _DamageStream(on_damage).feed if on_damage else None
+        response_text = _chat_completion_text(
+            on_delta=on_delta, validate=_parse_json_reply,
+            **_damage_json_request(prompt, image_data, mime_type, max_tokens=max_tokens)
+        )
+        return _parse_json_reply(response_text), None
+        
+    except json.JSONDecodeError as e:
+        log(f"Warning: Could not parse damage coordinates: {e}")
+        if response_text is not None:
+            log(f"Response was: {response_text[:200]}...")
+        return None, e
+    except Exception as e:
+        log(f"Warning: Could not get damage boxes: {e}")
+        return None, e
+
+
 def get_damage_boxes(image_path, damage_hints=None):
     """
     Get bounding box coordinates for damage areas from GPT-4 Vision.
@@ -570,150 +1150,105 @@ def get_damage_boxes(image_path, damage_hints=None):
     Returns:
         List of damage dictionaries with bounding box info
     """
+    data, _ = _request_damage_json(image_path, _damage_box_prompt(damage_hints))
+    if data is None:
+        return []
     try:
-        image_data = encode_image(image_path)
-        mime_type = get_mime_type(image_path)
-        
-        # Build the prompt - add damage hints if provided
-        prompt = BOUNDING_BOX_PROMPT
-        
-        if damage_hints and len(damage_hints) > 0:
-            hints_text = "\n\n" + "=" * 70 + "\n"
-            hints_text += "🚨 MANDATORY: DAMAGE AREAS FROM INSURANCE ESTIMATION DOCUMENT\n"
-            hints_text += "=" * 70 + "\n"
-            hints_text += "The insurance estimation document has identified these SPECIFIC damaged parts.\n"
-            hints_text += "You MUST create a bounding box for EACH of these areas:\n\n"
-            
-            for i, hint in enumerate(damage_hints, 1):
-                if isinstance(hint, dict):
-                    part = hint.get('part', hint.get('description', str(hint)))
-                    damage_type = hint.get('type', hint.get('damage_type', ''))
-                    if damage_type:
-                        hints_text += f"  📍 REQUIRED BOX {i}: {part} ({damage_type})\n"
-                    else:
-                        hints_text += f"  📍 REQUIRED BOX {i}: {part}\n"
-                else:
-                    hints_text += f"  📍 REQUIRED BOX {i}: {hint}\n"
-            
-            hints_text += "\n" + "⚠️" * 10 + " CRITICAL REQUIREMENTS " + "⚠️" * 10 + "\n"
-            hints_text += "1. CREATE A BOUNDING BOX FOR EACH ITEM LISTED ABOVE - This is MANDATORY\n"
-            hints_text += "2. The 'location' field in your JSON MUST use the EXACT part name from the document\n"
-            hints_text += "   - If document says 'FRONT LHS - BUFFER', use 'FRONT LHS - BUFFER' as location\n"
-            hints_text += "   - If document says 'Front Bumper', use 'Front Bumper' as location\n"
-            hints_text += "3. 'Buffer' = 'Bumper' (same part, different terminology)\n"
-            hints_text += "4. 'LHS' = Left Hand Side, 'RHS' = Right Hand Side\n"
-            hints_text += "5. Look at the FRONT BUMPER area specifically if 'buffer' is mentioned\n"
-            hints_text += "6. You may also detect additional damages visible but not in the document\n"
-            hints_text += "7. MINIMUM BOXES: You must return at least " + str(len(damage_hints)) + " boxes\n"
-            hints_text += "=" * 70 + "\n"
-            
-            prompt = prompt + hints_text
-            print(f"[Damage Detection] Using {len(damage_hints)} damage hints from estimation document")
-            for hint in damage_hints:
-                if isinstance(hint, dict):
-                    print(f"  - {hint.get('part', hint.get('description', str(hint)))}")
-                else:
-                    print(f"  - {hint}")
+        return _validate_damage_boxes(data.get('damages', []))
+    except Exception as e:
+        print(f"Warning: Could not get damage boxes: {e}")
+        return []
+
+
+def _parse_combined_reply(data, log=print):
+    """Split a combined boxes + report reply into (damages_list, report or None)."""
+    try:
+        damages_list = _validate_damage_boxes(data.get('damages', []))
+    except Exception as e:
+        log(f"Warning: Could not get damage boxes: {e}")
+        damages_list = []
+    report = data.get('report')
+    return damages_list, (report.strip() if isinstance(report, str) and report.strip() else None)
+
+
+def _report_from_damages(damages_list):
+    """Generate the text report FROM the bounding box results, for consistency."""
+    report = "DAMAGE FOUND: Yes\n\n"
+    for i, damage in enumerate(damages_list, 1):
+        report += "---\n"
+        report += f"DAMAGE {i}:\n"
+        report += f"- Location: {damage.get('location', 'Not specified')}\n"
+        report += f"- Type: {damage.get('label', 'Unknown')}\n"
+        report += f"- Extent: {damage.get('extent', 'Unknown')}\n"
+    report += "---"
+    return report
+
+
+def _report_prompt(damage_hints=None):
+    """Text-report prompt, including damage hints if available for consistency."""
+    text_prompt = SIMPLE_DAMAGE_PROMPT
+    if damage_hints and len(damage_hints) > 0:
+        hints_text = "\n\nIMPORTANT: The insurance document mentions these damaged areas:\n"
+        for hint in damage_hints:
+            if isinstance(hint, dict):
+                part = hint.get('part', hint.get('description', str(hint)))
+                hints_text += f"- {part}\n"
+            else:
+                hints_text += f"- {hint}\n"
+        hints_text += "\nFocus on identifying damage in these specific areas."
+        text_prompt = text_prompt + hints_text
+    return text_prompt
+
+
+def _analyze_frames_batch(video_path, frames, damage_hints=None, log=print):
+    """
+    Get a text report for every video frame from a single request.
+    
+    All frames go into one message's content array, saving a round trip per
+    frame and letting the model cross-reference them.
+    
+    Returns:
+        List of report strings in frame order, or None if the batched reply
+        could not be used (the caller then analyzes frames one by one)
+    """
+    try:
+        content = [{
+            "type": "text",
+            "text": _report_prompt(damage_hints) + MULTI_FRAME_REPORT_PROMPT.format(num_frames=len(frames))
+        }]
+        # Frames are resized and encoded in parallel; OpenCV releases the GIL while it works
+        with ThreadPoolExecutor(max_workers=max(1, min(ENCODE_WORKERS, len(frames)))) as executor:
+            encoded = list(executor.map(lambda frame: encode_image_for_upload(video_path, image_bytes=frame), frames))
+        for image_data, mime_type in encoded:
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:{mime_type};base64,{image_data}",
+                    "detail": IMAGE_DETAIL
+                }
+            })
         
-        # Use optimized parameters for maximum accuracy in damage detection
-        response = client.chat.completions.create(
+        response_text = _chat_completion_text(
+            validate=_parse_json_reply,
             model=GPT_MODEL,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{mime_type};base64,{image_data}",
-                                "detail": IMAGE_DETAIL
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=MAX_TOKENS_BOXES,
+            messages=[{"role": "user", "content": content}],
+            max_tokens=min(MAX_TOKENS_REPORT * len(frames), 16384),
             temperature=TEMPERATURE,
-            top_p=TOP_P
+            top_p=TOP_P,
+            response_format={"type": "json_object"}
         )
-        
-        response_text = response.choices[0].message.content.strip()
-        
-        # Clean up response - remove markdown code blocks if present
-        if response_text.startswith("```"):
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-        response_text = response_text.strip()
-        
-        # Parse JSON
-        data = json.loads(response_text)
-        damages = data.get('damages', [])
-        
-        # Validate and expand boxes to ensure complete coverage
-        validated_damages = []
-        for damage in damages:
-            box = damage.get('box', {})
-            x = float(box.get('x_percent', 0))
-            y = float(box.get('y_percent', 0))
-            w = float(box.get('width_percent', 0))
-            h = float(box.get('height_percent', 0))
-            
-            # Ensure minimum size (at least 3% of image dimension)
-            min_size = 3.0
-            if w < min_size:
-                # Expand width while keeping center
-                expansion = (min_size - w) / 2
-                x = max(0, x - expansion)
-                w = min(100 - x, min_size)
-            if h < min_size:
-                # Expand height while keeping center
-                expansion = (min_size - h) / 2
-                y = max(0, y - expansion)
-                h = min(100 - y, min_size)
-            
-            # Add additional safety margin (2% on each side)
-            margin = 2.0
-            x = max(0, x - margin)
-            y = max(0, y - margin)
-            w = min(100 - x, w + (margin * 2))
-            h = min(100 - y, h + (margin * 2))
-            
-            # Ensure box stays within bounds
-            if x + w > 100:
-                w = 100 - x
-            if y + h > 100:
-                h = 100 - y
-            
-            # Update the box with validated coordinates
-            damage['box'] = {
-                'x_percent': round(x, 2),
-                'y_percent': round(y, 2),
-                'width_percent': round(w, 2),
-                'height_percent': round(h, 2)
-            }
-            
-            validated_damages.append(damage)
-        
-        return validated_damages
-        
-    except json.JSONDecodeError as e:
-        print(f"Warning: Could not parse damage coordinates: {e}")
-        try:
-            print(f"Response was: {response_text[:200]}...")
-        except:
-            pass
-        return []
+        reports = [entry.get('report') for entry in _parse_json_reply(response_text).get('frames', [])]
     except Exception as e:
-        print(f"Warning: Could not get damage boxes: {e}")
-        return []
+        log(f"Warning: Batched frame analysis failed, analyzing frames separately: {e}")
+        return None
+    
+    if len(reports) != len(frames) or not all(isinstance(r, str) and r.strip() for r in reports):
+        log("Warning: Batched frame analysis returned an incomplete result, analyzing frames separately")
+        return None
+    return [r.strip() for r in reports]
 
 
-def _analyze_single_image(image_path, highlight_damage=True, damage_hints=None):
+def _analyze_single_image(image_path, highlight_damage=True, damage_hints=None, image_bytes=None, log=print):
     """
     Analyze a single image for vehicle damage.
     
@@ -721,6 +1256,9 @@ def _analyze_single_image(image_path, highlight_damage=True, damage_hints=None):
         image_path: Path to the image file
         highlight_damage: Whether to create annotated image with damage boxes
         damage_hints: Optional list of damaged parts/areas from estimation document
+        image_bytes: In-memory JPEG (e.g. a video frame) to analyze instead of reading
+                     image_path; the annotated image is then named after image_path
+        log: Called with each progress message (default print)
     
     Returns:
         Tuple of (report_text, annotated_image_path, damages_list) where damages_list contains structured damage data
@@ -729,49 +1267,42 @@ def _analyze_single_image(image_path, highlight_damage=True, damage_hints=None):
     damages_list = []
     
     try:
-        image_data = encode_image(image_path)
-        mime_type = get_mime_type(image_path)
+        # The decoded image is kept for drawing the boxes, so the file is decoded only once
+        image_data, mime_type, decoded_image = _encode_image_for_upload(image_path, image_bytes=image_bytes)
         
-        # Get damage boxes FIRST - this will be our source of truth for damage count and details
+        # Get damage boxes FIRST - this will be our source of truth for damage count and details.
+        # The same request also returns a written report, used when no boxes come back.
+        fused_report = None
         if highlight_damage and VIDEO_SUPPORT:
-            print("Detecting damage locations and details...")
-            damages_list = get_damage_boxes(image_path, damage_hints=damage_hints)
+            log("Detecting damage locations and details...")
+            prompt = _damage_box_prompt(damage_hints, log=log) + COMBINED_REPORT_PROMPT
+            # The reply carries both the boxes and the report, so it gets both token budgets
+            data, _ = _request_damage_json(image_path, prompt, image_data=image_data, mime_type=mime_type,
+                                           on_damage=lambda number, damage: _print_streamed_damage(number, damage, log),
+                                           max_tokens=MAX_TOKENS_COMBINED, log=log)
+            if data is not None:
+                damages_list, fused_report = _parse_combined_reply(data, log=log)
             
             if damages_list:
-                print(f"Found {len(damages_list)} damage area(s). Creating annotated image...")
-                annotated_path = draw_damage_boxes(image_path, damages_list)
+                log(f"Found {len(damages_list)} damage area(s). Creating annotated image...")
+                annotated_path = draw_damage_boxes(image_path, damages_list, image_bytes=image_bytes,
+                                                   image=decoded_image, log=log)
                 if annotated_path:
-                    print(f"Annotated image saved: {annotated_path}")
+                    log(f"Annotated image saved: {annotated_path}")
             else:
-                print("No damage areas detected.")
+                log("No damage areas detected.")
         
         # Generate text report - either from bounding boxes (for consistency) or from prompt
         if damages_list and len(damages_list) > 0:
-            # Generate report FROM the bounding box results for consistency
-            report = "DAMAGE FOUND: Yes\n\n"
-            for i, damage in enumerate(damages_list, 1):
-                report += "---\n"
-                report += f"DAMAGE {i}:\n"
-                report += f"- Location: {damage.get('location', 'Not specified')}\n"
-                report += f"- Type: {damage.get('label', 'Unknown')}\n"
-                report += f"- Extent: {damage.get('extent', 'Unknown')}\n"
-            report += "---"
+            report = _report_from_damages(damages_list)
+        elif fused_report:
+            # No boxes, but the combined request already produced the written report
+            report = fused_report
         else:
             # Fallback: Get text report from separate API call
-            # Include damage hints if available for consistency
-            text_prompt = SIMPLE_DAMAGE_PROMPT
-            if damage_hints and len(damage_hints) > 0:
-                hints_text = "\n\nIMPORTANT: The insurance document mentions these damaged areas:\n"
-                for hint in damage_hints:
-                    if isinstance(hint, dict):
-                        part = hint.get('part', hint.get('description', str(hint)))
-                        hints_text += f"- {part}\n"
-                    else:
-                        hints_text += f"- {hint}\n"
-                hints_text += "\nFocus on identifying damage in these specific areas."
-                text_prompt = text_prompt + hints_text
+            text_prompt = _report_prompt(damage_hints)
             
-            response = client.chat.completions.create(
+            report = _chat_completion_text(
                 model=GPT_MODEL,
                 messages=[
                     {
@@ -795,8 +1326,6 @@ def _analyze_single_image(image_path, highlight_damage=True, damage_hints=None):
                 temperature=TEMPERATURE,
                 top_p=TOP_P
             )
-            
-            report = response.choices[0].message.content
         
         return report, annotated_path, damages_list
         
@@ -826,6 +1355,122 @@ Technical details: {error_type}: {error_msg}""", None, []
             return f"Error analyzing image: {error_type}: {error_msg}", None, []
 
 
+def submit_batch(file_paths, damage_hints=None, num_frames=5):
+    """
+    Queue damage analysis for many files through the OpenAI Batch API.
+    
+    Batch jobs cost half as much and have their own, higher rate limits, but
+    finish asynchronously (within 24h) - suited to overnight fleet inspections.
+    Each image (or each of num_frames frames sampled from a video) becomes one
+    combined boxes + report request, identical to the interactive one.
+    Repeated paths are queued once; videos yielding no frames are skipped
+    with a warning.
+    
+    Returns:
+        The batch ID, to pass to wait_for_batch()
+    """
+    prompt = _damage_box_prompt(damage_hints) + COMBINED_REPORT_PROMPT
+    
+    def write_line(f, custom_id, encoded):
+        image_data, mime_type = encoded.result()
+        f.write(json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _damage_json_request(prompt, image_data, mime_type, max_tokens=MAX_TOKENS_COMBINED)
+        }) + "\n")
+    
+    # Encoding runs in a pool a few items ahead of the writer, bounded so that
+    # a large fleet never holds more than a window of encoded images in memory
+    pending = deque()
+    written = 0
+    fd, jsonl_path = tempfile.mkstemp(suffix='.jsonl')
+    try:
+        with open(fd, 'w', encoding='utf-8') as f, \
+                ThreadPoolExecutor(max_workers=ENCODE_WORKERS) as executor:
+            # custom_ids must be unique within a batch, so each file is queued once
+            for file_path in dict.fromkeys(file_paths):
+                if is_video_file(file_path):
+                    frames = extract_video_frames(file_path, num_frames=num_frames)
+                    if not frames:
+                        print(f"Warning: No frames extracted from {file_path}, skipping it")
+                    items = [(f"{file_path}#frame{i + 1}", frame) for i, frame in enumerate(frames)]
+                else:
+                    items = [(file_path, None)]
+                
+                for custom_id, frame in items:
+                    pending.append((custom_id, executor.submit(encode_image_for_upload, file_path, image_bytes=frame)))
+                    if len(pending) > 2 * ENCODE_WORKERS:
+                        write_line(f, *pending.popleft())
+                        written += 1
+            while pending:
+                write_line(f, *pending.popleft())
+                written += 1
+        
+        if not written:
+            raise ValueError("No images to submit")
+        
+        with open(jsonl_path, 'rb') as f:
+            input_file = get_client().files.create(file=f, purpose="batch")
+    finally:
+        os.unlink(jsonl_path)
+    
+    batch = get_client().batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    print(f"[OpenAI] Submitted batch {batch.id}")
+    return batch.id
+
+
+def wait_for_batch(batch_id, poll_interval=60):
+    """
+    Poll a batch until it finishes and return its results.
+    
+    Returns:
+        Dict mapping custom_id (file path, or "path#frameN" for video frames)
+        to (report_text, damages_list)
+    """
+    while True:
+        batch = get_client().batches.retrieve(batch_id)
+        if batch.status in ('completed', 'failed', 'expired', 'cancelled'):
+            break
+        time.sleep(poll_interval)
+    
+    if batch.status != 'completed' or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch_id} ended with status '{batch.status}'")
+    
+    results = {}
+    for line in get_client().files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        entry = _json_loads(line)
+        custom_id = entry.get('custom_id')
+        response = entry.get('response') or {}
+        if entry.get('error') or response.get('status_code') != 200:
+            results[custom_id] = (f"Error analyzing image: {entry.get('error') or response.get('body')}", [])
+            continue
+        
+        try:
+            damages_list, report = _parse_combined_reply(
+                _parse_json_reply(response['body']['choices'][0]['message']['content'])
+            )
+        except Exception as e:
+            results[custom_id] = (f"Error analyzing image: could not parse response: {e}", [])
+            continue
+        
+        if damages_list:
+            report = _report_from_damages(damages_list)
+        results[custom_id] = (report or "NO DAMAGE DETECTED - Vehicle appears to be in good condition.", damages_list)
+    return results
+
+
+def analyze_batch_async(file_paths, damage_hints=None, poll_interval=60):
+    """Submit file_paths as one Batch API job and block until its results are in."""
+    return wait_for_batch(submit_batch(file_paths, damage_hints=damage_hints), poll_interval=poll_interval)
+
+
 def open_file_picker():
     """Open a file picker dialog to select an image or video file."""
     if not FILE_PICKER_AVAILABLE:
@@ -850,37 +1495,132 @@ def open_file_picker():
         return None
 
 
+# A tuple, so is_video_file can hand the whole check to str.endswith
+_VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v')
+
+
 def is_video_file(file_path):
     """Check if a file is a video based on its extension."""
-    video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v'}
-    return Path(file_path).suffix.lower() in video_extensions
+    return os.fspath(file_path).lower().endswith(_VIDEO_EXTENSIONS)
+
+
+# CLI banners and menu, built once at import
+_BAR60 = "=" * 60
+_BAR70 = "=" * 70
+_DASH50 = "-" * 50
+_ANALYZING_BANNER = f"\n{_BAR60}\nANALYZING VEHICLE...\n{_BAR60}\n"
+_MENU = "\n".join([
+    "\n" + _DASH50,
+    "OPTIONS:",
+    _DASH50,
+    "  1. Enter file path manually",
+    *(["  2. Browse for file"] if FILE_PICKER_AVAILABLE else []),
+    "  3. Exit",
+    _DASH50
+])
 
 
 def generate_report_header():
     """Generate a simple report header."""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     header = f"""
-{'='*60}
+{_BAR60}
   VEHICLE DAMAGE DETECTION
-{'='*60}
+{_BAR60}
   Time: {timestamp}
-{'='*60}
+{_BAR60}
 """
     return header
 
 
+REPORT_WRITE_BUFFER = 1 << 16
+
+
+def _timestamped_report_path(prefix="damage_report"):
+    """prefix_YYYYMMDD_HHMMSS.txt, with _2, _3, ... appended if that name is taken."""
+    base = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    output_path = f"{base}.txt"
+    count = 1
+    while os.path.exists(output_path):
+        count += 1
+        output_path = f"{base}_{count}.txt"
+    return output_path
+
+
 def save_report(content, output_path=None):
     """Save the assessment report to a file."""
     if not output_path:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = f"damage_report_{timestamp}.txt"
+        output_path = _timestamped_report_path()
     
-    with open(output_path, 'w', encoding='utf-8') as f:
+    # A 64 KiB buffer holds even multi-frame reports, so the file is written in one flush
+    with open(output_path, 'w', encoding='utf-8', buffering=REPORT_WRITE_BUFFER) as f:
         f.write(content)
     
     return output_path
 
 
+def _prompt_file_path():
+    """Menu option 1: read a file path, or None if nothing was entered."""
+    file_path = input("\nEnter file path: ").strip().strip('"').strip("'")
+    if not file_path:
+        print("No file path entered.")
+        return None
+    return file_path
+
+
+def _browse_file_path():
+    """Menu option 2: pick a file with the file browser, or None if cancelled."""
+    print("\nOpening file browser...")
+    file_path = open_file_picker()
+    if not file_path:
+        print("No file selected.")
+        return None
+    print(f"Selected: {file_path}")
+    return file_path
+
+
+# Interactive menu choices that yield a file to analyze; "3" exits
+_MENU_ACTIONS = {
+    "1": _prompt_file_path,
+    **({"2": _browse_file_path} if FILE_PICKER_AVAILABLE else {})
+}
+
+
+def analyze_directory(directory, multi_frame=False, max_workers=8):
+    """
+    Analyze every image and video in a directory concurrently.
+    
+    Files are processed by a thread pool in one process, which avoids paying
+    interpreter startup per file when scripting many assessments. Annotated
+    outputs from earlier runs are skipped. Yields (file_path, result,
+    annotated_path) in sorted file order. Progress messages of each analysis
+    are collected per file and printed just before its result is yielded, so
+    concurrent files don't interleave on stdout.
+    """
+    file_paths = sorted(
+        str(p) for p in Path(directory).iterdir()
+        if p.is_file() and '_annotated_' not in p.name
+        and (p.suffix.lower() in _MIME_TYPES or is_video_file(p.name))
+    )
+    if not file_paths:
+        return
+    
+    def analyze(file_path):
+        messages = []
+        try:
+            result, annotated_path, _ = analyze_vehicle_damage(
+                file_path, is_video=is_video_file(file_path), multi_frame=multi_frame, log=messages.append)
+        except Exception as e:
+            result, annotated_path = f"Error: {str(e)}", None
+        return file_path, result, annotated_path, messages
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(file_paths)))) as executor:
+        for file_path, result, annotated_path, messages in executor.map(analyze, file_paths):
+            if messages:
+                print("\n".join(messages))
+            yield file_path, result, annotated_path
+
+
 def main():
     """Main function for the Vehicle Damage Detection System."""
     parser = argparse.ArgumentParser(
@@ -891,9 +1631,14 @@ Examples:
   python openai_gpt_vision.py image.jpg
   python openai_gpt_vision.py video.mp4 --multi-frame
   python openai_gpt_vision.py --save-report image.jpg
+  python openai_gpt_vision.py --batch photos/ --workers 8 --save-report
         """
     )
     parser.add_argument('file', nargs='?', help='Path to image or video file')
+    parser.add_argument('--batch', metavar='DIR',
+                        help='Analyze every image and video in DIR without prompting')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Files analyzed concurrently in --batch mode (default: 8)')
     parser.add_argument('--multi-frame', action='store_true', 
                         help='Analyze multiple frames from video')
     parser.add_argument('--save-report', action='store_true',
@@ -901,47 +1646,72 @@ Examples:
     
     args = parser.parse_args()
     
+    # Require API key to be set via environment variable
+    if not _load_api_key():
+        _print_missing_api_key()
+        sys.exit(1)
+    
     print(generate_report_header())
     
+    # Batch mode: one process, many files, no prompts
+    if args.batch:
+        if not os.path.isdir(args.batch):
+            print(f"Error: Not a directory: {args.batch}")
+            sys.exit(1)
+        count = 0
+        for file_path, result, annotated_path in analyze_directory(
+                args.batch, multi_frame=args.multi_frame, max_workers=args.workers):
+            count += 1
+            lines = [f"  File: {file_path}", _BAR60, result]
+            if annotated_path:
+                lines.append(f"\n** Annotated image with damage highlights: {annotated_path}")
+            if args.save_report:
+                full_report = generate_report_header() + f"\nFile: {file_path}\n\n" + result
+                report_name = _timestamped_report_path(f"damage_report_{Path(file_path).stem}")
+                lines.append(f"Report saved to: {save_report(full_report, report_name)}")
+            lines.append(_BAR60)
+            print("\n".join(lines))
+        print(f"Analyzed {count} file(s) in {args.batch}")
+        return
+    
     # If file provided via command line
     if args.file:
         file_path = args.file
         is_video = is_video_file(file_path)
         
-        print(f"  File: {file_path}")
-        print(f"  Type: {'Video' if is_video else 'Image'}")
-        print("="*60)
-        print("\nAnalyzing vehicle for damage...\n")
+        print(f"  File: {file_path}\n"
+              f"  Type: {'Video' if is_video else 'Image'}\n"
+              f"{_BAR60}\n"
+              "\nAnalyzing vehicle for damage...\n")
         
         result, annotated_path, damages_list = analyze_vehicle_damage(file_path, is_video=is_video, 
                                         multi_frame=args.multi_frame)
-        print(result)
         
+        # Result, annotation and report lines go out in a single write
+        lines = [result]
         if annotated_path:
-            print(f"\n** Annotated image with damage highlights: {annotated_path}")
+            lines.append(f"\n** Annotated image with damage highlights: {annotated_path}")
         
         if args.save_report:
             full_report = generate_report_header() + f"\nFile: {file_path}\n\n" + result
             report_path = save_report(full_report)
-            print(f"\n{'='*60}")
-            print(f"Report saved to: {report_path}")
+            lines.append(f"\n{_BAR60}\nReport saved to: {report_path}")
         
-        print("="*60)
+        lines.append(_BAR60)
+        print("\n".join(lines))
         return
     
-    # Interactive mode
-    print("  Mode: Interactive")
-    print("="*70)
+    # Interactive mode: flush each line even when stdout is a pipe, so prompts
+    # and results don't sit in the block buffer. One-shot and --batch runs
+    # keep the default buffering and write in large blocks when redirected.
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=True)
+    
+    print("  Mode: Interactive\n" + _BAR70)
     
     while True:
-        print("\n" + "-"*50)
-        print("OPTIONS:")
-        print("-"*50)
-        print("  1. Enter file path manually")
-        if FILE_PICKER_AVAILABLE:
-            print("  2. Browse for file")
-        print("  3. Exit")
-        print("-"*50)
+        # Menu is written in one call rather than line by line
+        print(_MENU)
         
         try:
             choice = input("\nSelect option: ").strip()
@@ -950,25 +1720,15 @@ Examples:
                 print("\nThank you for using the Vehicle Damage Detection System.")
                 break
             
-            file_path = None
-            
-            if choice == "1":
-                file_path = input("\nEnter file path: ").strip().strip('"').strip("'")
-                if not file_path:
-                    print("No file path entered.")
-                    continue
-                    
-            elif choice == "2" and FILE_PICKER_AVAILABLE:
-                print("\nOpening file browser...")
-                file_path = open_file_picker()
-                if not file_path:
-                    print("No file selected.")
-                    continue
-                print(f"Selected: {file_path}")
-            else:
+            action = _MENU_ACTIONS.get(choice)
+            if action is None:
                 print("Invalid option.")
                 continue
             
+            file_path = action()
+            if not file_path:
+                continue
+            
             is_video = is_video_file(file_path)
             multi_frame = False
             
@@ -976,17 +1736,14 @@ Examples:
                 mf_choice = input("\nAnalyze multiple frames? (y/n, default: n): ").strip().lower()
                 multi_frame = mf_choice == 'y'
             
-            print("\n" + "="*60)
-            print("ANALYZING VEHICLE...")
-            print("="*60 + "\n")
+            print(_ANALYZING_BANNER)
             
             result, annotated_path, damages_list = analyze_vehicle_damage(file_path, is_video=is_video, 
                                            multi_frame=multi_frame)
             print(result)
             
             if annotated_path:
-                print(f"\n** Annotated image with damage highlights saved to:")
-                print(f"   {annotated_path}")
+                print(f"\n** Annotated image with damage highlights saved to:\n   {annotated_path}")
             
             # Option to save report
             save_choice = input("\n\nSave report to file? (y/n): ").strip().lower()
@@ -997,7 +1754,7 @@ Examples:
                 report_path = save_report(full_report)
                 print(f"Report saved to: {report_path}")
             
-            print("="*60)
+            print(_BAR60)
                 
         except KeyboardInterrupt:
             print("\n\nExiting...")
@@ -16,8 +16,13 @@ Models to try (search on Roboflow Universe):
 
 import os
 import json
+import gzip
 import base64
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+from disk_cache import JsonDiskCache, cache_key, file_digest
 
 # Check if roboflow is installed
 try:
@@ -27,6 +32,62 @@ except ImportError:
     ROBOFLOW_AVAILABLE = False
     print("[Roboflow] Package not installed. Install with: pip install roboflow")
 
+# orjson parses faster; fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# NumPy is optional here - only used to vectorize box conversion
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# ============================================================================
+# PREDICTION CACHE
+# ============================================================================
+
+# Successful predictions are cached on disk by image content plus model and
+# thresholds, so repeat requests cost neither a round trip nor free-tier quota.
+# Storage, expiry and LRU eviction are handled by disk_cache.JsonDiskCache.
+ROBOFLOW_CACHE_DIR = os.environ.get(
+    'ROBOFLOW_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'damage_detect_roboflow')
+)
+ROBOFLOW_CACHE_MAX_ENTRIES = int(os.environ.get('ROBOFLOW_CACHE_MAX_ENTRIES', '1000'))
+ROBOFLOW_MAX_WORKERS = int(os.environ.get('ROBOFLOW_MAX_WORKERS', '8'))  # Concurrent uploads in detect_damage_batch
+ROBOFLOW_CACHE_TTL = float(os.environ.get('ROBOFLOW_CACHE_TTL', '0'))  # Seconds; 0 = entries never expire
+# gzip the base64 upload body (~25% fewer bytes); opt-in as it relies on the endpoint honouring Content-Encoding
+ROBOFLOW_GZIP_UPLOAD = os.environ.get('ROBOFLOW_GZIP_UPLOAD', '0') == '1'
+
+_PREDICTION_CACHE = JsonDiskCache(
+    ROBOFLOW_CACHE_DIR, ttl_seconds=ROBOFLOW_CACHE_TTL, max_entries=ROBOFLOW_CACHE_MAX_ENTRIES
+)
+
+
+def _cached_prediction(image_path: str, params: tuple, predict: Callable[[], Dict],
+                       use_cache: bool = True, ttl_seconds: Optional[float] = None) -> Dict:
+    """
+    Return the cached result for (image, params) if fresh, else run predict()
+    and cache a success.
+    """
+    if not use_cache or not os.path.isfile(image_path):
+        return predict()
+    
+    key = cache_key(file_digest(image_path), params)
+    result = _PREDICTION_CACHE.get(key, ttl_seconds)
+    if result is not None:
+        return result
+    
+    result = predict()
+    if result.get('success'):
+        _PREDICTION_CACHE.put(key, result)
+    return result
+
 
 def get_roboflow_client(api_key: str = None):
     """
@@ -46,16 +107,37 @@ def get_roboflow_client(api_key: str = None):
             "Then set: $env:ROBOFLOW_API_KEY='your_key'"
         )
     
+    return _roboflow_client(api_key)
+
+
+@lru_cache(maxsize=8)
+def _roboflow_client(api_key: str):
+    """One Roboflow client per API key."""
     return Roboflow(api_key=api_key)
 
 
+@lru_cache(maxsize=8)
+def _get_model(api_key: Optional[str], model_id: str, model_version: int):
+    """
+    Load a hosted model once per (key, model, version).
+    
+    workspace()/project()/version() each make metadata requests, so repeated
+    detections reuse the model handle. Failures are not cached.
+    """
+    rf = get_roboflow_client(api_key)
+    return rf.workspace().project(model_id).version(model_version).model
+
+
 def detect_damage_roboflow(
     image_path: str,
     api_key: str = None,
     model_id: str = "car-damage-detection",
     model_version: int = 1,
     confidence: int = 40,
-    overlap: int = 30
+    overlap: int = 30,
+    use_cache: bool = True,
+    ttl_seconds: Optional[float] = None,
+    include_raw: bool = False
 ) -> Dict:
     """
     Detect vehicle damage using Roboflow's pre-trained models.
@@ -67,47 +149,45 @@ def detect_damage_roboflow(
         model_version: Model version number
         confidence: Minimum confidence threshold (0-100)
         overlap: NMS overlap threshold (0-100)
+        use_cache: Reuse a cached result for the same image and settings
+        ttl_seconds: Maximum cached result age (default ROBOFLOW_CACHE_TTL)
+        include_raw: Also return the full prediction JSON as 'raw_response'
     
     Returns:
         Dictionary with detected damages and bounding boxes
     """
+    return _cached_prediction(
+        image_path, ('sdk', model_id, model_version, confidence, overlap, include_raw),
+        lambda: _detect_damage_roboflow(image_path, api_key, model_id, model_version, confidence, overlap,
+                                        include_raw),
+        use_cache=use_cache, ttl_seconds=ttl_seconds
+    )
+
+
+def _detect_damage_roboflow(image_path: str, api_key: Optional[str], model_id: str,
+                            model_version: int, confidence: int, overlap: int,
+                            include_raw: bool = False) -> Dict:
+    """Uncached detect_damage_roboflow."""
     try:
-        rf = get_roboflow_client(api_key)
-        
-        # Load the model
-        project = rf.workspace().project(model_id)
-        model = project.version(model_version).model
+        # Load the model (cached after the first call)
+        model = _get_model(api_key or os.environ.get('ROBOFLOW_API_KEY'), model_id, model_version)
         
         # Run inference
         result = model.predict(image_path, confidence=confidence, overlap=overlap).json()
         
         # Parse results into our standard format
-        damages = []
-        predictions = result.get('predictions', [])
+        damages = _predictions_to_damages(result.get('predictions', []), result.get('image', {}))
         
-        for pred in predictions:
-            damage = {
-                'label': pred.get('class', 'Damage'),
-                'confidence': pred.get('confidence', 0) * 100,
-                'location': f"x:{pred.get('x', 0):.0f}, y:{pred.get('y', 0):.0f}",
-                'extent': classify_severity(pred.get('confidence', 0)),
-                'box': {
-                    'x_percent': (pred.get('x', 0) - pred.get('width', 0)/2) / result.get('image', {}).get('width', 1) * 100,
-                    'y_percent': (pred.get('y', 0) - pred.get('height', 0)/2) / result.get('image', {}).get('height', 1) * 100,
-                    'width_percent': pred.get('width', 0) / result.get('image', {}).get('width', 1) * 100,
-                    'height_percent': pred.get('height', 0) / result.get('image', {}).get('height', 1) * 100
-                }
-            }
-            damages.append(damage)
-        
-        return {
+        output = {
             'success': True,
             'provider': 'Roboflow',
             'model': model_id,
             'damages': damages,
-            'total_damages': len(damages),
-            'raw_response': result
+            'total_damages': len(damages)
         }
+        if include_raw:
+            output['raw_response'] = result
+        return output
         
     except Exception as e:
         return {
@@ -118,6 +198,56 @@ def detect_damage_roboflow(
         }
 
 
+def _predictions_to_damages(predictions: List[Dict], image: Dict) -> List[Dict]:
+    """
+    Convert Roboflow center-based pixel boxes into damage dicts with
+    top-left percentage boxes.
+    
+    Boxes are scaled by 100/width and 100/height computed once, and with
+    NumPy the box columns are converted in one vectorized pass.
+    """
+    if not predictions:
+        return []
+    inv_w = 100.0 / (image.get('width', 1) or 1)
+    inv_h = 100.0 / (image.get('height', 1) or 1)
+    xs = [pred.get('x', 0) for pred in predictions]
+    ys = [pred.get('y', 0) for pred in predictions]
+    ws = [pred.get('width', 0) for pred in predictions]
+    hs = [pred.get('height', 0) for pred in predictions]
+    confs = [pred.get('confidence', 0) for pred in predictions]
+    
+    if NUMPY_AVAILABLE:
+        x_arr, y_arr, w_arr, h_arr = (np.asarray(col, dtype=np.float64) for col in (xs, ys, ws, hs))
+        x_pct = ((x_arr - w_arr * 0.5) * inv_w).tolist()
+        y_pct = ((y_arr - h_arr * 0.5) * inv_h).tolist()
+        w_pct = (w_arr * inv_w).tolist()
+        h_pct = (h_arr * inv_h).tolist()
+        extents = classify_severity_batch(confs)
+    else:
+        x_pct = [(x - w * 0.5) * inv_w for x, w in zip(xs, ws)]
+        y_pct = [(y - h * 0.5) * inv_h for y, h in zip(ys, hs)]
+        w_pct = [w * inv_w for w in ws]
+        h_pct = [h * inv_h for h in hs]
+        extents = [classify_severity(conf) for conf in confs]
+    
+    return [
+        {
+            'label': pred.get('class', 'Damage'),
+            'confidence': conf * 100,
+            'location': f"x:{x:.0f}, y:{y:.0f}",
+            'extent': extent,
+            'box': {
+                'x_percent': bx,
+                'y_percent': by,
+                'width_percent': bw,
+                'height_percent': bh
+            }
+        }
+        for pred, conf, extent, x, y, bx, by, bw, bh
+        in zip(predictions, confs, extents, xs, ys, x_pct, y_pct, w_pct, h_pct)
+    ]
+
+
 def classify_severity(confidence: float) -> str:
     """Classify damage severity based on detection confidence."""
     if confidence > 0.8:
@@ -128,46 +258,92 @@ def classify_severity(confidence: float) -> str:
         return 'Minor'
 
 
+def classify_severity_batch(confidences) -> List[str]:
+    """classify_severity over a sequence of confidences in one pass."""
+    if not NUMPY_AVAILABLE:
+        return [classify_severity(conf) for conf in confidences]
+    confs = np.asarray(confidences, dtype=np.float64)
+    return np.select([confs > 0.8, confs > 0.6], ['Severe', 'Moderate'], default='Minor').tolist()
+
+
 # Alternative: Use Roboflow's hosted inference API directly (no SDK needed)
 def detect_damage_roboflow_api(
     image_path: str,
     api_key: str = None,
     model_id: str = "car-damage-detection",
-    model_version: int = 1
+    model_version: int = 1,
+    use_cache: bool = True,
+    ttl_seconds: Optional[float] = None,
+    session=None,
+    include_raw: bool = False
 ) -> Dict:
     """
     Direct API call to Roboflow (doesn't require roboflow package).
     
-    This is useful if you don't want to install the SDK.
+    This is useful if you don't want to install the SDK. Successful results
+    are cached like detect_damage_roboflow's. Requests go through session,
+    or a shared keep-alive requests.Session by default. The full response
+    JSON is only kept (and cached) as 'raw_response' when include_raw is set.
     """
-    import requests
-    
     api_key = api_key or os.environ.get('ROBOFLOW_API_KEY')
     if not api_key:
         raise ValueError("ROBOFLOW_API_KEY environment variable not set")
     
+    # The cache key only needs the image hash; the image is read and encoded on a miss
+    return _cached_prediction(
+        image_path, ('api', model_id, model_version, include_raw),
+        lambda: _detect_damage_roboflow_api(image_path, api_key, model_id, model_version, session, include_raw),
+        use_cache=use_cache, ttl_seconds=ttl_seconds
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_session():
+    """Shared requests.Session, so repeated calls reuse TCP/TLS connections."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(16, ROBOFLOW_MAX_WORKERS))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _detect_damage_roboflow_api(image_path: str, api_key: str, model_id: str, model_version: int,
+                                session=None, include_raw: bool = False) -> Dict:
+    """Uncached detect_damage_roboflow_api."""
     # Read and encode image
     with open(image_path, 'rb') as f:
-        image_data = base64.b64encode(f.read()).decode('utf-8')
+        image_data = base64.b64encode(f.read())
     
     # API endpoint
     url = f"https://detect.roboflow.com/{model_id}/{model_version}"
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
     
-    response = requests.post(
+    # base64 only carries 6 bits per byte, so even JPEG payloads shrink;
+    # level 1 keeps the CPU cost small next to the upload time
+    if ROBOFLOW_GZIP_UPLOAD:
+        image_data = gzip.compress(image_data, compresslevel=1)
+        headers['Content-Encoding'] = 'gzip'
+    
+    response = (session or _get_session()).post(
         url,
         params={'api_key': api_key},
         data=image_data,
-        headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        headers=headers
     )
     
     if response.status_code == 200:
-        result = response.json()
-        return {
+        result = _json_loads(response.content)
+        output = {
             'success': True,
             'provider': 'Roboflow API',
-            'predictions': result.get('predictions', []),
-            'raw_response': result
+            'predictions': result.get('predictions', [])
         }
+        if include_raw:
+            output['raw_response'] = result
+        return output
     else:
         return {
             'success': False,
@@ -175,6 +351,19 @@ def detect_damage_roboflow_api(
         }
 
 
+def detect_damage_batch(image_paths: List[str], max_workers: int = None, **kwargs) -> List[Dict]:
+    """
+    Run detect_damage_roboflow_api over many images concurrently.
+    
+    The work is network-bound, so threads sharing one keep-alive session
+    scale until Roboflow's rate limit. Extra keyword arguments are passed to
+    detect_damage_roboflow_api. Results are returned in input order.
+    """
+    max_workers = max_workers or ROBOFLOW_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(image_paths)))) as executor:
+        return list(executor.map(lambda path: detect_damage_roboflow_api(path, **kwargs), image_paths))
+
+
 # ============================================================================
 # POPULAR ROBOFLOW MODELS FOR VEHICLE DAMAGE
 # ============================================================================
@@ -196,6 +385,19 @@ To use a specific model:
 """
 
 
+# Optionally load the hosted model at import, so a long-running service pays
+# the workspace/project/version metadata fetches before its first request
+if os.environ.get('ROBOFLOW_PRELOAD') == '1' and ROBOFLOW_AVAILABLE:
+    try:
+        _get_model(
+            os.environ.get('ROBOFLOW_API_KEY'),
+            os.environ.get('ROBOFLOW_MODEL', 'car-damage-detection'),
+            int(os.environ.get('ROBOFLOW_MODEL_VERSION', '1'))
+        )
+    except Exception as e:
+        print(f"[Roboflow] Model preload failed: {e}")
+
+
 if __name__ == "__main__":
     # Example usage
     print("Roboflow Vehicle Damage Detection")